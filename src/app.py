@@ -17,16 +17,22 @@ from src.core.states import BotState
 from src.core.logger import setup_logger
 from src.core.config import load_all
 from src.audio.input import record_until_silence
+from src.audio.endpoint import EndpointPredictor
+from src.audio.capture import close_capture
+from src.audio.playback import close_player
+from src.audio.oww_frontend import OWWFrontend, close_oww_frontend, get_oww_frontend
 from src.audio.barge import BargeInListener
-from src.asr import make_asr
+from src.asr import make_asr, make_standby_asr
 from src.llm import make_llm
 from src.tts import make_tts
 from src.core.wake import WakeDetector
 from src.wake.openwakeword_engine import OpenWakeWordEngine
 from src.wake.porcupine_engine import PorcupineEngine
+from src.wake.coordinator import WakeCoordinator
 from src.utils.textnorm import normalize_text
 from src.audio.openwakeword_listener import OpenWakeWordListener
 from src.llm.stream_shaper import shape_stream  # netezire stream LLM→TTS
+from src.llm.speculative import SpeculativeStarter
 
 from src.telemetry.metrics import (
     boot_metrics, round_trip, wake_triggers, sessions_started,
@@ -88,6 +94,18 @@ def _normalize_phrase(value: str) -> str:
     except Exception:
         return ""
 
+def _make_endpoint(cfg_audio: dict, stream=None) -> Optional[EndpointPredictor]:
+    """Predictor de endpoint per tură (None = liniște fixă `silence_ms_to_end`)."""
+    ep_cfg = cfg_audio.get("endpoint") or {}
+    if not ep_cfg.get("enabled", False):
+        return None
+    return EndpointPredictor(
+        ep_cfg,
+        max_ms=int(cfg_audio["silence_ms_to_end"]),
+        sample_rate=int(cfg_audio.get("sample_rate", 16000)),
+        # parțialul ASR streaming (dacă există) spune dacă fraza pare încheiată
+        text_fn=(lambda: stream.text) if stream is not None else None,
+    )
 
 
 def main():
@@ -101,6 +119,11 @@ def main():
 
     # Engines
     asr = make_asr(cfg["asr"], logger)
+    asr_streaming = asr.supports_streaming()
+    if asr_streaming:
+        logger.info("🧏 ASR streaming activ: transcriu în timp ce înregistrez (parțiale + local agreement).")
+    spec_cfg = cfg["llm"].get("speculative") or {}
+    speculative = asr_streaming and bool(spec_cfg.get("enabled", False))
     llm = make_llm(cfg["llm"], logger)
     tts = make_tts(cfg["tts"], logger)
     shutdown_once = threading.Event()
@@ -135,6 +158,7 @@ def main():
     ack_cfg = (wake_cfg.get("acknowledgement") or {}) or {}
     ack_en = ack_cfg.get("en") or next(iter(ack_cfg.values()), "Yes, I'm listening.")
     ack_ro = ack_cfg.get("ro", ack_en)
+    handoff_cfg = (wake_cfg.get("handoff") or {})
 
     openwake_cfg = wake_cfg.get("openwakeword") or {}
     porcupine_cfg = wake_cfg.get("porcupine") or {}
@@ -146,10 +170,25 @@ def main():
     porcupine_engine: Optional[PorcupineEngine] = None
     active_engine = "text"
 
+    # Frontend OWW comun (mel + embedding), construit o singură dată din audio + wake.openwakeword
+    # și dat tuturor consumatorilor (wake, goodbye hotword, oww_stop)
+    oww_frontend: Optional[OWWFrontend] = None
+    fast_exit_hotword = ((cfg.get("fast_exit") or cfg.get("core", {}).get("fast_exit") or {}).get("hotword") or {})
+    needs_oww = (
+        requested_engine in ("openwakeword", "openwake", "both", "all")
+        or bool((cfg["audio"].get("oww_stop") or {}).get("enabled"))
+        or (bool(fast_exit_hotword.get("enabled")) and (fast_exit_hotword.get("engine") or "openwakeword").lower() == "openwakeword")
+    )
+    if needs_oww:
+        try:
+            oww_frontend = get_oww_frontend(cfg["audio"], openwake_cfg, logger)
+        except Exception as e:
+            logger.warning(f"OpenWakeWord frontend indisponibil: {e}")
+
     # Initialize OpenWakeWord
     if requested_engine in ("openwakeword", "openwake", "both", "all"):
         try:
-            openwake_engine = OpenWakeWordEngine(cfg["audio"], openwake_cfg, logger)
+            openwake_engine = OpenWakeWordEngine(cfg["audio"], openwake_cfg, logger, frontend=oww_frontend)
             if openwake_engine.has_keyword(wake_keyword):
                 active_engine = "openwakeword"
             else:
@@ -193,9 +232,31 @@ def main():
             logger.info("ℹ️ Wake fallback: recunosc wake phrase-ul din transcript (ASR).")
             logger.info("🤖 Standby: spune 'hello robot' ca să pornești conversația.")
 
+    # Standby pe text: model ASR mic separat (dacă e configurat), nu modelul de sesiune
+    standby_asr = None
+    if active_engine == "text":
+        try:
+            standby_asr = make_standby_asr(cfg["asr"], wake_cfg.get("wake_phrases") or [], logger)
+        except Exception as e:
+            logger.warning(f"Standby ASR mic indisponibil: {e} — folosesc ASR-ul de sesiune.")
+            standby_asr = None
+
+    # Coordonator: toate engine-urile active rulează simultan pe aceeași captură
+    wake_coord: Optional[WakeCoordinator] = None
+    if active_engine in ("openwakeword", "porcupine", "both"):
+        wake_engines = {}
+        if active_engine in ("openwakeword", "both"):
+            wake_engines["openwakeword"] = openwake_engine
+        if active_engine in ("porcupine", "both"):
+            wake_engines["porcupine"] = porcupine_engine
+        wake_coord = WakeCoordinator(wake_engines, logger)
+
     state = BotState.LISTENING
     fast_exit_cfg = (cfg.get("fast_exit") or cfg.get("core", {}).get("fast_exit") or {})
     fast_exit = FastExit(tts, llm, state, logger, fast_exit_cfg, barge=None)
+    # Barge-in + stop-word: construit o singură dată, armat per replică TTS
+    barge = BargeInListener(cfg["audio"], logger, oww_frontend=oww_frontend)
+    barge.start(on_trigger=lambda reason: tts.stop())
     fast_exit_hotword_cfg = (fast_exit_cfg.get("hotword") or {})
     goodbye_engine = (fast_exit_hotword_cfg.get("engine") or "openwakeword").lower()
     use_fast_exit_hotword = bool(fast_exit_hotword_cfg.get("enabled"))
@@ -274,45 +335,19 @@ def main():
 
     try:
         while not shutdown_requested():
-            # —— STANDBY: OpenWakeWord sau fallback text ——
-            if active_engine == "openwakeword" and openwake_engine:
-                detected_kw = openwake_engine.wait_for_any(timeout_seconds=0.25)
+            # —— STANDBY: wake engine(s) în paralel sau fallback text ——
+            handoff_pos: Optional[int] = None
+            if wake_coord:
+                wake_event = wake_coord.wait(timeout=0.5)
                 if shutdown_requested():
                     break
-                if not detected_kw:
-                    time.sleep(0.1)
+                if wake_event is None:
                     continue
-                heard_lang = wake_lang
+                # Porcupine models are English
+                heard_lang = wake_lang if wake_event.engine == "openwakeword" else "en"
+                handoff_pos = wake_event.end_pos
                 wake_triggers.inc()
-                logger.info(f"🔔 Wake phrase detectată (openwakeword:{detected_kw})")
-            elif active_engine == "porcupine" and porcupine_engine:
-                detected = porcupine_engine.wait_for_any(timeout_seconds=0.25)
-                if shutdown_requested():
-                    break
-                if not detected:
-                    time.sleep(0.1)
-                    continue
-                heard_lang = "en"  # Porcupine models are English
-                wake_triggers.inc()
-                logger.info(f"🔔 Wake phrase detectată (porcupine:{detected})")
-            elif active_engine == "both" and openwake_engine and porcupine_engine:
-                # Check both engines with short timeouts
-                detected_oww = openwake_engine.wait_for_any(timeout_seconds=0.1)
-                if detected_oww:
-                    heard_lang = wake_lang
-                    wake_triggers.inc()
-                    logger.info(f"🔔 Wake phrase detectată (openwakeword:{detected_oww})")
-                else:
-                    detected_porc = porcupine_engine.wait_for_any(timeout_seconds=0.1)
-                    if detected_porc:
-                        heard_lang = "en"
-                        wake_triggers.inc()
-                        logger.info(f"🔔 Wake phrase detectată (porcupine:{detected_porc})")
-                    else:
-                        if shutdown_requested():
-                            break
-                        time.sleep(0.05)
-                        continue
+                logger.info(f"🔔 Wake phrase detectată ({wake_event.engine}:{wake_event.keyword})")
             else:
                 # —— STANDBY: text-ASR + fuzzy match ——
                 if shutdown_requested():
@@ -324,16 +359,21 @@ def main():
                     "vad_aggressiveness": 3,
                     "min_valid_seconds": 0.7,
                 })
-                standby_wav = data_dir / "cache" / "standby.wav"
-                standby_wav.parent.mkdir(parents=True, exist_ok=True)
-                path, dur = record_until_silence(standby_cfg, standby_wav, logger)
+                # ASR-ul de standby decodează doar primele `standby.max_seconds`: nu înregistrăm mai mult
+                standby_window_ms = None
+                if standby_asr is not None:
+                    st_max = float((cfg["asr"].get("standby") or {}).get("max_seconds", 1.5))
+                    standby_window_ms = int(st_max * 1000) + int(standby_cfg.get("trim_pad_ms", 200))
+                standby_audio, dur = record_until_silence(
+                    standby_cfg, logger, max_voice_window_ms=standby_window_ms,
+                )
 
                 if dur < float(standby_cfg.get("min_valid_seconds", 0.7)):
                     logger.info(f"⏭️ standby prea scurt (dur={dur:.2f}s) — reiau")
                     continue
 
                 # forțăm EN în standby
-                result = asr.transcribe(path, language_override="en")
+                result = (standby_asr or asr).transcribe(standby_audio, language_override="en")
                 heard_text = (result.get("text") or "").strip()
                 heard_lang = "en"
 
@@ -358,18 +398,12 @@ def main():
                               if "robot" in p and any(x in p.lower() for x in ["salut", "hei", "bun"])]
                 heard_lang = "ro" if any(matched_norm == rp for rp in ro_phrases) else "en"
 
-            # —— Wake confirm ——
-            ack_key = "ack_ro" if heard_lang == "ro" else "ack_en"
-            tts_speak_calls.inc()
-            if not tts.say_cached(ack_key, lang=heard_lang):
-                ack = ack_ro if heard_lang == "ro" else ack_en
-                tts.say(ack, lang=heard_lang)
-
             # —— SESIUNE MULTI-TURN ——
             ask_cfg = dict(cfg["audio"])
             ask_cfg.update({
-                # scurtează endpointing-ul în sesiune (nu afectează standby)
-                "silence_ms_to_end": 500,        # echilibru între rapiditate și false positives
+                # scurtează endpointing-ul în sesiune (nu afectează standby);
+                # e plafonul predictorului de endpoint, care poate închide tura și mai devreme
+                "silence_ms_to_end": int((cfg["audio"].get("endpoint") or {}).get("max_ms", 500)),
                 "max_record_seconds": int(cfg["audio"].get("max_record_seconds", 6)),
                 "vad_aggressiveness": int(cfg["audio"].get("vad_aggressiveness", 2)),
 
@@ -377,7 +411,38 @@ def main():
                 "min_valid_seconds": 0.35,       # permiți fraze foarte scurte
             })
 
+            # —— Handoff: „hello robot, ce vreme e?” dintr-o suflare ——
+            # Citim din pre-roll-ul capturii chiar de la sfârșitul wake phrase-ului;
+            # dacă vorbirea continuă, sărim peste ack și folosim direct audio-ul ăsta.
+            handoff_audio = None
+            handoff_dur = 0.0
+            handoff_stream = None
+            if handoff_pos is not None and handoff_cfg.get("enabled", True):
+                ho_stream = asr.start_stream(lang_prior=heard_lang) if asr_streaming else None
+                ho_audio, ho_dur = record_until_silence(
+                    ask_cfg, logger, quiet_short=True,
+                    start_pos=handoff_pos,
+                    no_voice_timeout_ms=int(handoff_cfg.get("no_voice_ms", 400)),
+                    on_frame=ho_stream.feed if ho_stream else None,
+                    endpoint=_make_endpoint(ask_cfg, ho_stream),
+                )
+                if ho_dur >= float(ask_cfg.get("min_valid_seconds", 0.35)):
+                    handoff_audio, handoff_dur, handoff_stream = ho_audio, ho_dur, ho_stream
+                    logger.info(f"⚡ Comandă în continuarea wake phrase-ului (voce ~{ho_dur:.2f}s) — fără ack.")
+                elif ho_stream:
+                    ho_stream.cancel()
+
+            # —— Wake confirm ——
+            if handoff_audio is None:
+                ack_key = "ack_ro" if heard_lang == "ro" else "ack_en"
+                tts_speak_calls.inc()
+                if not tts.say_cached(ack_key, lang=heard_lang):
+                    ack = ack_ro if heard_lang == "ro" else ack_en
+                    tts.say(ack, lang=heard_lang)
+
             logger.info("🟢 Sesiune activă (spune 'goodbye robot' ca să închizi).")
+            # prior pentru rutarea RO/EN: limba wake-ului, apoi limba turei precedente
+            lang_prior = heard_lang
             state = BotState.LISTENING
             sessions_started.inc()
 
@@ -407,6 +472,7 @@ def main():
                         cfg_openwake=fast_exit_listener_cfg,
                         logger=logger,
                         on_detect=_goodbye_cb,
+                        frontend=oww_frontend,
                     )
                     goodbye_listener.start()
                     logger.info("🟥 Goodbye hotword activ (openwakeword): spune 'goodbye robot' ca să închizi sesiunea.")
@@ -414,6 +480,7 @@ def main():
                     logger.warning(f"🔕 Goodbye hotword dezactivat pentru sesiunea curentă: {e}")
                     goodbye_listener = None
             short_utt_count = 0  # contor pentru utterance-uri prea scurte
+            spec_starter: Optional[SpeculativeStarter] = None
             try:
                 while time.time() - last_activity < session_idle_seconds:
                     # Check if goodbye hotword was triggered
@@ -421,10 +488,37 @@ def main():
                         logger.info("🔴 FastExit: sesiune închisă (revenire în standby).")
                         break
                     
-                    user_wav = data_dir / "cache" / "user_utt.wav"
-                    path_user, dur = record_until_silence(ask_cfg, user_wav, logger, quiet_short=True)
+                    if spec_starter:
+                        # speculație rămasă de la o tură abandonată (eco, text gol)
+                        spec_starter.cancel()
+                        spec_starter = None
+                    if handoff_audio is not None:
+                        # prima tură vine din handoff-ul de după wake
+                        user_audio, dur, user_stream = handoff_audio, handoff_dur, handoff_stream
+                        handoff_audio = handoff_stream = None
+                    else:
+                        user_stream = asr.start_stream(lang_prior=lang_prior) if asr_streaming else None
+                        on_frame = user_stream.feed if user_stream else None
+                        if user_stream is not None and speculative:
+                            spec_starter = SpeculativeStarter(
+                                llm, user_stream, spec_cfg, conversation_history,
+                                lang_fallback=lang_prior,
+                                sample_rate=int(ask_cfg.get("sample_rate", 16000)),
+                                logger=logger,
+                            )
+
+                            def on_frame(frame, speech, _stream=user_stream, _spec=spec_starter):
+                                _stream.feed(frame, speech)
+                                _spec.feed(frame, speech)
+                        user_audio, dur = record_until_silence(
+                            ask_cfg, logger, quiet_short=True,
+                            on_frame=on_frame,
+                            endpoint=_make_endpoint(ask_cfg, user_stream),
+                        )
 
                     if dur < float(ask_cfg.get("min_valid_seconds", 0.35)):
+                        if user_stream:
+                            user_stream.cancel()
                         short_utt_count += 1
                         continue
                     
@@ -440,10 +534,13 @@ def main():
                     user_text = ""
                     user_lang = "en"
                     try:
-                        if hasattr(asr, "transcribe_ro_en"):
-                            asr_res = asr.transcribe_ro_en(path_user)
+                        if user_stream is not None:
+                            # streaming: la endpoint rămâne doar coada (dacă a mai rămas ceva)
+                            asr_res = user_stream.finish(voice_sec=dur)
+                        elif hasattr(asr, "transcribe_ro_en"):
+                            asr_res = asr.transcribe_ro_en(user_audio, lang_prior=lang_prior, voice_sec=dur)
                         else:
-                            asr_res = asr.transcribe(path_user, language_override="en")
+                            asr_res = asr.transcribe(user_audio, language_override="en")
                         user_text = (asr_res.get("text") or "").strip()
                         user_lang = asr_res.get("lang", "en")
                         if user_lang not in ("ro", "en"):
@@ -454,6 +551,8 @@ def main():
                         user_lang = "en"
 
                     logger.info(f"🧏 [{user_lang}] {user_text}")
+                    if user_text:
+                        lang_prior = user_lang
 
                     # ——— Anti-eco textual ———
                     try:
@@ -471,8 +570,8 @@ def main():
                         continue
 
                     user_text_norm = _normalize_phrase(user_text)
-                    # FastExit (inclusiv pe transcript final)
-                    if fast_exit.on_final(user_text):
+                    # FastExit (inclusiv pe transcript final; în streaming poate fi deja declanșat)
+                    if fast_exit.pending() or fast_exit.on_final(user_text):
                         logger.info("🔴 FastExit: închis pe transcript final.")
                         break
 
@@ -504,7 +603,11 @@ def main():
                     
                     # System prompt-ul deja specifică să răspundă în limba userului (linia 73 din llm.yaml)
                     # Nu mai forțăm limba explicit pentru a evita confuzia modelului
-                    token_iter_raw = llm.generate_stream(user_text, lang_hint=user_lang, mode="precise", history=conversation_history[:-1])
+                    # speculație pornită pe parțial: o folosim doar dacă transcriptul final coincide
+                    token_iter_raw = spec_starter.take(user_text, user_lang) if spec_starter else None
+                    spec_starter = None
+                    if token_iter_raw is None:
+                        token_iter_raw = llm.generate_stream(user_text, lang_hint=user_lang, mode="precise", history=conversation_history[:-1])
 
                     # netezește streamul în fraze stabile:
                     tts_cfg = cfg["tts"]
@@ -617,27 +720,20 @@ def main():
 
 
                     # BARGE-IN în timpul TTS (protejată anti-eco și cu arm-delay)
-                    # Stop keyword detector rulează ÎNTOTDEAUNA, barge-in pe voce e opțional
-                    barge = BargeInListener(cfg["audio"], logger)
+                    # Worker-ul de barge oprește TTS direct din callback; aici doar așteptăm
+                    barge.arm()
                     fast_exit.barge = barge
-                    barge_on_voice = bool(cfg["audio"].get("barge_enabled", False)) and bool(cfg["audio"].get("barge_allow_during_tts", True))
                     try:
                         while tts.is_speaking():
                             if fast_exit.pending():
                                 tts.stop()
                                 break
-                            # heard_speech verifică intern stop_detector și returnează True dacă a detectat "stop"
-                            need = int(cfg["audio"].get("barge_min_voice_ms", 650))
-                            detected = barge.heard_speech(need_ms=need)
-                            if detected:
-                                # Stop keyword sau voce detectată
-                                if barge_on_voice:
+                            if barge.triggered.wait(timeout=0.05):
+                                if barge.trigger_reason == "voice":
                                     logger.info("⛔ Barge-in detectat — opresc TTS și trec la listening.")
-                                tts.stop()
                                 break
-                            time.sleep(0.03)
                     finally:
-                        barge.close()
+                        barge.disarm()
 
                     # finalizează logurile
                     debugger.on_tts_end()
@@ -654,6 +750,8 @@ def main():
 
                     last_activity = time.time()
             finally:
+                if spec_starter:
+                    spec_starter.cancel()
                 if goodbye_listener:
                     goodbye_listener.stop()
 
@@ -675,6 +773,8 @@ def main():
         logger.exception(f"Fatal error: {e}")
     finally:
         request_shutdown("Închid aplicația")
+        if wake_coord:
+            wake_coord.close()
         try:
             wake.close()
         except Exception:
@@ -689,6 +789,13 @@ def main():
                 porcupine_engine.close()
         except Exception:
             pass
+        try:
+            barge.close()
+        except Exception:
+            pass
+        close_oww_frontend()
+        close_capture()
+        close_player()
 
 
 if __name__ == "__main__":
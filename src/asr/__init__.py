@@ -37,18 +37,83 @@ def make_asr(cfg_asr: dict, logger=None) -> ASRInterface:
     provider = (cfg_asr.get("provider") or "faster").lower()
     
     if provider == "faster":
-        from .engine_faster import ASREngine
-        engine = ASREngine(
-            model_size=cfg_asr.get("model_size", "base"),
+        engine = build_asr_engine(cfg_asr, logger)
+        return LocalASR(engine, streaming_cfg=cfg_asr.get("streaming"), logger=logger)
+        
+    else:
+        raise ValueError(f"Unknown ASR provider: {provider}")
+
+
+def build_asr_engine(cfg_asr: dict, logger=None):
+    """
+    Construiește engine-ul faster-whisper local din asr.yaml (folosit și de server).
+    Cu `tiers.enabled`, întoarce un `TieredASR`: model mic pentru clipuri scurte,
+    modelul principal pentru rest și pentru escaladare.
+    """
+    from .engine_faster import ASREngine
+    routing = cfg_asr.get("language_routing") or {}
+    parallel = cfg_asr.get("parallel") or {}
+    adaptive = cfg_asr.get("adaptive_beam") or {}
+
+    def _engine(model_size: str, beam_size: int, num_workers: int) -> ASREngine:
+        return ASREngine(
+            model_size=model_size,
             compute_type=cfg_asr.get("compute_type", "int8"),
             device=cfg_asr.get("device", "cpu"),
             force_language=cfg_asr.get("force_language"),
-            beam_size=int(cfg_asr.get("beam_size", 1)),
+            beam_size=beam_size,
             vad_min_silence_ms=int(cfg_asr.get("vad_min_silence_ms", 300)),
             warmup_enabled=bool(cfg_asr.get("warmup_enabled", True)),
+            lang_prior_weight=float(routing.get("prior_weight", 0.65)),
+            lang_fallback_margin=float(routing.get("fallback_margin", 0.2)),
+            num_workers=num_workers,
+            cpu_threads=int(cfg_asr.get("cpu_threads", 0) or 0),
+            parallel_min_seconds=float(parallel.get("min_seconds", 3.0)),
+            split_min_silence_ms=int(parallel.get("split_min_silence_ms", 250)),
+            min_segment_seconds=float(parallel.get("min_segment_seconds", 1.0)),
+            adaptive_beam=bool(adaptive.get("enabled", False)),
+            beam_logprob_threshold=float(adaptive.get("logprob_threshold", -0.6)),
+            beam_compression_threshold=float(adaptive.get("compression_ratio_threshold", 2.4)),
             logger=logger,
         )
-        return LocalASR(engine)
-        
-    else:
-        raise ValueError(f"Unknown ASR provider: {provider}")
+
+    main = _engine(
+        cfg_asr.get("model_size", "base"),
+        int(cfg_asr.get("beam_size", 1)),
+        int(cfg_asr.get("num_workers", 1)),
+    )
+    tiers = cfg_asr.get("tiers") or {}
+    if not tiers.get("enabled", False):
+        return main
+
+    from .tiers import TieredASR
+    short = _engine(tiers.get("short_model_size", "base"), int(tiers.get("short_beam_size", 1)), 1)
+    return TieredASR(
+        main,
+        short,
+        short_max_voice_seconds=float(tiers.get("short_max_voice_seconds", 1.5)),
+        escalate_logprob=float(tiers.get("escalate_logprob", -0.8)),
+        logger=logger,
+    )
+
+
+def make_standby_asr(cfg_asr: dict, wake_phrases, logger=None):
+    """
+    ASR mic, local, pentru wake pe text în standby (model separat de cel de sesiune).
+    Returnează None dacă secțiunea `standby` e dezactivată.
+    """
+    st = cfg_asr.get("standby") or {}
+    if not st.get("enabled", False):
+        return None
+    from .standby import StandbyWakeASR
+    return StandbyWakeASR(
+        list(wake_phrases or []),
+        model_size=st.get("model_size", "tiny"),
+        compute_type=cfg_asr.get("compute_type", "int8"),
+        device=cfg_asr.get("device", "cpu"),
+        cpu_threads=int(st.get("cpu_threads", 2)),
+        max_seconds=float(st.get("max_seconds", 1.5)),
+        probe_tokens=int(st.get("probe_tokens", 3)),
+        prefix_fuzzy=int(st.get("prefix_fuzzy", 70)),
+        logger=logger,
+    )
@@ -2,12 +2,54 @@
 from __future__ import annotations
 from pathlib import Path
 from typing import Dict, Any, Optional, Tuple, List
-import os, tempfile, time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import os
+import time
 import numpy as np
-import soundfile as sf
-from faster_whisper import WhisperModel
+from faster_whisper import WhisperModel, decode_audio
+from faster_whisper.audio import pad_or_trim
+from faster_whisper.tokenizer import Tokenizer
+from faster_whisper.transcribe import get_compression_ratio, get_ctranslate2_storage, get_suppressed_tokens
+
+from src.telemetry.metrics import (
+    observe_hist,
+    asr_latency,
+    asr_lang_routed,
+    asr_lang_fallbacks,
+    asr_greedy_decode,
+    asr_beam_redecode,
+    asr_greedy_accepted,
+    asr_beam_redecodes,
+)
+from .interface import AudioInput
+
+
+def _as_array(audio: AudioInput) -> np.ndarray:
+    """Aduce orice intrare la float32 mono 16 kHz; decodează fișierele o singură dată."""
+    if isinstance(audio, np.ndarray):
+        return np.ascontiguousarray(audio, dtype=np.float32)
+    if isinstance(audio, Path):
+        audio = str(audio)
+    return decode_audio(audio, sampling_rate=16000)
+
+
+def _ro_en_from_info(info) -> Tuple[str, float]:
+    """Alege RO/EN din probabilitățile de limbă ale encoder-ului (renormalizate pe cele două)."""
+    probs = dict(getattr(info, "all_language_probs", None) or [])
+    ro = float(probs.get("ro", 0.0))
+    en = float(probs.get("en", 0.0))
+    if ro + en <= 0.0:
+        # fără probabilități (limbă forțată / model doar EN): nu știm, deci 50/50
+        return ("ro" if getattr(info, "language", None) == "ro" else "en"), 0.5
+    if ro > en:
+        return "ro", ro / (ro + en)
+    return "en", en / (ro + en)
+
+def _avg_logprob(text: str, score: float) -> float:
+    """avg_logprob pe segmente, din scorul intern (care include bonusul pe lungime)."""
+    return float(score) - 0.01 * len(text)
 
-from src.telemetry.metrics import observe_hist, asr_latency
 
 class ASREngine:
     def __init__(
@@ -19,23 +61,58 @@ class ASREngine:
         beam_size: int = 1,
         vad_min_silence_ms: int = 300,
         warmup_enabled: bool = True,
+        lang_prior_weight: float = 0.65,
+        lang_fallback_margin: float = 0.2,
+        num_workers: int = 1,
+        cpu_threads: int = 0,
+        parallel_min_seconds: float = 3.0,
+        split_min_silence_ms: int = 250,
+        min_segment_seconds: float = 1.0,
+        adaptive_beam: bool = False,
+        beam_logprob_threshold: float = -0.6,
+        beam_compression_threshold: float = 2.4,
         logger=None,
     ):
         self.force_language = (force_language or "").strip().lower() or None
         self.beam_size = int(beam_size or 1)
+        # beam adaptiv: întâi greedy, beam_size doar când rezultatul greedy e nesigur
+        self.adaptive_beam = bool(adaptive_beam) and self.beam_size > 1
+        self.beam_logprob_threshold = float(beam_logprob_threshold)
+        self.beam_compression_threshold = float(beam_compression_threshold)
+        self._first_beam = 1 if self.adaptive_beam else self.beam_size
         self.vad_min_silence_ms = int(vad_min_silence_ms or 300)
+        # rutare RO/EN: cât contează limba anterioară și sub ce diferență decodăm ambele limbi
+        self.lang_prior_weight = float(lang_prior_weight)
+        self.lang_fallback_margin = float(lang_fallback_margin)
         self.warmup_enabled = warmup_enabled
         self.log = logger
         self._warmed_up = False
+        self._tokenizers: Dict[str, Tokenizer] = {}
+
+        # utterance-uri lungi: tăiate la pauze și decodate în paralel, câte un worker CTranslate2 pe segment
+        self.num_workers = max(1, int(num_workers or 1))
+        if not cpu_threads and self.num_workers > 1:
+            # nucleele se împart între worker-i (altfel fiecare ar cere 4 thread-uri)
+            cpu_threads = max(1, (os.cpu_count() or 4) // self.num_workers)
+        self.parallel_min_samples = int(16000 * float(parallel_min_seconds))
+        self.split_min_silence_ms = int(split_min_silence_ms)
+        self.min_segment_samples = int(16000 * float(min_segment_seconds))
+        self._pool = (
+            ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="asr-seg")
+            if self.num_workers > 1 else None
+        )
         
         self.model = WhisperModel(
             model_size,
             device=device,
             compute_type=compute_type,
+            cpu_threads=int(cpu_threads or 0),
+            num_workers=self.num_workers,
             download_root=None,
         )
         print(f"[ASR] faster-whisper model={model_size} device={device} compute_type={compute_type} "
-              f"force_language={self.force_language} vad_min_silence_ms={self.vad_min_silence_ms}")
+              f"force_language={self.force_language} vad_min_silence_ms={self.vad_min_silence_ms} "
+              f"workers={self.num_workers} cpu_threads={cpu_threads or 'auto'}")
         
         # Warm-up la boot
         self._ensure_warm()
@@ -49,20 +126,10 @@ class ASREngine:
                 self.log.info("🔥 ASR warm-up start")
             start = time.perf_counter()
             
-            # Creează fișier audio scurt (0.5s tăcere)
-            fd, temp_path = tempfile.mkstemp(suffix=".wav")
-            os.close(fd)
-            try:
-                silence = np.zeros(8000, dtype=np.float32)  # 0.5s @ 16kHz
-                sf.write(temp_path, silence, 16000)
-                
-                # Transcriere dummy
-                self.model.transcribe(temp_path, language="en", beam_size=1)
-            finally:
-                try:
-                    os.remove(temp_path)
-                except Exception:
-                    pass
+            # Transcriere dummy pe 0.5s tăcere, direct din memorie
+            silence = np.zeros(8000, dtype=np.float32)  # 0.5s @ 16kHz
+            segments, _ = self.model.transcribe(silence, language="en", beam_size=1)
+            list(segments)
             
             elapsed = time.perf_counter() - start
             self._warmed_up = True
@@ -73,16 +140,13 @@ class ASREngine:
                 self.log.warning(f"ASR warm-up eșuat: {e}")
 
 
-    # ---- helper intern
-    def _run_once(self, wav_path: str | Path, language: Optional[str], use_vad: bool) -> Tuple[str, str, float, float]:
-        """
-        Returnează: (text, lang_out, lang_prob, score)
-        score = medie(avg_logprob pe segmente) + 0.01 * len(text)
-        """
-        segments, info = self.model.transcribe(
-            str(wav_path),
+    # ---- helpere interne
+    def _transcribe(self, audio: np.ndarray, language: Optional[str], use_vad: bool, beam_size: Optional[int] = None):
+        """Pornește transcrierea (encoder + detecție de limbă); decodarea rulează la consumul segmentelor."""
+        return self.model.transcribe(
+            audio,
             language=language,
-            beam_size=self.beam_size,
+            beam_size=int(beam_size or self._first_beam),
             temperature=0.0,
             vad_filter=use_vad,
             vad_parameters={"min_silence_duration_ms": self.vad_min_silence_ms} if use_vad else None,
@@ -90,6 +154,118 @@ class ASREngine:
             log_prob_threshold=-0.5,
             condition_on_previous_text=False,
         )
+
+    def _run_once(
+        self, audio: np.ndarray, language: Optional[str], use_vad: bool, first=None
+    ) -> Tuple[str, str, float, float]:
+        """
+        Returnează: (text, lang_out, lang_prob, score)
+        score = medie(avg_logprob pe segmente) + 0.01 * len(text)
+        `first` = (segments, info) deja pornite pe același audio (ex: de detecția de limbă).
+        """
+        start = time.perf_counter()
+        segments, info = first if first is not None else self._transcribe(audio, language, use_vad)
+        res = self._collect(segments, info, language)
+        if not self.adaptive_beam:
+            return res
+        asr_greedy_decode.observe(time.perf_counter() - start)
+        return self._escalate_beam(res, audio, language or res[1], use_vad)
+
+    def _needs_beam(self, text: str, score: float) -> Optional[str]:
+        """Motivul pentru care rezultatul greedy nu e de încredere (None = e bun)."""
+        if not text:
+            return "empty"
+        if _avg_logprob(text, score) < self.beam_logprob_threshold:
+            return "logprob"
+        if get_compression_ratio(text) > self.beam_compression_threshold:
+            return "compression"
+        return None
+
+    def _escalate_beam(
+        self, res: Tuple[str, str, float, float], audio: np.ndarray, language: str, use_vad: bool
+    ) -> Tuple[str, str, float, float]:
+        """Re-decodare cu beam_size doar dacă greedy e nesigur; păstrează scorul mai bun."""
+        reason = self._needs_beam(res[0], res[3])
+        if reason is None:
+            asr_greedy_accepted.inc()
+            return res
+        asr_beam_redecodes.inc()
+        start = time.perf_counter()
+        try:
+            segments, info = self._transcribe(audio, language, use_vad, beam_size=self.beam_size)
+            beam = self._collect(segments, info, language)
+        except ValueError as e:
+            if "max() iterable argument is empty" not in str(e):
+                raise
+            return res
+        asr_beam_redecode.observe(time.perf_counter() - start)
+        if self.log:
+            self.log.debug(f"ASR: greedy nesigur ({reason}) → beam {self.beam_size}: '{res[0]}' → '{beam[0]}'")
+        # limba și probabilitatea ei rămân cele din detecție
+        beam = (beam[0], res[1], res[2], beam[3])
+        return beam if beam[0] and (beam[3] >= res[3] or not res[0]) else res
+
+    def _safe_run(self, audio: np.ndarray, language: Optional[str]) -> Tuple[str, str, float, float]:
+        """`_run_once` cu VAD intern; dacă VAD-ul nu lasă nimic (max() pe colecție vidă), retry fără VAD."""
+        try:
+            return self._run_once(audio, language, use_vad=True)
+        except ValueError as e:
+            if "max() iterable argument is empty" in str(e):
+                return self._run_once(audio, language or "en", use_vad=False)
+            raise
+
+    def _split_long(self, audio: np.ndarray) -> Optional[List[np.ndarray]]:
+        """
+        Taie un utterance lung la pauzele interne (VAD-ul Silero din faster-whisper)
+        în cel mult `num_workers` segmente de lungimi apropiate. None = decodare întreagă.
+        """
+        if self._pool is None or audio.shape[0] < self.parallel_min_samples:
+            return None
+        from faster_whisper.vad import VadOptions, get_speech_timestamps
+        speech = get_speech_timestamps(audio, VadOptions(min_silence_duration_ms=self.split_min_silence_ms))
+        if len(speech) < 2:
+            return None
+        target = max(audio.shape[0] / min(self.num_workers, len(speech)), self.min_segment_samples)
+        cuts = [0]
+        for prev, nxt in zip(speech, speech[1:]):
+            if len(cuts) >= self.num_workers:
+                break
+            mid = int(prev["end"] + nxt["start"]) // 2
+            # tăiem la mijlocul pauzei, când segmentul curent e aproape de lungimea-țintă
+            if mid - cuts[-1] >= 0.8 * target and audio.shape[0] - mid >= self.min_segment_samples:
+                cuts.append(mid)
+        if len(cuts) < 2:
+            return None
+        cuts.append(audio.shape[0])
+        return [audio[a:b] for a, b in zip(cuts, cuts[1:])]
+
+    def _decode_chunks(self, chunks: List[np.ndarray], language: str, first=None) -> Tuple[str, str, float, float]:
+        """
+        Decodează segmentele în paralel și le unește în ordine. `first` = (segments, info)
+        deja pornite pe primul segment (ex: de detecția de limbă), ca encoder-ul să nu ruleze de două ori.
+        """
+        def one(i: int) -> Tuple[str, str, float, float]:
+            if i == 0 and first is not None:
+                return self._run_once(chunks[0], language, use_vad=True, first=first)
+            return self._safe_run(chunks[i], language)
+
+        results = list(self._pool.map(one, range(len(chunks))))
+        text = " ".join(r[0] for r in results if r[0]).strip()
+        # scorul întregului: avg_logprob ponderat cu lungimea segmentelor (ca la o decodare întreagă)
+        weights = [c.shape[0] for c in chunks]
+        avg_lp = sum((r[3] - 0.01 * len(r[0])) * w for r, w in zip(results, weights)) / sum(weights)
+        if self.log:
+            self.log.debug(f"ASR: {len(chunks)} segmente decodate în paralel ({[round(w / 16000, 2) for w in weights]}s)")
+        return text, language, results[0][2], avg_lp + 0.01 * len(text)
+
+    def _run(self, audio: np.ndarray, language: Optional[str]) -> Tuple[str, str, float, float]:
+        """Decodare cu limbă dată: în paralel pe segmente dacă utterance-ul e lung, altfel întreagă."""
+        chunks = self._split_long(audio) if language else None
+        if chunks:
+            return self._decode_chunks(chunks, language)
+        return self._safe_run(audio, language)
+
+    def _collect(self, segments, info, language: Optional[str]) -> Tuple[str, str, float, float]:
         segs: List = list(segments)
         text = "".join(s.text for s in segs).strip()
         # scor simplu și robust
@@ -104,35 +280,250 @@ class ASREngine:
         prob = float(getattr(info, "language_probability", 0.0) or 0.0)
         return text, out_lang, prob, score
 
+    def _route_ro_en(self, info, lang_prior: Optional[str] = None) -> Tuple[str, float]:
+        """
+        RO/EN din detecția pe encoder, combinată cu limba anterioară a sesiunii
+        (wake keyword / tura precedentă) ca prior: p' ∝ p·w vs (1-p)·(1-w).
+        """
+        lang, p = _ro_en_from_info(info)
+        w = self.lang_prior_weight
+        if lang_prior in ("ro", "en") and 0.0 < w < 1.0:
+            p_prior = p if lang == lang_prior else 1.0 - p
+            p_prior = (p_prior * w) / (p_prior * w + (1.0 - p_prior) * (1.0 - w))
+            if p_prior >= 0.5:
+                lang, p = lang_prior, p_prior
+            else:
+                lang, p = ("en" if lang_prior == "ro" else "ro"), 1.0 - p_prior
+        return lang, p
+
+    def decode_words(
+        self,
+        audio: np.ndarray,
+        language: Optional[str] = None,
+        prompt: Optional[str] = None,
+        beam_size: Optional[int] = None,
+        lang_prior: Optional[str] = None,
+    ) -> Tuple[List[Tuple[float, float, str]], str, float, float]:
+        """
+        Decodare cu timestamp-uri pe cuvinte, pentru transcrierea incrementală.
+        Fără limbă: detecția pe encoder alege între RO și EN (a doua decodare doar
+        dacă modelul a ghicit altă limbă). Returnează: (cuvinte, lang, lang_prob, avg_logprob).
+        """
+        kwargs = dict(
+            beam_size=int(beam_size or self.beam_size),
+            temperature=0.0,
+            vad_filter=False,
+            word_timestamps=True,
+            initial_prompt=prompt or None,
+            no_speech_threshold=0.6,
+            condition_on_previous_text=False,
+        )
+        language = language or self.force_language
+        segments, info = self.model.transcribe(audio, language=language, **kwargs)
+        prob = 1.0
+        if language is None:
+            language, prob = self._route_ro_en(info, lang_prior)
+            if info.language != language:
+                segments, info = self.model.transcribe(audio, language=language, **kwargs)
+        segs = list(segments)
+        words = [
+            (float(w.start), float(w.end), w.word)
+            for s in segs
+            for w in (getattr(s, "words", None) or [])
+        ]
+        avg_lp = sum(float(s.avg_logprob) for s in segs) / len(segs) if segs else -9.0
+        return words, language, prob, avg_lp
+
+    def redecode_reason(
+        self, voice_sec: Optional[float], text: Optional[str] = None, avg_logprob: Optional[float] = None
+    ) -> Optional[str]:
+        """
+        De ce rezultatul greedy al streaming-ului trebuie înlocuit de o transcriere
+        completă (None = e bun). Aici doar poarta greedy→beam; `text=None` = înainte de coadă.
+        """
+        if text is None or not self.adaptive_beam:
+            return None
+        return self._needs_beam(text, float(avg_logprob if avg_logprob is not None else -9.0) + 0.01 * len(text))
+
     # ---- API standard (păstrat, dar robust la bug-ul cu max() pe colecție vidă)
-    def transcribe(self, wav_path: str | Path, language_override: Optional[str] = None) -> Dict[str, Any]:
+    def transcribe(self, audio: AudioInput, language_override: Optional[str] = None) -> Dict[str, Any]:
         lang = (language_override or self.force_language or None)
         with observe_hist(asr_latency):
+            wav = _as_array(audio)
+            text, out_lang, prob, score = self._run(wav, lang)
+        return {"text": text, "lang": out_lang, "language_probability": prob, "avg_logprob": _avg_logprob(text, score)}
+
+    # ---- transcriere strict RO/EN: o singură decodare, a doua doar la incertitudine
+    def transcribe_ro_en(
+        self, audio: AudioInput, lang_prior: Optional[str] = None, voice_sec: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Detecția de limbă rulează pe ieșirea encoder-ului (aceeași folosită apoi la
+        decodare), e restrânsă la RO/EN și ajustată cu `lang_prior`. Decodăm o dată
+        în limba aleasă; doar dacă diferența RO/EN e sub `lang_fallback_margin`
+        decodăm și cealaltă limbă și păstrăm scorul mai bun (ca înainte).
+        `voice_sec` e ignorat aici (îl folosește `TieredASR` la alegerea modelului).
+        """
+        with observe_hist(asr_latency):
+            wav = _as_array(audio)
+            if self.force_language:
+                text, lang, prob, score = self._run(wav, self.force_language)
+                return {"text": text, "lang": lang, "language_probability": prob, "avg_logprob": _avg_logprob(text, score)}
+
+            # utterance lung: limba se detectează pe primul segment, apoi toate se decodează în paralel
+            chunks = self._split_long(wav)
             try:
-                text, out_lang, prob, _ = self._run_once(wav_path, lang, use_vad=True)
-            except ValueError as e:
-                if "max() iterable argument is empty" in str(e):
-                    fallback_lang = lang or "en"
-                    text, out_lang, prob, _ = self._run_once(wav_path, fallback_lang, use_vad=False)
+                segments, info = self._transcribe(chunks[0] if chunks else wav, None, use_vad=True)
+                lang, p = self._route_ro_en(info, lang_prior)
+                if chunks:
+                    best = self._decode_chunks(chunks, lang, (segments, info) if info.language == lang else None)
+                elif info.language == lang:
+                    # encoder-ul a rulat deja; decodarea folosește direct ieșirea lui
+                    best = self._run_once(wav, lang, use_vad=True, first=(segments, info))
                 else:
+                    best = self._run_once(wav, lang, use_vad=True)
+            except ValueError as e:
+                if "max() iterable argument is empty" not in str(e):
                     raise
-        return {"text": text, "lang": out_lang, "language_probability": prob}
+                # VAD-ul intern n-a lăsat nimic pentru detecție: mergem pe prior, fără VAD
+                lang, p = (lang_prior if lang_prior in ("ro", "en") else "en"), 0.5
+                best = self._run_once(wav, lang, use_vad=False)
+            return self._finish_ro_en(wav, lang, p, best, lang_prior)
+
+    def _finish_ro_en(
+        self, wav: np.ndarray, lang: str, p: float, best: Tuple[str, str, float, float], lang_prior: Optional[str]
+    ) -> Dict[str, Any]:
+        """Sub marjă decodăm și cealaltă limbă și păstrăm scorul mai bun; construiește rezultatul."""
+        best_lang = lang
+        asr_lang_routed.inc()
+
+        fallback = (2.0 * p - 1.0) < self.lang_fallback_margin
+        if fallback:
+            asr_lang_fallbacks.inc()
+            other = "en" if lang == "ro" else "ro"
+            alt = self._run(wav, other)
+            if alt[0] and (alt[3] > best[3] or not best[0]):
+                best, best_lang = alt, other
+
+        if self.log:
+            extra = f", fallback → {best_lang}" if fallback else ""
+            self.log.debug(f"ASR routing: {lang} p={p:.2f} (prior={lang_prior or '-'}){extra}")
+        return {
+            "text": best[0],
+            "lang": best_lang,
+            "language_probability": float(p if best_lang == lang else 1.0 - p),
+            "avg_logprob": _avg_logprob(best[0], best[3]),
+        }
+
+    # ---- inferență pe loturi (scheduler-ul serverului)
+    def _tokenizer(self, language: str) -> Tokenizer:
+        tok = self._tokenizers.get(language)
+        if tok is None:
+            tok = Tokenizer(self.model.hf_tokenizer, self.model.model.is_multilingual, task="transcribe", language=language)
+            self._tokenizers[language] = tok
+        return tok
+
+    def _no_speech(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Rezultat gol pentru un clip în care VAD-ul n-a găsit voce (nu mai intră în lot)."""
+        lang = item.get("language") or self.force_language
+        if not lang:
+            prior = item.get("lang_prior") if item.get("ro_en") else None
+            lang = prior if prior in ("ro", "en") else "en"
+        return {"text": "", "lang": lang, "language_probability": 0.0, "avg_logprob": -9.0}
+
+    def _single(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        if item.get("ro_en"):
+            return self.transcribe_ro_en(item["audio"], lang_prior=item.get("lang_prior"))
+        return self.transcribe(item["audio"], item.get("language"))
+
+    def transcribe_batch(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Transcrie mai multe cereri independente cu un singur apel de encoder și un
+        singur `generate` pe lot. Item: {"audio", "language", "ro_en", "lang_prior"}.
+
+        Doar clipurile de sub 30 s (o fereastră Whisper) intră în lot; cele mai lungi
+        și loturile de un singur element merg pe drumul obișnuit (VAD + segmentare).
+        Ca `vad_filter` pe drumul obișnuit, fiecare clip din lot trece întâi prin VAD-ul
+        Silero: intră doar vocea, iar clipurile fără voce primesc direct text gol.
+        Rezultatele au aceeași formă ca `transcribe` / `transcribe_ro_en`.
+        """
+        items = [dict(item, audio=_as_array(item["audio"])) for item in items]
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        fe = self.model.feature_extractor
+        batch = [(i, item["audio"]) for i, item in enumerate(items) if 0 < item["audio"].shape[0] <= fe.n_samples]
+        if len(batch) < 2:
+            return [self._single(item) for item in items]
+
+        from faster_whisper.vad import VadOptions, collect_chunks, get_speech_timestamps
+        vad = VadOptions(min_silence_duration_ms=self.vad_min_silence_ms)
+        voiced = []
+        for i, wav in batch:
+            speech = get_speech_timestamps(wav, vad)
+            if speech:
+                voiced.append((i, collect_chunks(wav, speech)))
+            else:
+                results[i] = self._no_speech(items[i])
+        batch = voiced
+        if len(batch) < 2:
+            return [res if res is not None else self._single(item) for item, res in zip(items, results)]
 
-    # ---- NOU: transcriere strict EN/RO -> alegem cea mai bună
-    def transcribe_ro_en(self, wav_path: str | Path) -> Dict[str, Any]:
         with observe_hist(asr_latency):
-            # rulăm EN & RO cu VAD intern; dacă dă eroare, retry fără VAD
-            def safe(lang):
-                try:
-                    return self._run_once(wav_path, lang, use_vad=True)
-                except ValueError as e:
-                    if "max() iterable argument is empty" in str(e):
-                        return self._run_once(wav_path, lang, use_vad=False)
-                    raise
-            en_text, _, _, en_score = safe("en")
-            ro_text, _, _, ro_score = safe("ro")
+            feats = []
+            for _, wav in batch:
+                f = fe(wav)
+                content = f.shape[-1] - fe.nb_max_frames
+                feats.append(pad_or_trim(f[:, :max(content, 1)], fe.nb_max_frames))
+            encoder_output = self.model.model.encode(get_ctranslate2_storage(np.stack(feats)))
+            multilingual = self.model.model.is_multilingual
+            detected = self.model.model.detect_language(encoder_output) if multilingual else None
 
-        if (ro_score > en_score) and ro_text:
-            return {"text": ro_text, "lang": "ro", "language_probability": 1.0}
-        else:
-            return {"text": en_text, "lang": "en", "language_probability": 1.0}
+            routes: List[Tuple[str, float]] = []
+            for k, (i, _) in enumerate(batch):
+                item = items[i]
+                if detected is not None:
+                    probs = [(tok[2:-2], float(p)) for tok, p in detected[k]]
+                    info = SimpleNamespace(language=probs[0][0], language_probability=probs[0][1], all_language_probs=probs)
+                else:
+                    info = SimpleNamespace(language="en", language_probability=1.0, all_language_probs=None)
+                forced = item.get("language") or self.force_language
+                if forced:
+                    routes.append((forced, 1.0))
+                elif item.get("ro_en"):
+                    routes.append(self._route_ro_en(info, item.get("lang_prior")))
+                else:
+                    routes.append((info.language, info.language_probability))
+
+            prompts = [list(self._tokenizer(lang).sot_sequence) + [self._tokenizer(lang).no_timestamps] for lang, _ in routes]
+            suppress = get_suppressed_tokens(self._tokenizer(routes[0][0]), [-1])
+            decoded = self.model.model.generate(
+                encoder_output,
+                prompts,
+                beam_size=self._first_beam,
+                max_length=self.model.max_length,
+                return_scores=True,
+                return_no_speech_prob=True,
+                suppress_blank=True,
+                suppress_tokens=suppress,
+            )
+
+        for (i, wav), (lang, p), res in zip(batch, routes, decoded):
+            tokens = res.sequences_ids[0]
+            avg_lp = float(res.scores[0]) * len(tokens) / (len(tokens) + 1)
+            text = self._tokenizer(lang).decode(tokens).strip()
+            if res.no_speech_prob > 0.6 and avg_lp < -0.5:
+                # aceeași regulă ca la transcrierea obișnuită: tăcere, nu text
+                text = ""
+            best = (text, lang, p, avg_lp + 0.01 * len(text))
+            if self.adaptive_beam:
+                best = self._escalate_beam(best, wav, lang, use_vad=True)
+                text, avg_lp = best[0], _avg_logprob(best[0], best[3])
+            item = items[i]
+            if item.get("ro_en") and not (item.get("language") or self.force_language):
+                results[i] = self._finish_ro_en(wav, lang, p, best, item.get("lang_prior"))
+            else:
+                results[i] = {"text": text, "lang": lang, "language_probability": p, "avg_logprob": avg_lp}
+
+        for i, item in enumerate(items):
+            if results[i] is None:
+                results[i] = self._single(item)
+        return results
@@ -5,20 +5,26 @@ Permite rularea fie local (Whisper), fie remote (HTTP server).
 """
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Union, BinaryIO
 from pathlib import Path
+import io
+
+import numpy as np
+
+# Audio acceptat de ASR: cale WAV, fișier deschis sau buffer float32 mono 16 kHz
+AudioInput = Union[str, Path, BinaryIO, np.ndarray]
 
 
 class ASRInterface(ABC):
     """Interfață abstractă pentru Speech-to-Text."""
     
     @abstractmethod
-    def transcribe(self, wav_path: str | Path, language_override: Optional[str] = None) -> Dict[str, Any]:
+    def transcribe(self, audio: AudioInput, language_override: Optional[str] = None) -> Dict[str, Any]:
         """
-        Transcrie un fișier audio.
+        Transcrie audio (fișier sau buffer din memorie).
         
         Args:
-            wav_path: Calea către fișierul WAV
+            audio: Calea către fișierul WAV sau ndarray float32 mono 16 kHz
             language_override: Forțează o limbă specifică (opțional)
             
         Returns:
@@ -27,19 +33,35 @@ class ASRInterface(ABC):
         pass
     
     @abstractmethod
-    def transcribe_ro_en(self, wav_path: str | Path) -> Dict[str, Any]:
+    def transcribe_ro_en(
+        self, audio: AudioInput, lang_prior: Optional[str] = None, voice_sec: Optional[float] = None
+    ) -> Dict[str, Any]:
         """
         Transcrie cu detecție automată RO/EN.
-        Rulează transcriere în ambele limbi și alege cea mai bună.
+        Alege limba din detecția pe encoder (+ prior) și decodează o dată;
+        a doua limbă se decodează doar când detecția e nesigură.
         
         Args:
-            wav_path: Calea către fișierul WAV
+            audio: Calea către fișierul WAV sau ndarray float32 mono 16 kHz
+            lang_prior: Limba probabilă din context (wake keyword / tura precedentă)
+            voice_sec: Durata vocii măsurată de recorder (alege nivelul de model, dacă există)
             
         Returns:
             Dict cu: {"text": str, "lang": str, "language_probability": float}
         """
         pass
 
+    def supports_streaming(self) -> bool:
+        """True dacă implementarea poate transcrie incremental în timpul înregistrării."""
+        return False
+
+    def start_stream(self, language: Optional[str] = None, lang_prior: Optional[str] = None):
+        """
+        Pornește o transcriere incrementală; se hrănește din recorder (`feed`) și
+        se închide cu `finish()` (același dict ca `transcribe`) sau `cancel()`.
+        """
+        raise NotImplementedError("ASR-ul curent nu suportă streaming.")
+
 
 class LocalASR(ASRInterface):
     """
@@ -47,18 +69,46 @@ class LocalASR(ASRInterface):
     Wrapper peste ASREngine existent.
     """
     
-    def __init__(self, engine):
+    def __init__(self, engine, streaming_cfg: Optional[Dict[str, Any]] = None, logger=None):
         """
         Args:
-            engine: Instanță de ASREngine (faster-whisper)
+            engine: Instanță de ASREngine (faster-whisper) sau TieredASR
+            streaming_cfg: Secțiunea `streaming` din asr.yaml (opțional)
         """
         self._engine = engine
+        self._streaming_cfg = streaming_cfg or {}
+        self.log = logger
+        # hook-uri de evenimente (app-ul le suprascrie, ex: FastExit pe parțiale)
+        self.on_partial = None
+        self.on_final = None
     
-    def transcribe(self, wav_path: str | Path, language_override: Optional[str] = None) -> Dict[str, Any]:
-        return self._engine.transcribe(wav_path, language_override)
+    def transcribe(self, audio: AudioInput, language_override: Optional[str] = None) -> Dict[str, Any]:
+        return self._engine.transcribe(audio, language_override)
     
-    def transcribe_ro_en(self, wav_path: str | Path) -> Dict[str, Any]:
-        return self._engine.transcribe_ro_en(wav_path)
+    def transcribe_ro_en(
+        self, audio: AudioInput, lang_prior: Optional[str] = None, voice_sec: Optional[float] = None
+    ) -> Dict[str, Any]:
+        return self._engine.transcribe_ro_en(audio, lang_prior=lang_prior, voice_sec=voice_sec)
+
+    def supports_streaming(self) -> bool:
+        return bool(self._streaming_cfg.get("enabled", False))
+
+    def start_stream(self, language: Optional[str] = None, lang_prior: Optional[str] = None):
+        from .streaming import StreamingTranscriber
+        cfg = self._streaming_cfg
+        beam = cfg.get("beam_size")
+        return StreamingTranscriber(
+            self._engine,
+            interval_ms=int(cfg.get("interval_ms", 400)),
+            min_audio_ms=int(cfg.get("min_audio_ms", 500)),
+            pad_ms=int(cfg.get("pad_ms", 200)),
+            beam_size=int(beam) if beam else 1,
+            language=language,
+            lang_prior=lang_prior,
+            on_partial=lambda text: self.on_partial(text) if callable(self.on_partial) else None,
+            on_final=lambda text: self.on_final(text) if callable(self.on_final) else None,
+            logger=self.log,
+        )
 
 
 class RemoteASR(ASRInterface):
@@ -78,15 +128,27 @@ class RemoteASR(ASRInterface):
         self.base_url = f"http://{host}:{port}"
         self.timeout = timeout
         self.log = logger
+        self.sample_rate = 16000
+    
+    def _wav_bytes(self, audio: AudioInput) -> bytes:
+        """Serializează audio-ul ca WAV PCM16 în memorie (fără fișiere temporare)."""
+        if isinstance(audio, np.ndarray):
+            import soundfile as sf
+            buf = io.BytesIO()
+            sf.write(buf, audio, self.sample_rate, format="WAV", subtype="PCM_16")
+            return buf.getvalue()
+        if hasattr(audio, "read"):
+            return audio.read()
+        with open(audio, 'rb') as f:
+            return f.read()
     
-    def transcribe(self, wav_path: str | Path, language_override: Optional[str] = None) -> Dict[str, Any]:
+    def transcribe(self, audio: AudioInput, language_override: Optional[str] = None) -> Dict[str, Any]:
         import requests
         
         url = f"{self.base_url}/transcribe"
         
         try:
-            with open(wav_path, 'rb') as f:
-                audio_data = f.read()
+            audio_data = self._wav_bytes(audio)
             
             params = {}
             if language_override:
@@ -107,18 +169,26 @@ class RemoteASR(ASRInterface):
                 self.log.error(f"RemoteASR error: {e}")
             return {"text": "", "lang": "en", "language_probability": 0.0}
     
-    def transcribe_ro_en(self, wav_path: str | Path) -> Dict[str, Any]:
+    def transcribe_ro_en(
+        self, audio: AudioInput, lang_prior: Optional[str] = None, voice_sec: Optional[float] = None
+    ) -> Dict[str, Any]:
         import requests
         
         url = f"{self.base_url}/transcribe_ro_en"
         
         try:
-            with open(wav_path, 'rb') as f:
-                audio_data = f.read()
+            audio_data = self._wav_bytes(audio)
+            
+            params = {}
+            if lang_prior:
+                params['prior'] = lang_prior
+            if voice_sec:
+                params['voice_sec'] = f"{float(voice_sec):.2f}"
             
             response = requests.post(
                 url,
                 data=audio_data,
+                params=params,
                 headers={'Content-Type': 'audio/wav'},
                 timeout=self.timeout
             )
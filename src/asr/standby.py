@@ -0,0 +1,117 @@
+# src/asr/standby.py
+"""
+ASR mic pentru standby-ul cu wake pe text (fallback fără engine neural de wake).
+
+Un model Whisper separat (implicit `tiny`), încărcat lângă cel de sesiune,
+decodează doar ~1.5 s de audio, greedy, cu prompt-ul înclinat spre
+`wake_phrases`. Decodarea merge pe encoder-ul calculat o singură dată, în doi
+pași: câțiva tokeni de probă, apoi restul doar dacă începutul încă poate fi un
+wake phrase — zgomotul din cameră nu mai plătește o decodare completă.
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from faster_whisper import WhisperModel
+from faster_whisper.audio import pad_or_trim
+from faster_whisper.tokenizer import Tokenizer
+from faster_whisper.transcribe import get_suppressed_tokens
+from rapidfuzz import fuzz
+
+from src.utils.textnorm import normalize_text
+
+
+class StandbyWakeASR:
+    def __init__(
+        self,
+        wake_phrases: List[str],
+        model_size: str = "tiny",
+        compute_type: str = "int8",
+        device: str = "cpu",
+        cpu_threads: int = 2,
+        max_seconds: float = 1.5,
+        probe_tokens: int = 3,
+        prefix_fuzzy: int = 70,
+        no_speech_threshold: float = 0.6,
+        logger=None,
+    ):
+        self.log = logger
+        self.max_samples = int(16000 * float(max_seconds))
+        self.probe_tokens = max(1, int(probe_tokens))
+        self.prefix_fuzzy = int(prefix_fuzzy)
+        self.no_speech_threshold = float(no_speech_threshold)
+        self.early_exits = 0
+
+        self.model = WhisperModel(model_size, device=device, compute_type=compute_type, cpu_threads=int(cpu_threads))
+        self.tokenizer = Tokenizer(
+            self.model.hf_tokenizer, self.model.model.is_multilingual, task="transcribe", language="en"
+        )
+        self._suppress = get_suppressed_tokens(self.tokenizer, [-1])
+
+        phrases = [p for p in (wake_phrases or []) if normalize_text(p)]
+        self.phrases = [normalize_text(p) for p in phrases]
+        # prompt: lista de wake phrases, ca modelul să „audă” mai ușor exact formele astea
+        prompt = self.tokenizer.encode(" " + ", ".join(phrases)) if phrases else []
+        self._prompt = prompt[-(self.model.max_length // 2 - 1):]
+        # plafon de tokeni: cel mai lung wake phrase + o marjă mică
+        longest = max((len(self.tokenizer.encode(" " + p)) for p in phrases), default=6)
+        self.max_new_tokens = longest + 2
+
+        if self.log:
+            self.log.info(
+                f"🎧 Standby ASR: faster-whisper {model_size} (greedy, ≤{max_seconds:.1f}s, "
+                f"≤{self.max_new_tokens} tokeni, {len(self.phrases)} wake phrases în prompt)"
+            )
+
+    def _generate(self, encoder_output, prefix: List[int], n_new: int) -> Tuple[List[int], float]:
+        prompt = [self.tokenizer.sot_prev] if self._prompt else []
+        prompt += self._prompt + list(self.tokenizer.sot_sequence) + [self.tokenizer.no_timestamps] + prefix
+        res = self.model.model.generate(
+            encoder_output,
+            [prompt],
+            beam_size=1,
+            max_length=len(prompt) + n_new,
+            return_no_speech_prob=True,
+            suppress_blank=not prefix,
+            suppress_tokens=self._suppress,
+        )[0]
+        tokens = list(res.sequences_ids[0])
+        if prefix and tokens[:len(prefix)] == prefix:
+            tokens = tokens[len(prefix):]
+        return tokens, float(res.no_speech_prob)
+
+    def _could_match(self, text: str) -> bool:
+        """Poate începutul ăsta să fie (aproximativ) începutul unui wake phrase?"""
+        norm = normalize_text(text)
+        if not norm or not self.phrases:
+            return True
+        return any(fuzz.partial_ratio(norm, p[:len(norm) + 2]) >= self.prefix_fuzzy for p in self.phrases)
+
+    def transcribe(self, audio: np.ndarray, language_override: Optional[str] = None) -> Dict[str, Any]:
+        start = time.perf_counter()
+        audio = np.ascontiguousarray(audio[:self.max_samples], dtype=np.float32)
+        fe = self.model.feature_extractor
+        features = fe(audio)
+        content = features.shape[-1] - fe.nb_max_frames
+        encoder_output = self.model.encode(pad_or_trim(features[:, :max(content, 1)], fe.nb_max_frames))
+
+        tokens, no_speech = self._generate(encoder_output, [], self.probe_tokens)
+        text = self.tokenizer.decode(tokens).strip()
+        if no_speech > self.no_speech_threshold:
+            # modelul zice că nu e vorbire: zgomot, nu mai decodăm nimic
+            text = ""
+        elif len(tokens) >= self.probe_tokens:
+            # proba n-a ajuns la final: continuăm doar dacă încă seamănă cu un wake phrase
+            if self._could_match(text):
+                rest, _ = self._generate(encoder_output, tokens, max(1, self.max_new_tokens - len(tokens)))
+                text = self.tokenizer.decode(tokens + rest).strip()
+            else:
+                self.early_exits += 1
+                if self.log:
+                    self.log.debug(f"Standby ASR: ieșire devreme pe '{text}'")
+
+        if self.log:
+            self.log.debug(f"Standby ASR: '{text}' în {time.perf_counter() - start:.2f}s")
+        return {"text": text, "lang": "en", "language_probability": 1.0}
@@ -0,0 +1,275 @@
+# src/asr/streaming.py
+"""
+Transcriere incrementală (streaming) peste `ASREngine`.
+
+Cât timp recorder-ul încă înregistrează, un worker re-decodează fereastra
+crescătoare la fiecare `interval_ms` și stabilizează ipotezele prin „local
+agreement”: cuvintele pe care două decodări consecutive le dau identic devin
+definitive (committed). Audio-ul din spatele lor iese din fereastră, iar textul
+lor intră ca prompt în decodările următoare, deci la endpoint rămâne de decodat
+doar o coadă scurtă (sau nimic, dacă ultima ipoteză acoperă deja toată vocea).
+
+Parțialele sunt greedy (beam 1). Limba e re-detectată pe fiecare fereastră cât
+timp diferența RO/EN e sub `lang_fallback_margin` (ca la `transcribe_ro_en`).
+La endpoint, finalul trece prin `transcribe_ro_en(audio, lang_prior, voice_sec)`
+pe tot utterance-ul (cu nivelurile de model, beam-ul adaptiv și fallback-ul
+RO/EN) când limba a rămas nesigură, când `voice_sec` cade pe nivelul scurt sau
+când rezultatul greedy pică poarta beam-ului adaptiv.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.telemetry.metrics import observe_hist, asr_latency
+from src.utils.textnorm import normalize_text
+
+# (start_s, end_s, text) relativ la începutul ferestrei decodate
+Word = Tuple[float, float, str]
+
+
+class StreamingTranscriber:
+    """
+    Se hrănește cu `feed(frame, is_speech)` din bucla recorder-ului (float32,
+    același cadru dat VAD-ului) și se închide cu `finish()` la endpoint.
+
+    - `on_partial(text)` primește transcriptul curent (committed + tentativ);
+      dacă întoarce True, evenimentul a fost „consumat” și oprim decodările.
+    - `on_final(text)` primește transcriptul final.
+    """
+
+    def __init__(
+        self,
+        engine,
+        sample_rate: int = 16000,
+        interval_ms: int = 400,
+        min_audio_ms: int = 500,
+        pad_ms: int = 200,
+        beam_size: Optional[int] = 1,
+        language: Optional[str] = None,
+        lang_prior: Optional[str] = None,
+        prompt_chars: int = 200,
+        on_partial: Optional[Callable[[str], Any]] = None,
+        on_final: Optional[Callable[[str], Any]] = None,
+        logger=None,
+    ):
+        self.engine = engine
+        self.sr = int(sample_rate)
+        self.interval_s = max(0.05, int(interval_ms) / 1000.0)
+        self.min_audio = int(self.sr * int(min_audio_ms) / 1000)
+        self.pad = int(self.sr * int(pad_ms) / 1000)
+        self.beam_size = beam_size
+        self.language = (language or "").strip().lower() or None
+        self.language_probability = 1.0 if self.language else 0.0
+        self._lang_fixed = self.language is not None
+        self.lang_margin = float(getattr(engine, "lang_fallback_margin", 0.2))
+        self.lang_prior = lang_prior
+        self.prompt_chars = int(prompt_chars)
+        self.on_partial = on_partial
+        self.on_final = on_final
+        self.log = logger
+
+        self._lock = threading.Lock()
+        self._pre: List[np.ndarray] = []     # context dinaintea primei voci (max pad_ms)
+        self._chunks: List[np.ndarray] = []
+        self._total = 0                      # sample-uri în buffer (de la primul cadru păstrat)
+        self._last_voice_end = 0             # sfârșitul ultimului cadru cu voce
+        self._started = False
+
+        self._offset = 0                     # începutul ferestrei încă nedecise (în buffer)
+        self._committed: List[str] = []
+        self._tentative: List[Word] = []     # ipoteza precedentă, după offset
+        self._hyp_upto = 0                   # până unde acoperă ultima ipoteză
+        self._last_lp = -9.0                 # avg_logprob al ultimei decodări
+        self._lp_sum = 0.0                   # avg_logprob ponderat cu cuvintele definitive
+        self._lp_words = 0
+        self.decodes = 0
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="asr-stream", daemon=True)
+        self._thread.start()
+
+    # ——— intrare din recorder ———
+    def feed(self, frame: np.ndarray, is_speech: bool) -> None:
+        with self._lock:
+            if not self._started:
+                self._pre.append(frame)
+                while len(self._pre) > 1 and sum(f.shape[0] for f in self._pre[1:]) >= self.pad:
+                    self._pre.pop(0)
+                if not is_speech:
+                    return
+                # prima voce: pornim bufferul cu tot cu pad-ul de dinainte
+                self._started = True
+                self._chunks = self._pre
+                self._total = sum(f.shape[0] for f in self._pre)
+                self._pre = []
+            else:
+                self._chunks.append(frame)
+                self._total += frame.shape[0]
+            if is_speech:
+                self._last_voice_end = self._total
+
+    # ——— worker ———
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            try:
+                self._step(final=False)
+            except Exception as exc:
+                if self.log:
+                    self.log.debug(f"ASR streaming: decodare parțială eșuată ({exc})")
+
+    def _window(self, final: bool) -> Optional[Tuple[np.ndarray, int]]:
+        with self._lock:
+            if not self._started:
+                return None
+            end = self._total
+            if not final and (end == self._hyp_upto or end - self._offset < self.min_audio):
+                return None
+            if len(self._chunks) > 1:
+                self._chunks = [np.concatenate(self._chunks)]
+            return self._chunks[0][self._offset:end], end
+
+    def _prompt(self) -> Optional[str]:
+        text = "".join(self._committed).strip()
+        return text[-self.prompt_chars:] if text else None
+
+    def _lang_sure(self) -> bool:
+        """Limba e dată explicit sau detecția a depășit marja RO/EN."""
+        return self._lang_fixed or (2.0 * self.language_probability - 1.0) >= self.lang_margin
+
+    def _step(self, final: bool) -> None:
+        win = self._window(final)
+        if win is None:
+            return
+        audio, end = win
+        if audio.shape[0] == 0:
+            return
+        sure = self._lang_sure()
+        words, lang, prob, self._last_lp = self.engine.decode_words(
+            audio, language=self.language if sure else None, prompt=self._prompt(),
+            beam_size=self.beam_size, lang_prior=self.lang_prior,
+        )
+        self.decodes += 1
+        if not sure:
+            # limbă încă nesigură: o re-detectăm pe fereastra curentă (mai multă voce), până trece de marjă
+            if self.log and self.language and lang != self.language:
+                self.log.debug(f"ASR streaming: limba re-rutată {self.language} → {lang} (p={prob:.2f})")
+            self.language, self.language_probability = lang, prob
+        self._agree(words, end, final)
+        if not final:
+            self._emit(self.on_partial, self.text)
+
+    def _agree(self, words: List[Word], end: int, final: bool) -> None:
+        """Local agreement: prefixul comun cu ipoteza precedentă devine definitiv."""
+        if final:
+            n = len(words)
+        else:
+            n = 0
+            prev = self._tentative
+            while n < min(len(words), len(prev)):
+                a, b = normalize_text(words[n][2]), normalize_text(prev[n][2])
+                if not a or a != b:
+                    break
+                n += 1
+        if n:
+            self._commit(words[:n])
+            # tăiem fereastra în pauza de după ultimul cuvânt stabil
+            cut_s = words[n - 1][1]
+            if n < len(words):
+                cut_s = max(cut_s, (cut_s + words[n][0]) / 2.0)
+            cut = min(int(cut_s * self.sr), end - self._offset)
+            self._offset += cut
+            shift = cut / self.sr
+            words = [(s - shift, e - shift, t) for s, e, t in words[n:]]
+        self._tentative = words if not final else []
+        self._hyp_upto = end
+
+    def _commit(self, words: List[Word]) -> None:
+        self._committed.extend(w[2] for w in words)
+        self._lp_sum += self._last_lp * len(words)
+        self._lp_words += len(words)
+
+    @property
+    def avg_logprob(self) -> float:
+        """Încrederea transcriptului: avg_logprob al decodărilor, ponderat cu cuvintele păstrate."""
+        return self._lp_sum / self._lp_words if self._lp_words else -9.0
+
+    def _emit(self, cb: Optional[Callable[[str], Any]], text: str) -> None:
+        if not cb or not text:
+            return
+        try:
+            if cb(text):
+                self._stop.set()
+        except Exception as exc:
+            if self.log:
+                self.log.debug(f"ASR streaming: callback eșuat ({exc})")
+
+    @property
+    def text(self) -> str:
+        return "".join(self._committed + [w[2] for w in self._tentative]).strip()
+
+    # ——— închidere ———
+    def _redecode_reason(self, voice_sec: Optional[float], text: Optional[str] = None) -> Optional[str]:
+        check = getattr(self.engine, "redecode_reason", None)
+        if check is None:
+            return None
+        if (self.beam_size or 1) > 1:
+            text = None  # parțialele au rulat deja cu beam, poarta greedy→beam nu mai are sens
+        return check(voice_sec, text, self.avg_logprob if text is not None else None)
+
+    def finish(self, voice_sec: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Oprește decodările parțiale și face (doar dacă e nevoie) decodarea cozii.
+        `voice_sec` = durata vocii din recorder (alege nivelul de model, ca la `transcribe_ro_en`).
+        """
+        self._stop.set()
+        self._thread.join()
+        if self._started:
+            reason = "limbă nesigură" if not self._lang_sure() else self._redecode_reason(voice_sec)
+            if reason:
+                return self._finish_ro_en(reason, voice_sec)
+        with observe_hist(asr_latency):
+            with self._lock:
+                # ultima ipoteză a văzut toată vocea (plus pad)? atunci e deja finală
+                covered = self._hyp_upto >= min(self._total, self._last_voice_end + self.pad)
+            if self._started and not covered:
+                self._step(final=True)
+            else:
+                self._commit(self._tentative)
+                self._tentative = []
+        text = self.text
+        reason = self._redecode_reason(voice_sec, text) if self._started else None
+        if reason:
+            return self._finish_ro_en(f"greedy nesigur ({reason})", voice_sec)
+        if self.log:
+            self.log.debug(f"ASR streaming: {self.decodes} decodări, coadă {'reutilizată' if covered else 'decodată'}")
+        self._emit(self.on_final, text)
+        return {
+            "text": text,
+            "lang": self.language or "en",
+            "language_probability": float(self.language_probability),
+            "avg_logprob": self.avg_logprob,
+        }
+
+    def _finish_ro_en(self, reason: str, voice_sec: Optional[float]) -> Dict[str, Any]:
+        """Rezultatul streaming-ului nu e folosit: transcriere RO/EN completă pe tot utterance-ul."""
+        with self._lock:
+            audio = np.concatenate(self._chunks) if self._chunks else np.zeros(0, dtype=np.float32)
+        if self.log:
+            self.log.debug(
+                f"ASR streaming: {reason} ({self.language} p={self.language_probability:.2f}, "
+                f"{self.decodes} decodări) → transcriere RO/EN completă"
+            )
+        res = self.engine.transcribe_ro_en(audio, lang_prior=self.lang_prior, voice_sec=voice_sec)
+        self.language = res.get("lang") or self.language
+        self.language_probability = float(res.get("language_probability", self.language_probability))
+        self._committed, self._tentative = [res.get("text") or ""], []
+        self._emit(self.on_final, self.text)
+        return res
+
+    def cancel(self) -> None:
+        """Abandonează utterance-ul (ex: prea scurt) fără evenimente."""
+        self._stop.set()
+        self._thread.join(timeout=2.0)
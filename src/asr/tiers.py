@@ -0,0 +1,114 @@
+# src/asr/tiers.py
+"""
+ASR pe niveluri, după lungimea utterance-ului.
+
+Comenzile scurte („stop”, „da”, „ridică mâna”) nu au nevoie de modelul mare cu
+beam search: sub `short_max_voice_seconds` de voce (durata dată de recorder)
+decodăm cu un model mic, greedy. Dacă încrederea lui (avg_logprob pe segmente)
+scade sub `escalate_logprob`, același audio trece prin modelul principal.
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, List, Optional
+
+from src.telemetry.metrics import (
+    asr_tier_short_latency,
+    asr_tier_main_latency,
+    asr_tier_short_total,
+    asr_tier_escalations,
+)
+from .engine_faster import ASREngine, _as_array
+from .interface import AudioInput
+
+
+class TieredASR:
+    """Aceeași interfață ca `ASREngine`; alege modelul per utterance după `voice_sec`."""
+
+    def __init__(
+        self,
+        main: ASREngine,
+        short: ASREngine,
+        short_max_voice_seconds: float = 1.5,
+        escalate_logprob: float = -0.8,
+        logger=None,
+    ):
+        self.main = main
+        self.short = short
+        self.short_max_voice_seconds = float(short_max_voice_seconds)
+        self.escalate_logprob = float(escalate_logprob)
+        self.log = logger
+        if self.log:
+            self.log.info(
+                f"🪜 ASR pe niveluri: model mic pentru ≤{self.short_max_voice_seconds:.1f}s de voce, "
+                f"escaladare sub avg_logprob {self.escalate_logprob:.2f}"
+            )
+
+    # streaming-ul (ferestre incrementale) rămâne pe modelul principal
+    def decode_words(self, *args, **kwargs):
+        return self.main.decode_words(*args, **kwargs)
+
+    @property
+    def lang_fallback_margin(self) -> float:
+        return self.main.lang_fallback_margin
+
+    def is_short(self, voice_sec: Optional[float]) -> bool:
+        return voice_sec is not None and 0.0 < float(voice_sec) <= self.short_max_voice_seconds
+
+    def redecode_reason(
+        self, voice_sec: Optional[float], text: Optional[str] = None, avg_logprob: Optional[float] = None
+    ) -> Optional[str]:
+        """Comenzile scurte merg pe modelul mic și la streaming; restul, poarta modelului principal."""
+        if self.is_short(voice_sec):
+            return "nivel scurt"
+        return self.main.redecode_reason(voice_sec, text, avg_logprob)
+
+    def _tiered(self, audio: AudioInput, voice_sec: Optional[float], call) -> Dict[str, Any]:
+        wav = _as_array(audio)
+        if self.is_short(voice_sec):
+            asr_tier_short_total.inc()
+            start = time.perf_counter()
+            res = call(self.short, wav)
+            asr_tier_short_latency.observe(time.perf_counter() - start)
+            lp = float(res.get("avg_logprob", 0.0))
+            if res.get("text") and lp >= self.escalate_logprob:
+                return res
+            asr_tier_escalations.inc()
+            if self.log:
+                self.log.debug(f"ASR tier: model mic nesigur (avg_logprob={lp:.2f}, '{res.get('text', '')}') → principal")
+        start = time.perf_counter()
+        res = call(self.main, wav)
+        asr_tier_main_latency.observe(time.perf_counter() - start)
+        return res
+
+    def transcribe(
+        self, audio: AudioInput, language_override: Optional[str] = None, voice_sec: Optional[float] = None
+    ) -> Dict[str, Any]:
+        return self._tiered(audio, voice_sec, lambda eng, wav: eng.transcribe(wav, language_override))
+
+    def transcribe_ro_en(
+        self, audio: AudioInput, lang_prior: Optional[str] = None, voice_sec: Optional[float] = None
+    ) -> Dict[str, Any]:
+        return self._tiered(audio, voice_sec, lambda eng, wav: eng.transcribe_ro_en(wav, lang_prior=lang_prior))
+
+    def transcribe_batch(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Lot de pe server: scurtele pe modelul mic (tot în lot), restul și escaladările pe principal."""
+        items = [dict(item, audio=_as_array(item["audio"])) for item in items]
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        short_idx = [i for i, item in enumerate(items) if self.is_short(item.get("voice_sec"))]
+        if short_idx:
+            asr_tier_short_total.inc(len(short_idx))
+            start = time.perf_counter()
+            for i, res in zip(short_idx, self.short.transcribe_batch([items[i] for i in short_idx])):
+                if res.get("text") and float(res.get("avg_logprob", 0.0)) >= self.escalate_logprob:
+                    results[i] = res
+                else:
+                    asr_tier_escalations.inc()
+            asr_tier_short_latency.observe(time.perf_counter() - start)
+        main_idx = [i for i, res in enumerate(results) if res is None]
+        if main_idx:
+            start = time.perf_counter()
+            for i, res in zip(main_idx, self.main.transcribe_batch([items[i] for i in main_idx])):
+                results[i] = res
+            asr_tier_main_latency.observe(time.perf_counter() - start)
+        return results
@@ -1,57 +1,31 @@
 # src/audio/barge.py - Barge-in inteligent (doar voce umană)
 from __future__ import annotations
-import sounddevice as sd
 import numpy as np
-import queue, time, struct, math
-from typing import Optional
+import time, math, threading
+from typing import Callable, Optional
 from .vad import VAD
-from .devices import choose_input_device
+from .capture import get_capture
+from .processing import HighPass, int16_to_float
 
-def _rms_dbfs(pcm_i16: np.ndarray) -> float:
-    """Calculează RMS în dBFS."""
-    if pcm_i16.size == 0:
+def _rms_dbfs(x: np.ndarray) -> float:
+    """Calculează RMS în dBFS (cadru float32 în [-1, 1])."""
+    if x.size == 0:
         return -120.0
-    xf = pcm_i16.astype(np.float32) / 32768.0
-    rms = float(np.sqrt(np.mean(xf * xf) + 1e-12))
+    rms = float(np.sqrt(np.mean(x * x) + 1e-12))
     return 20.0 * np.log10(rms + 1e-12)
 
-def _highpass_filter(pcm_i16: np.ndarray, cutoff_hz: float, sr: int) -> np.ndarray:
-    """
-    Filtru high-pass simplu (first-order IIR) pentru a tăia frecvențele joase.
-    Elimină zgomotele de tip bătăi în masă (~50-200 Hz).
-    """
-    if cutoff_hz <= 0:
-        return pcm_i16
-    
-    # Coeficient pentru filtrul IIR: alpha = RC / (RC + dt)
-    rc = 1.0 / (2.0 * np.pi * cutoff_hz)
-    dt = 1.0 / sr
-    alpha = rc / (rc + dt)
-    
-    xf = pcm_i16.astype(np.float32)
-    y = np.zeros_like(xf)
-    y_prev = 0.0
-    x_prev = 0.0
-    
-    for i in range(len(xf)):
-        y[i] = alpha * (y_prev + xf[i] - x_prev)
-        y_prev = y[i]
-        x_prev = xf[i]
-    
-    return np.clip(y, -32768, 32767).astype(np.int16)
-
-def _zero_crossing_rate(pcm_i16: np.ndarray) -> float:
+def _zero_crossing_rate(x: np.ndarray) -> float:
     """
     Calculează rata de treceri prin zero (ZCR).
     Vocea umană: ZCR moderat (~0.05-0.3)
     Zgomote impulsive: ZCR foarte mare (>0.4)
     Zgomote joase constante: ZCR foarte mic (<0.02)
     """
-    if len(pcm_i16) < 2:
+    if len(x) < 2:
         return 0.0
-    signs = np.sign(pcm_i16)
+    signs = np.sign(x)
     crossings = np.sum(np.abs(np.diff(signs))) / 2.0
-    return crossings / (len(pcm_i16) - 1)
+    return crossings / (len(x) - 1)
 
 
 class BargeInListener:
@@ -60,8 +34,11 @@ class BargeInListener:
     - Detectează DOAR voce umană (VAD + RMS + spectral filtering + ZCR)
     - Ignoră bătăi în masă, ecoul TTS, zgomote impulsive
     - Anti-impuls: voce continuă >= barge_min_voice_ms
+
+    Se construiește o singură dată la boot (detectoarele ONNX/OWW rămân încărcate)
+    și se armează/dezarmează per replică TTS cu `arm()` / `disarm()`.
     """
-    def __init__(self, cfg_audio: dict, logger):
+    def __init__(self, cfg_audio: dict, logger, oww_frontend=None):
         self.log = logger
         self.sr = int(cfg_audio["sample_rate"])
         self.block_ms = int(cfg_audio["block_ms"])
@@ -77,6 +54,20 @@ class BargeInListener:
         self.arm_after_ms = int(cfg_audio.get("barge_arm_after_ms", 400))
         self.voice_drop_ms = int(cfg_audio.get("barge_voice_drop_ms", self.block_ms))
         self._t0_ms = int(time.monotonic() * 1000)
+        self.armed = False
+        # Barge pe voce e opțional; stop-word-ul rulează mereu
+        self.voice_enabled = bool(cfg_audio.get("barge_enabled", False)) and bool(
+            cfg_audio.get("barge_allow_during_tts", True)
+        )
+
+        # ——— Worker & evenimente ———
+        self._lock = threading.RLock()
+        self._armed_evt = threading.Event()
+        self._stop_evt = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.triggered = threading.Event()
+        self.trigger_reason: Optional[str] = None
+        self.on_trigger: Optional[Callable[[str], None]] = None
         self._last_trigger_ms = 0
 
         # ——— Dinamica prag RMS în funcție de "leak" (eco TTS) ———
@@ -90,17 +81,19 @@ class BargeInListener:
         self.highpass_hz = float(cfg_audio.get("barge_highpass_hz", 300.0))
         self.zcr_min = float(cfg_audio.get("barge_zcr_min", 0.05))
         self.zcr_max = float(cfg_audio.get("barge_zcr_max", 0.35))
+        # HPF cu stare între cadre (vectorizat, nu se resetează la fiecare bloc)
+        self._hpf = HighPass(self.highpass_hz, self.sr) if self.highpass_hz > 0 else None
 
-        # ——— Device & VAD ———
-        self.dev_index = choose_input_device(
-            prefer_echo_cancel=bool(cfg_audio.get("prefer_echo_cancel", True)),
-            hint=str(cfg_audio.get("input_device_hint", "") or ""),
-            logger=logger
-        )
+        # ——— Captură partajată & VAD ———
         vad_aggr = int(cfg_audio.get("vad_aggressiveness", 3))  # folosim VAD strict (3)
-        self.vad = VAD(self.sr, vad_aggr, self.block_ms)
-        self.q = queue.Queue()
-        self._open_stream()
+        self.vad = VAD(
+            self.sr, vad_aggr, self.block_ms,
+            model_path=cfg_audio.get("vad_model_path"),
+            pre_gate=str(cfg_audio.get("vad_pre_gate", "off")),
+            energy_gate=float(cfg_audio.get("vad_energy_gate", 0.004)),
+            logger=logger,
+        )
+        self.reader = get_capture(cfg_audio, logger).reader("barge")
         self._voiced_ms = 0
         self._last_user_voice_ms: int = 0
         self.debug_meter = bool(cfg_audio.get("barge_debug_meter", False))
@@ -122,7 +115,7 @@ class BargeInListener:
         if oww_stop_cfg.get("enabled"):
             try:
                 from .oww_stop_detector import OWWStopDetector
-                self.oww_stop_detector = OWWStopDetector(oww_stop_cfg, self.sr, logger)
+                self.oww_stop_detector = OWWStopDetector(oww_stop_cfg, self.sr, logger, frontend=oww_frontend)
             except Exception as exc:
                 self.oww_stop_detector = None
                 self.log.warning(f"OWW Stop detector dezactivat: {exc}")
@@ -131,18 +124,6 @@ class BargeInListener:
                       f"rms_thr={self.min_rms_dbfs}dB, hp={self.highpass_hz}Hz, "
                       f"zcr=[{self.zcr_min},{self.zcr_max}], vad=Silero")
 
-    def _open_stream(self):
-        def cb(indata, frames, time_info, status):
-            try:
-                self.q.put_nowait(indata.copy())
-            except:
-                pass
-        self.stream = sd.InputStream(
-            channels=1, samplerate=self.sr, blocksize=self.block,
-            dtype="float32", callback=cb, device=self.dev_index
-        )
-        self.stream.start()
-
     def _maybe_decay_leak(self, now_ms: int) -> None:
         if self._leak_baseline_dbfs is None:
             return
@@ -190,9 +171,9 @@ class BargeInListener:
         status = "Y" if detected else "n"
         self.log.info(f"[BARGE] |{bar}| {label}{zcr_str}{leak_str} det={status}")
 
-    def _is_human_voice(self, pcm_i16: np.ndarray) -> bool:
+    def _is_human_voice(self, x: np.ndarray) -> bool:
         """
-        Verifică dacă PCM-ul conține voce umană (nu zgomot/eco):
+        Verifică dacă un cadru float32 conține voce umană (nu zgomot/eco):
         1. RMS peste prag (vocea e mai tare decât TTS leak)
         2. High-pass filter (elimină bătăi joase)
         3. Zero-crossing rate în interval vocii umane
@@ -201,8 +182,11 @@ class BargeInListener:
         now_ms = int(time.monotonic() * 1000)
         self._maybe_decay_leak(now_ms)
 
+        # HPF rulează pe fiecare cadru ca să-și păstreze starea continuă
+        filtered = self._hpf.process(x) if self._hpf is not None else x
+
         leak_db = self._leak_baseline_dbfs
-        rms = _rms_dbfs(pcm_i16)
+        rms = _rms_dbfs(x)
 
         rms_threshold = self.min_rms_dbfs
         if leak_db is not None:
@@ -213,19 +197,15 @@ class BargeInListener:
             self._debug_meter(rms, None, False, leak_db)
             return False
 
-        # 2) High-pass filtering (anti-zgomot jos-frecvent)
-        pcm_filtered = _highpass_filter(pcm_i16, self.highpass_hz, self.sr)
-
         # 3) Zero-crossing rate (anti-zgomot impulsiv)
-        zcr = _zero_crossing_rate(pcm_filtered)
+        zcr = _zero_crossing_rate(filtered)
         if not (self.zcr_min <= zcr <= self.zcr_max):
             self._update_leak_baseline(rms, now_ms, fast=False)
             self._debug_meter(rms, zcr, False, leak_db)
             return False
 
-        # 4) VAD final check (WebRTC)
-        pcm_bytes = struct.pack("<%dh" % len(pcm_filtered), *pcm_filtered)
-        detected = self.vad.is_speech(pcm_bytes)
+        # 4) VAD final check (același cadru filtrat, float32)
+        detected = self.vad.is_speech(filtered)
         if not detected and (now_ms - self._last_user_voice_ms) <= self.voice_hold_ms:
             detected = True
 
@@ -238,95 +218,173 @@ class BargeInListener:
         self._debug_meter(rms, zcr, False, leak_db)
         return False
 
-    def heard_speech(self, need_ms: int = None) -> bool:
+    def _process_block(self, pcm_i16: np.ndarray, need_ms: int) -> Optional[str]:
         """
-        Returnează True dacă a detectat voce umană continuă >= need_ms.
-        Ignoră zgomotele, bătăile, ecoul TTS.
+        Procesează un singur bloc. Întoarce motivul declanșării
+        („stop” / „voice”) sau None.
         """
-        if need_ms is None:
-            need_ms = self.min_voice_ms
-
         now_ms = int(time.monotonic() * 1000)
 
         # Arm-delay: ignoră totul la început (anti-scurgeri inițiale)
         if (now_ms - self._t0_ms) < self.arm_after_ms:
-            try:
-                while True:
-                    block = self.q.get_nowait()
-                    pcm = np.clip(block[:, 0], -1, 1)
-                    pcm_i16 = (pcm * 32767.0).astype(np.int16)
-                    self._update_leak_baseline(_rms_dbfs(pcm_i16), int(time.monotonic() * 1000), fast=True)
-            except queue.Empty:
-                pass
-            return False
+            self._update_leak_baseline(_rms_dbfs(int16_to_float(pcm_i16)), now_ms, fast=True)
+            return None
 
         # Debounce: evită trigger repetat rapid
         if (now_ms - self._last_trigger_ms) < self.debounce_ms:
-            return False
+            return None
+
+        if self.stop_detector:
+            stop_detection = self.stop_detector.process_block(pcm_i16)
+            if stop_detection:
+                now_stop = int(time.monotonic() * 1000)
+                self._last_trigger_ms = now_stop
+                self._last_user_voice_ms = now_stop
+                self._voiced_ms = 0
+                other_logit, stop_logit = stop_detection.logits
+                self.log.info(
+                    f"🛑 Stop keyword detectat (p_stop={stop_detection.probability:.2f}, "
+                    f"logits other={other_logit:.2f} stop={stop_logit:.2f})"
+                )
+                return "stop"
+
+        # OWW-based stop detector (shut up, etc.)
+        if self.oww_stop_detector:
+            oww_stop = self.oww_stop_detector.process_block(pcm_i16)
+            if oww_stop:
+                now_stop = int(time.monotonic() * 1000)
+                self._last_trigger_ms = now_stop
+                self._last_user_voice_ms = now_stop
+                self._voiced_ms = 0
+                self.log.info(f"🛑 OWW Stop detectat: '{oww_stop.keyword}' (score={oww_stop.score:.2f})")
+                return "stop"
 
-        # Procesează frame-uri până la deadline scurt (20ms)
-        deadline = time.time() + 0.02
-        while time.time() < deadline:
-            try:
-                block = self.q.get_nowait()
-            except queue.Empty:
-                break
+        # Barge-in pe voce dezactivat: doar detectoarele de stop de mai sus (fără HPF/ZCR/VAD
+        # degeaba și fără debounce care le-ar lăsa fără cadre cât vorbește utilizatorul)
+        if not self.voice_enabled:
+            return None
 
-            pcm = np.clip(block[:, 0], -1, 1)
-            pcm_i16 = (pcm * 32767.0).astype(np.int16)
+        # Verifică dacă e voce umană (nu zgomot/eco)
+        if self._is_human_voice(int16_to_float(pcm_i16)):
+            self._voiced_ms = min(self._voiced_ms + self.block_ms, need_ms)
+        else:
+            # Pierde progres gradual (nu reset instant) pentru drop-uri scurte
+            self._voiced_ms = max(0, self._voiced_ms - self.voice_drop_ms)
+
+        # Trigger dacă voce continuă >= need_ms
+        if self._voiced_ms >= need_ms:
+            now2 = int(time.monotonic() * 1000)
+            self._voiced_ms = 0
+            # Cooldown: evită dublu-trigger
+            if (now2 - self._last_trigger_ms) >= self.cooldown_ms:
+                self._last_trigger_ms = now2
+                self.log.info(f"🎤 Barge-in: voce umană detectată ({need_ms}ms)")
+                return "voice"
+        return None
 
-            if self.stop_detector:
-                stop_detection = self.stop_detector.process_block(pcm_i16)
-                if stop_detection:
-                    now_stop = int(time.monotonic() * 1000)
-                    self._last_trigger_ms = now_stop
-                    self._last_user_voice_ms = now_stop
-                    self._voiced_ms = 0
-                    other_logit, stop_logit = stop_detection.logits
-                    self.log.info(
-                        f"🛑 Stop keyword detectat (p_stop={stop_detection.probability:.2f}, "
-                        f"logits other={other_logit:.2f} stop={stop_logit:.2f})"
-                    )
+    def heard_speech(self, need_ms: int = None) -> bool:
+        """
+        Variantă polling (fără worker): procesează blocurile deja capturate și
+        întoarce True dacă a apărut „stop” sau voce umană continuă >= need_ms.
+        """
+        if not self.armed:
+            return False
+        if need_ms is None:
+            need_ms = self.min_voice_ms
+        with self._lock:
+            while True:
+                pcm_i16 = self.reader.read(self.block, timeout=0)
+                if pcm_i16 is None:
+                    return False
+                if self._process_block(pcm_i16, need_ms):
                     return True
 
-            # OWW-based stop detector (shut up, etc.)
+    # ——— Worker dedicat ———
+    def start(self, on_trigger: Optional[Callable[[str], None]] = None) -> None:
+        """
+        Pornește thread-ul de detecție. Cât timp e armat, consumă fiecare bloc
+        (fără deadline) și la primul „stop”/„voice” setează `triggered`,
+        apelează `on_trigger(reason)` și se dezarmează.
+        """
+        self.on_trigger = on_trigger
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_evt.clear()
+        self._thread = threading.Thread(target=self._run, name="barge-in", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop_evt.is_set():
+            if not self.armed:
+                self._armed_evt.wait(timeout=0.2)
+                continue
+            pcm_i16 = self.reader.read(self.block, timeout=0.1)
+            if pcm_i16 is None:
+                continue
+            with self._lock:
+                if not self.armed:
+                    continue
+                try:
+                    reason = self._process_block(pcm_i16, self.min_voice_ms)
+                except Exception as exc:
+                    self.log.warning(f"Barge-in worker: {exc}")
+                    reason = None
+                if not reason:
+                    continue
+                self.trigger_reason = reason
+                self.armed = False
+                self._armed_evt.clear()
+                if self.oww_stop_detector:
+                    self.oww_stop_detector.deactivate()
+                self.triggered.set()
+            if self.on_trigger:
+                try:
+                    self.on_trigger(reason)
+                except Exception as exc:
+                    self.log.warning(f"Barge-in callback: {exc}")
+
+    def arm(self) -> None:
+        """
+        Pornește ascultarea pentru o nouă replică TTS: cursorul sare la „acum”,
+        arm-delay-ul repornește și starea tuturor detectoarelor e resetată.
+        """
+        with self._lock:
+            self.reader.seek_to_now()
+            self._t0_ms = int(time.monotonic() * 1000)
+            self._voiced_ms = 0
+            self._leak_baseline_dbfs = None
+            self._last_leak_update_ms = 0
+            if self._hpf is not None:
+                self._hpf.reset()
+            self.vad.reset()
+            if self.stop_detector:
+                self.stop_detector.reset()
             if self.oww_stop_detector:
-                oww_stop = self.oww_stop_detector.process_block(pcm_i16)
-                if oww_stop:
-                    now_stop = int(time.monotonic() * 1000)
-                    self._last_trigger_ms = now_stop
-                    self._last_user_voice_ms = now_stop
-                    self._voiced_ms = 0
-                    self.log.info(f"🛑 OWW Stop detectat: '{oww_stop.keyword}' (score={oww_stop.score:.2f})")
-                    return True
-
-            # Verifică dacă e voce umană (nu zgomot/eco)
-            if self._is_human_voice(pcm_i16):
-                self._voiced_ms = min(self._voiced_ms + self.block_ms, need_ms)
-            else:
-                # Pierde progres gradual (nu reset instant) pentru drop-uri scurte
-                self._voiced_ms = max(0, self._voiced_ms - self.voice_drop_ms)
-
-            # Trigger dacă voce continuă >= need_ms
-            if self._voiced_ms >= need_ms:
-                now2 = int(time.monotonic() * 1000)
-                # Cooldown: evită dublu-trigger
-                if (now2 - self._last_trigger_ms) >= self.cooldown_ms:
-                    self._last_trigger_ms = now2
-                    self._voiced_ms = 0
-                    self.log.info(f"🎤 Barge-in: voce umană detectată ({need_ms}ms)")
-                    return True
-                self._voiced_ms = 0
-                return False
-
-        return False
+                self.oww_stop_detector.reset()
+                self.oww_stop_detector.activate()
+            self.trigger_reason = None
+            self.triggered.clear()
+            self.armed = True
+            self._armed_evt.set()
+
+    def disarm(self) -> None:
+        """Oprește ascultarea între replici (detectoarele rămân încărcate)."""
+        with self._lock:
+            self.armed = False
+            self._armed_evt.clear()
+            self.reader.seek_to_now()
+            if self.oww_stop_detector:
+                self.oww_stop_detector.deactivate()
 
     def close(self):
-        try:
-            self.stream.stop()
-            self.stream.close()
-        except Exception:
-            pass
+        # Stream-ul aparține capturii partajate; eliberăm doar cursorul.
+        self.armed = False
+        self._stop_evt.set()
+        self._armed_evt.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+        self.reader.close()
 
     def user_is_speaking(self) -> bool:
         """Indică dacă recent a fost detectată voce umană (folosit de FastExit)."""
@@ -0,0 +1,213 @@
+# src/audio/capture.py
+"""
+Captură unică de microfon (always-on) cu ring buffer partajat.
+
+Un singur `sd.InputStream` scrie blocurile int16 într-un ring buffer prealocat.
+Fiecare consumator (wake, goodbye hotword, barge, stop-word, recorder) își ia un
+`CaptureReader` cu propriul cursor și citește în ritmul lui, fără cozi separate,
+fără copii per-bloc în callback și fără open/close de device la fiecare tură.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, Optional
+
+import numpy as np
+import sounddevice as sd
+
+from .devices import choose_input_device
+
+_capture: Optional["MicCapture"] = None
+_capture_lock = threading.Lock()
+
+
+class MicCapture:
+    """
+    Stream de intrare mono int16 care scrie într-un ring buffer prealocat.
+    Poziția de scriere e monotonă (număr total de sample-uri), cititorii țin
+    propriul cursor absolut și îl compară cu ea.
+    """
+
+    def __init__(self, cfg_audio: Dict[str, Any], logger=None):
+        self.log = logger
+        self.sample_rate = int(cfg_audio.get("sample_rate", 16000))
+        block_ms = int(cfg_audio.get("block_ms", 20))
+        self.block = int(self.sample_rate * (block_ms / 1000.0))
+
+        ring_seconds = float(cfg_audio.get("capture_ring_seconds", 10.0))
+        self.capacity = max(self.block * 4, int(self.sample_rate * ring_seconds))
+        self._ring = np.zeros(self.capacity, dtype=np.int16)
+        self._write_pos = 0
+        self._cond = threading.Condition()
+        self._closed = False
+
+        index = cfg_audio.get("input_device_index")
+        self._device_index = choose_input_device(
+            prefer_echo_cancel=bool(cfg_audio.get("prefer_echo_cancel", True)),
+            hint=str(cfg_audio.get("input_device_hint", "") or ""),
+            index=index if index not in (None, "") else None,
+            logger=logger,
+        )
+
+        try:
+            self._stream = sd.InputStream(
+                channels=1,
+                samplerate=self.sample_rate,
+                blocksize=self.block,
+                dtype="int16",
+                callback=self._callback,
+                device=self._device_index,
+            )
+            self._stream.start()
+        except Exception as exc:
+            raise RuntimeError(f"captură audio: nu pot deschide microfonul ({exc}).") from exc
+
+        if self.log:
+            self.log.info(
+                f"🎙️ Captură partajată pornită: sr={self.sample_rate}, block={self.block}, "
+                f"ring={self.capacity / self.sample_rate:.1f}s"
+            )
+
+    def _callback(self, indata, frames, time_info, status):
+        if status and self.log:
+            self.log.debug(f"Captură audio status: {status}")
+        x = indata[:, 0]
+        n = x.shape[0]
+        with self._cond:
+            start = self._write_pos % self.capacity
+            first = min(n, self.capacity - start)
+            self._ring[start:start + first] = x[:first]
+            if first < n:
+                self._ring[:n - first] = x[first:]
+            self._write_pos += n
+            self._cond.notify_all()
+
+    @property
+    def write_pos(self) -> int:
+        return self._write_pos
+
+    def reader(
+        self, name: str = "", max_lag_samples: Optional[int] = None, start_pos: Optional[int] = None
+    ) -> "CaptureReader":
+        """
+        Creează un cititor nou, poziționat la „acum” sau la `start_pos` (poziție
+        absolută din trecut, cât încă e în ring — pre-roll).
+        """
+        return CaptureReader(self, name, max_lag_samples, start_pos)
+
+    def _copy_out(self, pos: int, out: np.ndarray) -> None:
+        """Copiază [pos, pos+len(out)) din ring în `out`. Apelat cu `_cond` ținut."""
+        n = out.shape[0]
+        start = pos % self.capacity
+        first = min(n, self.capacity - start)
+        out[:first] = self._ring[start:start + first]
+        if first < n:
+            out[first:] = self._ring[:n - first]
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        try:
+            self._stream.stop()
+            self._stream.close()
+        except Exception:
+            pass
+
+
+class CaptureReader:
+    """
+    Cursor independent peste ring-ul capturii.
+    - `read()` blochează până sunt disponibile `n` sample-uri (sau timeout).
+    - Dacă cititorul rămâne în urmă peste `max_lag_samples` (implicit: tot ring-ul),
+      sare înainte și contorizează un overrun, la fel ca vechile cozi drop-oldest.
+    """
+
+    def __init__(
+        self,
+        capture: MicCapture,
+        name: str = "",
+        max_lag_samples: Optional[int] = None,
+        start_pos: Optional[int] = None,
+    ):
+        self._cap = capture
+        self.name = name
+        self.max_lag = min(int(max_lag_samples or capture.capacity), capture.capacity)
+        self.overruns = 0
+        now = capture.write_pos
+        if start_pos is None:
+            self._pos = now
+        else:
+            # nu putem citi mai vechi decât ține ring-ul (sau lag-ul permis)
+            self._pos = min(now, max(int(start_pos), now - self.max_lag))
+
+    @property
+    def sample_rate(self) -> int:
+        return self._cap.sample_rate
+
+    @property
+    def position(self) -> int:
+        """Poziția absolută (în sample-uri) a următorului sample de citit."""
+        return self._pos
+
+    def available(self) -> int:
+        return max(0, self._cap.write_pos - self._pos)
+
+    def seek_to_now(self) -> None:
+        """Aruncă tot ce nu a fost citit încă."""
+        self._pos = self._cap.write_pos
+
+    def _clamp_lag(self) -> None:
+        lag = self._cap.write_pos - self._pos
+        if lag > self.max_lag:
+            self._pos = self._cap.write_pos - self.max_lag
+            self.overruns += 1
+
+    def read_into(self, out: np.ndarray, timeout: Optional[float] = None) -> bool:
+        """
+        Umple `out` (int16, prealocat de apelant) cu următoarele sample-uri.
+        Returnează False la timeout sau dacă captura a fost închisă.
+        """
+        n = out.shape[0]
+        cap = self._cap
+        with cap._cond:
+            self._clamp_lag()
+            if cap.write_pos - self._pos < n:
+                ok = cap._cond.wait_for(
+                    lambda: cap._closed or (cap.write_pos - self._pos) >= n,
+                    timeout=timeout,
+                )
+                if not ok or cap._closed:
+                    return False
+                self._clamp_lag()
+            cap._copy_out(self._pos, out)
+            self._pos += n
+        return True
+
+    def read(self, n: int, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        """Variantă comodă a `read_into` care alocă bufferul de ieșire."""
+        out = np.empty(int(n), dtype=np.int16)
+        if not self.read_into(out, timeout=timeout):
+            return None
+        return out
+
+    def close(self) -> None:
+        # Cititorul nu ține resurse; păstrăm metoda pentru simetrie cu vechile stream-uri.
+        self._pos = self._cap.write_pos
+
+
+def get_capture(cfg_audio: Dict[str, Any], logger=None) -> MicCapture:
+    """Returnează captura partajată a procesului (o pornește la primul apel)."""
+    global _capture
+    with _capture_lock:
+        if _capture is None:
+            _capture = MicCapture(cfg_audio or {}, logger)
+        return _capture
+
+
+def close_capture() -> None:
+    global _capture
+    with _capture_lock:
+        if _capture is not None:
+            _capture.close()
+            _capture = None
@@ -0,0 +1,174 @@
+# src/audio/endpoint.py
+"""
+Predicție de sfârșit de tură (endpointing adaptiv).
+
+În loc de o liniște fixă (`silence_ms_to_end`), combinăm indicii ieftine de pe
+ultimele cadre cu voce — energia care scade, pitch-ul care coboară și (dacă
+avem parțiale ASR) dacă textul arată a frază încheiată — și cerem între
+`min_ms` și plafonul configurat de liniște înainte să închidem tura.
+"""
+from __future__ import annotations
+
+import re
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from src.utils.textnorm import normalize_text
+
+# cuvinte după care fraza sigur continuă (conjuncții, prepoziții, articole)
+_CONTINUATION_WORDS = {
+    # EN
+    "and", "or", "but", "so", "because", "the", "a", "an", "of", "to", "in", "on",
+    "at", "for", "with", "from", "about", "is", "are", "what", "how", "my", "your",
+    # RO
+    "si", "sau", "dar", "ca", "ci", "pentru", "de", "la", "in", "pe", "cu", "din",
+    "despre", "un", "o", "al", "ale", "este", "e", "ce", "cum", "care", "mai",
+}
+_FINAL_PUNCT = re.compile(r"[.?!…]\s*$")
+
+
+def _f0_autocorr(x: np.ndarray, sr: int, fmin: float = 70.0, fmax: float = 400.0) -> Optional[float]:
+    """F0 prin autocorelație; None dacă fereastra nu e suficient de periodică."""
+    x = x - x.mean()
+    energy = float(np.dot(x, x))
+    if energy <= 1e-8:
+        return None
+    lo, hi = int(sr / fmax), min(int(sr / fmin), x.shape[0] - 1)
+    if hi <= lo:
+        return None
+    ac = np.correlate(x, x, mode="full")[x.shape[0] - 1:]
+    lag = lo + int(np.argmax(ac[lo:hi]))
+    if ac[lag] / energy < 0.3:
+        return None
+    return sr / float(lag)
+
+
+class EndpointPredictor:
+    """
+    Se hrănește din recorder cu `update(frame, is_speech)` (float32, cadrul brut,
+    înainte de NS/AGC, plus decizia VAD) și răspunde la `should_end(silence_ms)`.
+
+    Scor 0..1 (1 = sigur s-a terminat tura):
+    - energie: RMS-ul ultimelor cadre cu voce față de media utterance-ului
+    - pitch: panta F0 pe ultimele ~300 ms de voce (coborâre = final de enunț)
+    - text: punctuație finală / cuvânt de legătură la coada parțialului ASR
+    Liniștea cerută = max_ms - (max_ms - min_ms) * scor.
+    """
+
+    def __init__(
+        self,
+        cfg: Optional[Dict[str, Any]],
+        max_ms: int,
+        sample_rate: int = 16000,
+        text_fn: Optional[Callable[[], str]] = None,
+    ):
+        cfg = cfg or {}
+        self.sr = int(sample_rate)
+        self.max_ms = int(max_ms)
+        self.min_ms = min(int(cfg.get("min_ms", 150)), self.max_ms)
+        self.w_energy = float(cfg.get("energy_weight", 0.3))
+        self.w_pitch = float(cfg.get("pitch_weight", 0.3))
+        self.w_text = float(cfg.get("text_weight", 0.4))
+        self.tail_ms = int(cfg.get("tail_ms", 300))
+        # voce după endpoint (în liniștea rămasă până la max_ms) de la care tura e „tăiată”
+        self.resume_ms = int(cfg.get("resume_ms", 60))
+        self.text_fn = text_fn
+
+        self._voiced_rms_sum = 0.0
+        self._voiced_frames = 0
+        self._tail_rms: deque = deque()
+        self._tail_f0: deque = deque()      # (t_s, f0) pe ultimele tail_ms de voce
+        self._prev = np.zeros(0, dtype=np.float32)
+        self._t = 0.0
+        self._tail_len = 0.0
+        self._required: Optional[int] = None
+        self.last_score = 0.0
+        self.chosen_ms: Optional[int] = None
+
+    def update(self, frame: np.ndarray, is_speech: bool) -> None:
+        dur = frame.shape[0] / self.sr
+        self._t += dur
+        if not is_speech:
+            self._prev = frame
+            return
+        # vocea a reînceput: decizia de endpoint se recalculează la următoarea liniște
+        self._required = None
+        rms = float(np.sqrt(np.mean(frame * frame)) + 1e-9)
+        self._voiced_rms_sum += rms
+        self._voiced_frames += 1
+        self._tail_rms.append(rms)
+        # F0 pe 2 cadre consecutive (40 ms la 20 ms/bloc) — destul pentru ~70 Hz
+        f0 = _f0_autocorr(np.concatenate((self._prev, frame)), self.sr)
+        self._prev = frame
+        if f0 is not None:
+            self._tail_f0.append((self._t, f0))
+        self._tail_len += dur
+        while self._tail_len > self.tail_ms / 1000.0 and len(self._tail_rms) > 1:
+            self._tail_rms.popleft()
+            self._tail_len -= dur
+        while self._tail_f0 and self._t - self._tail_f0[0][0] > self.tail_ms / 1000.0:
+            self._tail_f0.popleft()
+
+    # ——— indicii ———
+    def _energy_score(self) -> Optional[float]:
+        if self._voiced_frames < 5 or not self._tail_rms:
+            return None
+        mean_rms = self._voiced_rms_sum / self._voiced_frames
+        ratio = (sum(self._tail_rms) / len(self._tail_rms)) / mean_rms
+        # coada la nivelul mediei -> 0; la ~40% din medie -> 1
+        return float(np.clip((1.0 - ratio) / 0.6, 0.0, 1.0))
+
+    def _pitch_score(self) -> Optional[float]:
+        if len(self._tail_f0) < 4:
+            return None
+        t = np.array([p[0] for p in self._tail_f0])
+        f = np.array([p[1] for p in self._tail_f0])
+        slope = float(np.polyfit(t - t[0], f, 1)[0])  # Hz/s
+        return float(np.clip(-slope / 80.0, 0.0, 1.0))
+
+    def _text_score(self) -> Optional[float]:
+        if self.text_fn is None:
+            return None
+        try:
+            text = (self.text_fn() or "").strip()
+        except Exception:
+            return None
+        if not text:
+            return None
+        if _FINAL_PUNCT.search(text):
+            return 1.0
+        words = normalize_text(text).split()
+        if words and words[-1] in _CONTINUATION_WORDS:
+            return 0.0
+        return 0.5
+
+    def score(self) -> float:
+        cues = [
+            (self.w_energy, self._energy_score()),
+            (self.w_pitch, self._pitch_score()),
+            (self.w_text, self._text_score()),
+        ]
+        known = [(w, v) for w, v in cues if v is not None and w > 0]
+        if not known:
+            return 0.0
+        if cues[2][1] == 0.0:
+            # textul cere continuare: nu scurtăm liniștea indiferent de prozodie
+            return 0.0
+        return sum(w * v for w, v in known) / sum(w for w, _ in known)
+
+    def required_ms(self) -> int:
+        if self._required is None or self.text_fn is not None:
+            # parțialul ASR se poate actualiza în timpul liniștii -> recalculăm
+            self.last_score = self.score()
+            self._required = int(round(self.max_ms - (self.max_ms - self.min_ms) * self.last_score))
+        return self._required
+
+    def should_end(self, silence_ms: int) -> bool:
+        if silence_ms < self.min_ms:
+            return False
+        if silence_ms >= self.required_ms():
+            self.chosen_ms = int(silence_ms)
+            return True
+        return False
@@ -1,13 +1,16 @@
 # src/audio/input.py
-import queue, time, struct
+import threading
+import time
 from pathlib import Path
+from typing import Callable, Optional
 import numpy as np
-import sounddevice as sd
 import soundfile as sf
 
-from .devices import choose_input_device, list_input_devices
+from .capture import get_capture
 from .vad import VAD
-from .processing import AudioEffects
+from .processing import AudioEffects, int16_to_float
+from .endpoint import EndpointPredictor
+from src.telemetry.metrics import endpoint_delay, endpoint_truncations
 
 # Import opțional: nu crăpa dacă nu există webrtc AEC
 try:
@@ -16,28 +19,71 @@ except Exception:
     WebRTCAEC = None
 
 
-def _float_to_int16(audio_f32: np.ndarray) -> np.ndarray:
-    audio_f32 = np.clip(audio_f32, -1.0, 1.0)
-    return (audio_f32 * 32767.0).astype(np.int16)
-
-
-def record_until_silence(cfg_audio: dict, out_wav_path: Path, logger, quiet_short: bool = False):
+def _watch_truncation(capture, pos: int, vad, effects, block_size: int, block_ms: int,
+                      window_ms: int, resume_ms: int, logger) -> None:
+    """
+    După un endpoint adaptiv, ascultă liniștea pe care endpoint-ul fix ar mai fi
+    așteptat-o (`max_ms - chosen_ms`). Dacă vocea revine în fereastra asta, tura a
+    fost tăiată prea devreme: contorizăm (`endpoint_truncations_total`).
+    """
+    reader = capture.reader("endpoint-check", start_pos=pos)
+    voiced_ms = 0
+    try:
+        for _ in range(max(1, window_ms // block_ms)):
+            pcm_i16 = reader.read(block_size, timeout=0.5)
+            if pcm_i16 is None:
+                return
+            if vad.is_speech(effects.process(int16_to_float(pcm_i16))):
+                voiced_ms += block_ms
+                if voiced_ms >= resume_ms:
+                    endpoint_truncations.inc()
+                    logger.info(f"✂️ Vocea a revenit la <{window_ms}ms după endpoint — tură tăiată prea devreme.")
+                    return
+    finally:
+        reader.close()
+
+
+def record_until_silence(
+    cfg_audio: dict,
+    logger,
+    quiet_short: bool = False,
+    out_wav_path: Optional[Path] = None,
+    start_pos: Optional[int] = None,
+    no_voice_timeout_ms: Optional[int] = None,
+    on_frame: Optional[Callable[[np.ndarray, bool], None]] = None,
+    endpoint: Optional[EndpointPredictor] = None,
+    max_voice_window_ms: Optional[int] = None,
+):
     """
     Înregistrează mono 16kHz și se oprește după `silence_ms_to_end` ms de liniște
     (detectată de VAD) sau după `max_record_seconds` (fallback).
 
-    Anti-spam: dacă vocea cumulată < `min_valid_seconds` -> NU salvează fișierul, întoarce voice_sec.
+    Audio-ul rămâne în memorie: se întoarce un buffer float32 contiguu, tăiat la
+    primul/ultimul bloc cu voce (plus `trim_pad_ms` de context), gata pentru ASR.
+
+    Anti-spam: dacă vocea cumulată < `min_valid_seconds` -> întoarce buffer gol + voice_sec.
     
     Args:
         quiet_short: Dacă True, nu loghează "utterance prea scurt" (pentru grupare externă)
-
-    Returnează: (path, voice_seconds)
+        out_wav_path: Opțional, scrie și un WAV pe disc (doar pentru debug)
+        start_pos: Opțional, poziție absolută în captura partajată de la care începem
+            (pre-roll, ex: imediat după wake phrase)
+        no_voice_timeout_ms: Opțional, renunță dacă în primele N ms de audio nu apare voce
+        on_frame: Opțional, primește fiecare cadru procesat (float32) + decizia VAD
+            (ex: ASR streaming care transcrie în timp ce înregistrăm)
+        endpoint: Opțional, predictor de sfârșit de tură; după prima voce decide el
+            câtă liniște așteptăm (între `min_ms` și `silence_ms_to_end`)
+        max_voice_window_ms: Opțional, oprește înregistrarea la N ms după prima voce
+            (ex: standby, unde ASR-ul decodează oricum doar primele secunde)
+
+    Returnează: (audio_f32, voice_seconds)
     """
     sr = int(cfg_audio["sample_rate"])
     block_ms = int(cfg_audio["block_ms"])              # 10/20/30 ms
     silence_ms_to_end = int(cfg_audio["silence_ms_to_end"])
     max_secs = int(cfg_audio["max_record_seconds"])
     min_valid_seconds = float(cfg_audio.get("min_valid_seconds", 0.5))
+    trim_pad_ms = int(cfg_audio.get("trim_pad_ms", 200))
 
     assert block_ms in (10, 20, 30), "VAD frame must be 10/20/30 ms"
     block_size = int(sr * (block_ms / 1000.0))
@@ -62,46 +108,33 @@ def record_until_silence(cfg_audio: dict, out_wav_path: Path, logger, quiet_shor
         # Folosești AEC de sistem (PulseAudio/pipewire echo-cancel) dacă e disponibil
         pass
 
-    # ——— Device selection ———
-    dev_index = choose_input_device(
-        prefer_echo_cancel=bool(cfg_audio.get("prefer_echo_cancel", True)),
-        hint=str(cfg_audio.get("input_device_hint", "") or ""),
-        index=(cfg_audio.get("input_device_index") if cfg_audio.get("input_device_index") not in (None, "") else None),
-        logger=logger
-    )
+    # ——— Captura partajată (stream-ul rămâne deschis între ture) ———
+    reader = get_capture(cfg_audio, logger).reader("recorder", start_pos=start_pos)
 
-    q = queue.Queue()
-    vad = VAD(sr, cfg_audio.get("vad_aggressiveness", 2), block_ms)
+    vad = VAD(
+        sr, cfg_audio.get("vad_aggressiveness", 2), block_ms,
+        model_path=cfg_audio.get("vad_model_path"),
+        pre_gate=str(cfg_audio.get("vad_pre_gate", "off")),
+        energy_gate=float(cfg_audio.get("vad_energy_gate", 0.004)),
+        logger=logger,
+    )
 
     logger.info(f"🎤 Vorbește… (se oprește după {silence_ms_to_end}ms de liniște)")
     started = time.time()
     last_voice_ms = 0
     voiced_ms_total = 0       # — cumulăm DOAR timpul de voce detectată (anti-spam)
     collected = []
+    first_voiced = -1         # indexul primului/ultimului bloc cu voce (pentru trim)
+    last_voiced = -1
 
-    def callback(indata, frames, time_info, status):
-        if status:
-            logger.debug(f"Audio status: {status}")
-        q.put(indata.copy())
-
-    with sd.InputStream(
-        channels=1,
-        samplerate=sr,
-        blocksize=block_size,
-        dtype="float32",
-        callback=callback,
-        device=dev_index  # <- poate fi None (default OS)
-    ):
+    try:
         while True:
-            try:
-                block = q.get(timeout=0.5)  # float32 [-1,1], mono
-            except queue.Empty:
+            pcm_i16 = reader.read(block_size, timeout=0.5)  # int16 mono
+            if pcm_i16 is None:
                 if time.time() - started > max_secs:
                     break
                 continue
 
-            pcm_i16 = _float_to_int16(block[:, 0])
-
             # AEC (opțional, dacă există)
             if aec:
                 try:
@@ -109,23 +142,42 @@ def record_until_silence(cfg_audio: dict, out_wav_path: Path, logger, quiet_shor
                 except Exception:
                     pass
 
-            # Igienă audio înainte de VAD
-            pcm_i16 = effects.process_frame(pcm_i16)
+            # Igienă audio înainte de VAD (lanț float32, o singură conversie)
+            raw = int16_to_float(pcm_i16)
+            frame = effects.process(raw)
 
-            collected.append(pcm_i16)
+            collected.append(frame)
 
-            # VAD pe bytes little-endian
-            pcm_bytes = struct.pack("<%dh" % len(pcm_i16), *pcm_i16)
-            if vad.is_speech(pcm_bytes):
+            # VAD pe același cadru float32
+            speech = vad.is_speech(frame)
+            if on_frame is not None:
+                on_frame(frame, speech)
+            if endpoint is not None:
+                # indiciile de energie/pitch pe cadrul brut: AGC-ul ar netezi tocmai coada care scade
+                endpoint.update(raw, speech)
+            if speech:
                 last_voice_ms = 0
                 voiced_ms_total += block_ms
+                if first_voiced < 0:
+                    first_voiced = len(collected) - 1
+                last_voiced = len(collected) - 1
             else:
                 last_voice_ms += block_ms
 
-            if last_voice_ms >= silence_ms_to_end:
+            if endpoint is not None and first_voiced >= 0:
+                if endpoint.should_end(last_voice_ms):
+                    break
+            elif last_voice_ms >= silence_ms_to_end:
+                break
+            if no_voice_timeout_ms and first_voiced < 0 and len(collected) * block_ms >= no_voice_timeout_ms:
+                break
+            if max_voice_window_ms and first_voiced >= 0 and (len(collected) - first_voiced) * block_ms >= max_voice_window_ms:
                 break
             if time.time() - started > max_secs:
                 break
+    finally:
+        end_pos = reader.position
+        reader.close()
 
     if aec:
         try:
@@ -133,17 +185,39 @@ def record_until_silence(cfg_audio: dict, out_wav_path: Path, logger, quiet_shor
         except Exception:
             pass
 
-    audio = np.concatenate(collected, axis=0) if collected else np.zeros(1, dtype=np.int16)
     voice_sec = voiced_ms_total / 1000.0
 
-    # — dacă vocea efectivă este sub prag -> NU salvăm nimic (anti-spam)
-    if voice_sec < min_valid_seconds:
+    if endpoint is not None and endpoint.chosen_ms is not None:
+        endpoint_delay.observe(endpoint.chosen_ms / 1000.0)
+        logger.info(
+            f"⏱️ Endpoint după {endpoint.chosen_ms}ms de liniște (max {endpoint.max_ms}ms, "
+            f"scor {endpoint.last_score:.2f}, câștig {endpoint.max_ms - endpoint.chosen_ms}ms)"
+        )
+        if endpoint.chosen_ms < endpoint.max_ms and first_voiced >= 0:
+            threading.Thread(
+                target=_watch_truncation,
+                args=(get_capture(cfg_audio, logger), end_pos, vad, effects, block_size, block_ms,
+                      endpoint.max_ms - endpoint.chosen_ms, endpoint.resume_ms, logger),
+                name="endpoint-check",
+                daemon=True,
+            ).start()
+
+    # — dacă vocea efectivă este sub prag -> NU întoarcem audio (anti-spam)
+    if voice_sec < min_valid_seconds or first_voiced < 0:
         if not quiet_short:
-            logger.info(f"⏭️ Utterance prea scurt (voce ~{voice_sec:.2f}s < {min_valid_seconds:.2f}s) — ignor, nu salvez.")
-        return str(out_wav_path), voice_sec
+            logger.info(f"⏭️ Utterance prea scurt (voce ~{voice_sec:.2f}s < {min_valid_seconds:.2f}s) — ignor.")
+        return np.zeros(0, dtype=np.float32), voice_sec
+
+    # — trim pe deciziile VAD deja luate (liniștea de început/sfârșit nu ajunge la ASR)
+    pad_blocks = trim_pad_ms // block_ms
+    lo = max(0, first_voiced - pad_blocks)
+    hi = min(len(collected), last_voiced + 1 + pad_blocks)
+    audio = np.concatenate(collected[lo:hi], axis=0)
+
+    if out_wav_path is not None:
+        out_wav_path.parent.mkdir(parents=True, exist_ok=True)
+        sf.write(str(out_wav_path), audio, sr, subtype="PCM_16")
 
-    out_wav_path.parent.mkdir(parents=True, exist_ok=True)
-    sf.write(str(out_wav_path), audio, sr, subtype="PCM_16")
     dur = len(audio) / sr
-    logger.info(f"✅ Înregistrare salvată: {out_wav_path} (audio ~{dur:.2f}s, voce ~{voice_sec:.2f}s)")
-    return str(out_wav_path), voice_sec
+    logger.info(f"✅ Înregistrare în memorie (audio ~{dur:.2f}s, voce ~{voice_sec:.2f}s)")
+    return audio, voice_sec
@@ -0,0 +1,362 @@
+# src/audio/oww_frontend.py
+"""
+Frontend openwakeword partajat (mel + embedding calculate o singură dată).
+
+Wake engine-ul, listener-ul de goodbye și detectorul de stop OWW își înregistrează
+doar „capetele” (modelele ONNX de keyword). Un singur `AudioFeatures` citește din
+captura partajată direct în hop-uri native de 80 ms (mai multe deodată când a
+rămas în urmă), calculează melspectrogram + embedding o singură dată și rulează
+capetele tuturor abonamentelor active. Fiecare abonament primește un
+dict {label: score}, ca `openwakeword.Model.predict`.
+
+Frontend-ul se construiește o singură dată, în app.py, din `audio` +
+`wake.openwakeword`, și se dă consumatorilor. Opțiunile lui (`FRONTEND_OPTIONS`)
+nu se pot seta per consumator: un consumator care le setează altfel e refuzat.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .capture import CaptureReader, get_capture
+
+HOP = 1280            # hop nativ openwakeword (80 ms @ 16 kHz)
+WARMUP_PREDICTIONS = 5  # ca în openwakeword: primele predicții după reset sunt zero
+
+_frontend: Optional["OWWFrontend"] = None
+_frontend_lock = threading.Lock()
+
+# opțiuni care țin de frontend-ul comun, nu de un consumator
+FRONTEND_OPTIONS = (
+    "sample_rate", "max_batch_hops", "ncpu", "idle_reset_seconds", "inference_framework",
+    "melspec_model_path", "embedding_model_path", "device",
+    "speex_noise_suppression", "vad_threshold",
+)
+
+
+class _Head:
+    """Un model ONNX de keyword peste embedding-urile comune."""
+
+    def __init__(self, path: str, ncpu: int = 1):
+        import onnxruntime as ort
+
+        so = ort.SessionOptions()
+        so.intra_op_num_threads = ncpu
+        so.inter_op_num_threads = ncpu
+        self.path = path
+        self.session = ort.InferenceSession(path, sess_options=so, providers=["CPUExecutionProvider"])
+        inp = self.session.get_inputs()[0]
+        self.input_name = inp.name
+        self.n_frames = int(inp.shape[1])
+        # modelele exportate cu batch fix (1) nu acceptă mai multe ferestre odată
+        self.batched = not isinstance(inp.shape[0], int)
+
+    def predict(self, features: np.ndarray) -> float:
+        out = self.session.run(None, {self.input_name: features})[0]
+        return float(np.asarray(out).reshape(-1)[0])
+
+    def predict_batch(self, features: np.ndarray) -> np.ndarray:
+        out = self.session.run(None, {self.input_name: features})[0]
+        return np.asarray(out).reshape(features.shape[0], -1)[:, 0]
+
+
+class OWWSubscription:
+    """
+    Abonament la frontend: un set de capete (label -> model) și o coadă scurtă
+    de predicții. Capetele rulează doar cât timp abonamentul e activ.
+    """
+
+    def __init__(self, frontend: "OWWFrontend", name: str, heads: Dict[str, str], maxlen: int = 16):
+        self._fe = frontend
+        self.name = name
+        self.heads = dict(heads)  # label -> cheia capului în frontend
+        self.active = False
+        self._cond = threading.Condition()
+        self._pending: deque = deque(maxlen=max(1, int(maxlen)))
+        self.last_pos: Optional[int] = None  # poziția în captură a ultimei predicții citite
+        self._warm: Dict[str, int] = {label: 0 for label in self.heads}
+
+    def activate(self) -> None:
+        if not self.active:
+            self.active = True
+            self._fe._notify()
+
+    def deactivate(self) -> None:
+        self.active = False
+
+    def reset(self) -> None:
+        """Golește predicțiile în așteptare și reia warm-up-ul capetelor."""
+        with self._cond:
+            self._pending.clear()
+            for label in self._warm:
+                self._warm[label] = 0
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, float]]:
+        """Următoarea predicție (blochează până la `timeout`)."""
+        with self._cond:
+            if not self._pending:
+                self._cond.wait(timeout=timeout)
+            if not self._pending:
+                return None
+            self.last_pos, preds = self._pending.popleft()
+            return preds
+
+    def drain(self) -> List[Dict[str, float]]:
+        """Toate predicțiile în așteptare, fără să blocheze."""
+        with self._cond:
+            items = [preds for _, preds in self._pending]
+            if self._pending:
+                self.last_pos = self._pending[-1][0]
+            self._pending.clear()
+        return items
+
+    def close(self) -> None:
+        self.active = False
+        self._fe._unregister(self)
+
+    def _deliver(self, scores: Dict[str, float], pos: Optional[int] = None) -> None:
+        preds: Dict[str, float] = {}
+        with self._cond:
+            for label, key in self.heads.items():
+                score = scores.get(key, 0.0)
+                if self._warm[label] < WARMUP_PREDICTIONS:
+                    self._warm[label] += 1
+                    score = 0.0
+                preds[label] = score
+            self._pending.append((pos, preds))
+            self._cond.notify_all()
+
+
+class OWWFrontend:
+    """
+    Extractor de feature-uri openwakeword comun, cu thread propriu.
+    Rulează doar cât timp există cel puțin un abonament activ.
+    """
+
+    def __init__(self, cfg_audio: Dict[str, Any], cfg_openwake: Dict[str, Any], logger=None):
+        self.log = logger
+        cfg_audio = cfg_audio or {}
+        cfg_openwake = cfg_openwake or {}
+
+        self.sample_rate = int(cfg_openwake.get("sample_rate") or cfg_audio.get("sample_rate", 16000))
+        # queue_max se măsoară în hop-uri native (80 ms): atât audio restant tolerăm
+        self.queue_max = int(cfg_openwake.get("queue_max", 8))
+        self.max_batch_hops = max(1, int(cfg_openwake.get("max_batch_hops", 4)))
+        self.ncpu = int(cfg_openwake.get("ncpu", 1) or 1)
+        self.idle_reset_s = float(cfg_openwake.get("idle_reset_seconds", 1.0))
+
+        framework = (cfg_openwake.get("inference_framework") or "onnx").lower()
+        if framework != "onnx":
+            raise RuntimeError(f"openwakeword frontend: suport doar inference_framework=onnx (primit {framework}).")
+        if cfg_openwake.get("speex_noise_suppression") or float(cfg_openwake.get("vad_threshold", 0.0) or 0.0) > 0:
+            raise RuntimeError(
+                "openwakeword frontend: speex_noise_suppression/vad_threshold nu sunt suportate de frontend-ul comun."
+            )
+        self.options = {k: cfg_openwake[k] for k in FRONTEND_OPTIONS if k in cfg_openwake}
+        self.options["sample_rate"] = self.sample_rate
+
+        try:
+            from openwakeword.utils import AudioFeatures
+        except Exception as exc:  # pragma: no cover - import error path
+            raise RuntimeError("Biblioteca `openwakeword` lipsește. Rulează `pip install openwakeword`.") from exc
+
+        kwargs: Dict[str, Any] = {}
+        for key in ("melspec_model_path", "embedding_model_path", "device"):
+            val = cfg_openwake.get(key)
+            if val:
+                kwargs[key] = val
+        try:
+            self._features = AudioFeatures(sr=self.sample_rate, ncpu=self.ncpu, inference_framework="onnx", **kwargs)
+        except FileNotFoundError as exc:
+            hint = "Ai rulat `python -m openwakeword.utils.download_models`?"
+            raise RuntimeError(f"openwakeword: resurse lipsă ({exc}). {hint}") from exc
+
+        capture = get_capture(cfg_audio, logger)
+        if capture.sample_rate != self.sample_rate:
+            raise RuntimeError(
+                f"openwakeword: sample_rate={self.sample_rate} diferă de captura partajată ({capture.sample_rate})."
+            )
+        # Drop-oldest ca vechea coadă, dar pe hop-uri: cel mult `queue_max` hop-uri restante.
+        self._reader: CaptureReader = capture.reader("openwakeword", max_lag_samples=self.queue_max * HOP)
+
+        self._heads: Dict[str, _Head] = {}
+        self._subs: List[OWWSubscription] = []
+        self._lock = threading.Lock()
+        self._wake_evt = threading.Event()
+        self._stop = threading.Event()
+        self._last_error_ts: Optional[float] = None
+        self._idle_since: Optional[float] = time.monotonic()
+
+        self._thread = threading.Thread(target=self._run, name="oww-frontend", daemon=True)
+        self._thread.start()
+
+        if self.log:
+            self.log.info(
+                f"🧩 OpenWakeWord frontend comun: sr={self.sample_rate}, hop={HOP}, "
+                f"batch≤{self.max_batch_hops}, lag≤{self.queue_max} hop-uri"
+            )
+
+    def check_options(self, cfg: Dict[str, Any], owner: str) -> None:
+        """Refuză configurația unui consumator care cere alt frontend decât cel comun."""
+        for key in FRONTEND_OPTIONS:
+            if key in (cfg or {}) and cfg[key] != self.options.get(key):
+                raise ValueError(
+                    f"{owner}: `{key}` ține de frontend-ul OWW comun (audio + wake.openwakeword), "
+                    f"nu se poate seta per consumator."
+                )
+
+    # ——— Înregistrare capete ———
+    def register(self, name: str, models: Dict[str, str], maxlen: int = 16) -> OWWSubscription:
+        """
+        Înregistrează un set de modele {label: model_path}. Modelele identice
+        (aceeași cale) sunt încărcate o singură dată și refolosite.
+        """
+        heads: Dict[str, str] = {}
+        with self._lock:
+            for label, path in models.items():
+                key = str(Path(path).expanduser().resolve())
+                if key not in self._heads:
+                    self._heads[key] = _Head(key, self.ncpu)
+                heads[label] = key
+            sub = OWWSubscription(self, name, heads, maxlen=maxlen)
+            self._subs.append(sub)
+        return sub
+
+    def _unregister(self, sub: OWWSubscription) -> None:
+        with self._lock:
+            if sub in self._subs:
+                self._subs.remove(sub)
+
+    def _notify(self) -> None:
+        self._wake_evt.set()
+
+    # ——— Worker ———
+    def _active_subs(self) -> List[OWWSubscription]:
+        with self._lock:
+            return [s for s in self._subs if s.active]
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake_evt.clear()
+            active = self._active_subs()
+            if not active:
+                if self._idle_since is None:
+                    self._idle_since = time.monotonic()
+                self._wake_evt.wait(timeout=0.25)
+                continue
+
+            if self._idle_since is not None:
+                # după o pauză lungă feature-urile sunt vechi: pornim curat
+                if (time.monotonic() - self._idle_since) >= self.idle_reset_s:
+                    self._reader.seek_to_now()
+                    try:
+                        self._features.reset()
+                    except Exception:
+                        pass
+                self._idle_since = None
+
+            block = self._read_hops()
+            if block is None:
+                continue
+            end_pos = self._reader.position
+            try:
+                n_prepared = self._features(block)
+                if n_prepared < HOP:
+                    continue
+                hop_scores = self._score(active, n_prepared // HOP)
+            except Exception as exc:
+                now = time.monotonic()
+                if not self._last_error_ts or (now - self._last_error_ts) > 5.0:
+                    if self.log:
+                        self.log.error(f"openwakeword frontend: eroare la rulare ({exc})")
+                    self._last_error_ts = now
+                continue
+
+            # câte o predicție per hop, în ordine (pragurile pe hit-uri consecutive rămân corecte)
+            n = len(hop_scores)
+            for j, scores in enumerate(hop_scores):
+                pos = end_pos - (n - 1 - j) * HOP  # sfârșitul hop-ului j în captură
+                for sub in active:
+                    sub._deliver(scores, pos)
+
+    def _read_hops(self) -> Optional[np.ndarray]:
+        """
+        Citește în hop-uri native (1280): așteaptă primul hop, apoi ia dintr-o
+        dată și hop-urile deja adunate (până la `max_batch_hops`) ca să recupereze
+        după o întârziere fără să piardă audio.
+        """
+        first = self._reader.read(HOP, timeout=0.25)
+        if first is None:
+            return None
+        extra = min(self._reader.available() // HOP, self.max_batch_hops - 1)
+        if extra <= 0:
+            return first
+        rest = self._reader.read(extra * HOP, timeout=0)
+        if rest is None:
+            return first
+        return np.concatenate((first, rest))
+
+    def _score(self, subs: List[OWWSubscription], n_hops: int) -> List[Dict[str, float]]:
+        """
+        Rulează fiecare cap o singură dată per hop, chiar dacă e cerut de mai
+        multe abonamente. Capetele cu batch dinamic primesc toate hop-urile
+        într-un singur apel ORT; celelalte (batch fix = 1) rulează pe rând.
+        """
+        keys = {key for sub in subs for key in sub.heads.values()}
+        n_hops = max(1, n_hops)
+        hop_scores: List[Dict[str, float]] = [{} for _ in range(n_hops)]
+        for key in keys:
+            head = self._heads[key]
+            windows = [
+                self._features.get_features(head.n_frames, start_ndx=-head.n_frames - i)
+                for i in range(n_hops - 1, -1, -1)
+            ]
+            if n_hops > 1 and head.batched:
+                values = head.predict_batch(np.concatenate(windows, axis=0))
+            else:
+                values = [head.predict(w) for w in windows]
+            for j, value in enumerate(values):
+                hop_scores[j][key] = float(value)
+        return hop_scores
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake_evt.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+        self._reader.close()
+        with self._lock:
+            for sub in self._subs:
+                sub.active = False
+            self._subs.clear()
+
+
+def get_oww_frontend(
+    cfg_audio: Optional[Dict[str, Any]] = None,
+    cfg_openwake: Optional[Dict[str, Any]] = None,
+    logger=None,
+) -> OWWFrontend:
+    """
+    Frontend-ul comun al procesului. Îl creează doar apelul cu configurație
+    (app.py, o dată la pornire); consumatorii îl cer fără configurație.
+    """
+    global _frontend
+    with _frontend_lock:
+        if _frontend is None:
+            if cfg_audio is None:
+                raise RuntimeError("openwakeword: frontend-ul comun nu a fost inițializat (app.py îl creează la pornire).")
+            _frontend = OWWFrontend(cfg_audio, cfg_openwake or {}, logger)
+        return _frontend
+
+
+def close_oww_frontend() -> None:
+    global _frontend
+    with _frontend_lock:
+        if _frontend is not None:
+            _frontend.close()
+            _frontend = None
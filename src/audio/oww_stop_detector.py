@@ -1,7 +1,8 @@
 # src/audio/oww_stop_detector.py
 """
 OpenWakeWord-based stop keyword detector.
-Uses the same embedding/melspec as wake words for ONNX models trained with OpenWakeWord.
+Uses the same embedding/melspec as wake words for ONNX models trained with OpenWakeWord,
+computed once in the shared OWW frontend.
 """
 from __future__ import annotations
 
@@ -12,6 +13,8 @@ from typing import Dict, Any, Optional, List
 
 import numpy as np
 
+from .oww_frontend import OWWFrontend, OWWSubscription, get_oww_frontend
+
 
 @dataclass
 class OWWStopResult:
@@ -25,8 +28,9 @@ class OWWStopDetector:
     Suportă multiple modele ONNX (ex: shut_up.onnx, stop_now.onnx).
     """
 
-    def __init__(self, cfg: dict, sample_rate: int, logger):
+    def __init__(self, cfg: dict, sample_rate: int, logger, frontend: Optional[OWWFrontend] = None):
         self.log = logger
+        self._cfg = cfg
         self.sample_rate = sample_rate
         self.threshold = float(cfg.get("threshold", 0.5))
         self.hits_required = max(1, int(cfg.get("hits_required", 2)))
@@ -38,8 +42,8 @@ class OWWStopDetector:
         if not self._models_cfg:
             raise ValueError("OWWStopDetector: no models configured")
 
-        # Init OpenWakeWord
-        self._model = self._init_oww()
+        # Capete OWW în frontend-ul comun (mel/embedding partajate cu wake/goodbye)
+        self._sub = self._init_oww(frontend)
 
         # Detection state per keyword
         self._consecutive_hits: Dict[str, int] = {name: 0 for name in self._models_cfg}
@@ -81,54 +85,44 @@ class OWWStopDetector:
 
         return models
 
-    def _init_oww(self):
-        try:
-            from openwakeword import Model
-        except ImportError as exc:
-            raise RuntimeError("openwakeword not installed") from exc
-
-        model_paths = [m["path"] for m in self._models_cfg.values()]
-
+    def _init_oww(self, frontend: Optional[OWWFrontend]) -> OWWSubscription:
+        # Mel/embedding vin din frontend-ul comun (construit în app.py); aici înregistrăm doar capetele.
         try:
-            return Model(
-                wakeword_models=model_paths,
-                inference_framework="onnx",
-            )
-        except FileNotFoundError as exc:
-            hint = "Run: python -c \"from openwakeword import utils; utils.download_models()\""
-            raise RuntimeError(f"OWWStopDetector: missing resources ({exc}). {hint}") from exc
+            frontend = frontend or get_oww_frontend()
+            frontend.check_options(self._cfg, "oww_stop")
+            if frontend.sample_rate != self.sample_rate:
+                raise ValueError(f"sample_rate {self.sample_rate} diferă de frontend ({frontend.sample_rate})")
+            models = {m["label"]: m["path"] for m in self._models_cfg.values()}
+            return frontend.register("oww-stop", models)
         except Exception as exc:
             raise RuntimeError(f"OWWStopDetector: init failed ({exc})") from exc
 
+    def activate(self) -> None:
+        """Pornește capetele de stop în frontend (cât timp barge-in e armat)."""
+        self._sub.activate()
+
+    def deactivate(self) -> None:
+        self._sub.deactivate()
+
     def reset(self) -> None:
         """Reset detection state."""
         for name in self._consecutive_hits:
             self._consecutive_hits[name] = 0
-        try:
-            self._model.reset()
-        except Exception:
-            pass
+        self._sub.reset()
 
     def process_block(self, pcm_i16: np.ndarray) -> Optional[OWWStopResult]:
         """
-        Process audio block and return OWWStopResult if stop keyword detected.
+        Evaluează predicțiile apărute între timp în frontend-ul comun (blocul
+        audio e doar ritmul apelantului; frontend-ul citește singur captura).
+        Returnează OWWStopResult dacă a fost detectat un cuvânt stop.
         """
-        if pcm_i16.size == 0:
-            return None
-
-        # OpenWakeWord expects int16 samples
-        samples = pcm_i16.astype(np.int16).flatten()
-
-        try:
-            predictions = self._model.predict(samples)
-        except Exception as exc:
-            if self.debug:
-                self.log.debug(f"OWWStopDetector predict error: {exc}")
-            return None
-
-        if not predictions:
-            return None
+        for predictions in self._sub.drain():
+            result = self._evaluate(predictions)
+            if result:
+                return result
+        return None
 
+    def _evaluate(self, predictions: Dict[str, float]) -> Optional[OWWStopResult]:
         now = time.monotonic()
 
         for name, model_cfg in self._models_cfg.items():
@@ -152,7 +146,7 @@ class OWWStopDetector:
                 if (now - last_hit) * 1000 >= self.cooldown_ms:
                     self._consecutive_hits[name] = 0
                     self._last_hit_time[name] = now
-                    self._model.reset()
+                    self.reset()
                     return OWWStopResult(keyword=name, score=score)
 
         return None
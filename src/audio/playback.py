@@ -0,0 +1,273 @@
+# src/audio/playback.py
+"""
+Ieșire audio persistentă pentru TTS.
+
+Un singur `sd.OutputStream` deschis o dată, alimentat dintr-o coadă de blocuri
+PCM float32 mono. Toate backend-urile (Edge, Piper, remote) scriu cu `write()`
+pe măsură ce au audio; callback-ul redă ce e în coadă și liniște când coada e
+goală, deci nu mai pornim câte un proces de player per propoziție.
+
+- propozițiile se lipesc fără pauză; liniștea dintre ele e inserată explicit
+  (`silence()`), în sample-uri, nu cu sleep;
+- `flush()` golește coada: următorul bloc cerut de placa de sunet e deja liniște;
+- `write(..., on_start=)` anunță când începe să sune un bloc, iar `played` e
+  poziția care a sunat deja — pentru ecou și pentru timpul real până la primul
+  sunet. Callback-ul doar predă blocul lui PortAudio; momentul în care ajunge la
+  difuzor vine din `time_info.outputBufferDacTime` (sau, dacă driverul nu-l dă,
+  din latența de ieșire a stream-ului), deci ambele includ latența device-ului.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from math import gcd
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import sounddevice as sd
+from scipy.signal import resample_poly
+
+_player: Optional["PcmPlayer"] = None
+_player_lock = threading.Lock()
+
+
+def resample(pcm: np.ndarray, sr: int, target: int) -> np.ndarray:
+    """Resampling polifazic (ex: Piper 22.05 kHz -> 24 kHz)."""
+    if sr == target or pcm.shape[0] == 0:
+        return pcm
+    g = gcd(int(sr), int(target))
+    return resample_poly(pcm, target // g, sr // g).astype(np.float32)
+
+
+class PcmPlayer:
+    """
+    Stream de ieșire mono float32. `write()` doar pune blocul în coadă (nu
+    blochează), deci sinteza propoziției următoare merge în paralel cu redarea.
+    """
+
+    def __init__(self, cfg: Optional[Dict[str, Any]] = None, logger=None):
+        cfg = cfg or {}
+        self.log = logger
+        self.sample_rate = int(cfg.get("sample_rate", 24000))
+        block_ms = int(cfg.get("block_ms", 20))
+        self.block = int(self.sample_rate * block_ms / 1000)
+
+        self._q: deque = deque()
+        self._head = 0                 # offset în primul bloc din coadă
+        self._queued = 0               # sample-uri încă neredate
+        self._written = 0              # poziția absolută a următorului sample scris
+        self._played = 0               # sample-uri de conținut predate lui PortAudio
+        self._dac = (0, 0.0)           # (poziție, perf_counter) la care sună primul sample din ultimul bloc
+        self._heard = 0                # ultima valoare `played` (nu scade)
+        self._dry_at: Optional[float] = None   # când s-a golit coada (underrun)
+        self._cond = threading.Condition()
+
+        # markere `on_start`: (poziție, callback); când blocul e predat devin (moment DAC, callback)
+        # și rulează pe un thread separat, nu în callback-ul audio
+        self._marks: deque = deque()
+        self._fired: deque = deque()
+        self._fire = threading.Event()
+        self._closed = False
+        threading.Thread(target=self._notify_loop, name="audio-out-marks", daemon=True).start()
+
+        index = cfg.get("device_index")
+        try:
+            self._stream = sd.OutputStream(
+                channels=1,
+                samplerate=self.sample_rate,
+                blocksize=self.block,
+                dtype="float32",
+                latency="low",
+                callback=self._callback,
+                device=index if index not in (None, "") else None,
+            )
+            self._stream.start()
+        except Exception as exc:
+            self._closed = True
+            raise RuntimeError(f"ieșire audio: nu pot deschide difuzorul ({exc}).") from exc
+
+        if self.log:
+            self.log.info(
+                f"🔈 Ieșire audio persistentă: sr={self.sample_rate}, block={self.block}, "
+                f"latență={self.latency_s * 1000:.0f}ms"
+            )
+
+    def _dac_delay(self, time_info) -> float:
+        """Peste cât timp ajunge la difuzor primul sample din blocul curent."""
+        try:
+            delay = float(time_info.outputBufferDacTime) - float(time_info.currentTime)
+            if 0.0 < delay < 1.0:
+                return delay
+        except Exception:
+            pass
+        return self.latency_s
+
+    def _callback(self, outdata, frames, time_info, status):
+        if status and self.log:
+            self.log.debug(f"Ieșire audio status: {status}")
+        dac_at = time.perf_counter() + self._dac_delay(time_info)
+        out = outdata[:, 0]
+        filled = 0
+        with self._cond:
+            start = self._played
+            while filled < frames and self._q:
+                buf = self._q[0]
+                take = min(frames - filled, buf.shape[0] - self._head)
+                out[filled:filled + take] = buf[self._head:self._head + take]
+                filled += take
+                self._head += take
+                if self._head >= buf.shape[0]:
+                    self._q.popleft()
+                    self._head = 0
+            self._queued -= filled
+            self._played += filled
+            if filled:
+                self._dac = (start, dac_at)
+            if filled < frames:
+                out[filled:] = 0.0
+                if self._dry_at is None:
+                    self._dry_at = time.perf_counter()
+            while self._marks and self._marks[0][0] < self._played:
+                pos, cb = self._marks.popleft()
+                self._fired.append((dac_at + max(0, pos - start) / self.sample_rate, cb))
+            if not self._q:
+                self._cond.notify_all()
+        if self._fired:
+            self._fire.set()
+
+    def _notify_loop(self) -> None:
+        while not self._closed:
+            self._fire.wait(0.5)
+            self._fire.clear()
+            while self._fired and not self._closed:
+                at, cb = self._fired[0]
+                wait = at - time.perf_counter()
+                if wait > 0:
+                    # blocul e la PortAudio, dar încă nu sună: așteptăm momentul DAC
+                    time.sleep(min(wait, 0.05))
+                    continue
+                self._fired.popleft()
+                try:
+                    cb()
+                except Exception as e:
+                    if self.log:
+                        self.log.debug(f"Ieșire audio: callback on_start eșuat ({e})")
+
+    def write(self, pcm: np.ndarray, sr: Optional[int] = None, on_start: Optional[Callable[[], None]] = None) -> int:
+        """
+        Pune PCM-ul în coadă și întoarce poziția absolută (în sample-uri) a primului
+        lui sample. `on_start` se apelează când acel sample ajunge la difuzor
+        (momentul DAC al blocului, nu doar predarea lui către PortAudio).
+        """
+        if pcm is None or pcm.shape[0] == 0:
+            return self._written
+        pcm = np.ascontiguousarray(pcm, dtype=np.float32)
+        if sr and sr != self.sample_rate:
+            pcm = resample(pcm, int(sr), self.sample_rate)
+        with self._cond:
+            pos = self._written
+            self._q.append(pcm)
+            self._queued += pcm.shape[0]
+            self._written += pcm.shape[0]
+            self._dry_at = None
+            if on_start is not None:
+                self._marks.append((pos, on_start))
+        return pos
+
+    def silence(self, ms: float) -> None:
+        """Inserează liniște exactă între propoziții (fără sleep în thread-ul apelant)."""
+        n = int(self.sample_rate * max(0.0, float(ms)) / 1000.0)
+        if n > 0:
+            self.write(np.zeros(n, dtype=np.float32))
+
+    def drain(self, stop: Optional[threading.Event] = None, timeout: Optional[float] = None) -> bool:
+        """Așteaptă să se redea tot ce e în coadă; False dacă a venit `stop` (sau timeout)."""
+        waited = 0.0
+        with self._cond:
+            while self._q:
+                if stop is not None and stop.is_set():
+                    return False
+                if timeout is not None and waited >= timeout:
+                    return False
+                self._cond.wait(0.02)
+                waited += 0.02
+        return True
+
+    def flush(self) -> None:
+        """
+        Aruncă tot ce n-a fost predat încă; device-ul primește liniște de la blocul
+        următor. Ce e deja în bufferul PortAudio (~`latency_s`) tot se aude, iar
+        `on_start`-urile lui rămân programate; audio-ul aruncat contează ca redat.
+        """
+        with self._cond:
+            self._q.clear()
+            self._head = 0
+            self._played += self._queued
+            self._heard = max(self._heard, self._played)
+            self._queued = 0
+            self._marks.clear()
+            self._cond.notify_all()
+
+    @property
+    def played(self) -> int:
+        """
+        Poziția absolută până la care audio-ul a sunat deja (estimată din momentul
+        DAC al ultimului bloc; cel aruncat la flush e sărit). Nu scade.
+        """
+        with self._cond:
+            start, at = self._dac
+            est = start + int((time.perf_counter() - at) * self.sample_rate)
+            self._heard = max(self._heard, min(self._played, est))
+            return self._heard
+
+    @property
+    def latency_s(self) -> float:
+        """Latența de ieșire raportată de PortAudio (între callback și difuzor)."""
+        try:
+            return float(self._stream.latency)
+        except Exception:
+            return 0.0
+
+    @property
+    def pending(self) -> bool:
+        return bool(self._q)
+
+    @property
+    def buffered_s(self) -> float:
+        """Câte secunde de audio așteaptă în coadă."""
+        return self._queued / float(self.sample_rate)
+
+    def underrun_s(self) -> float:
+        """De cât timp redă liniște pentru că nu mai are audio (0 dacă mai are în coadă)."""
+        with self._cond:
+            if self._q or self._dry_at is None:
+                return 0.0
+            return time.perf_counter() - self._dry_at
+
+    def close(self) -> None:
+        self.flush()
+        self._closed = True
+        self._fire.set()
+        try:
+            self._stream.stop()
+            self._stream.close()
+        except Exception:
+            pass
+
+
+def get_player(cfg: Optional[Dict[str, Any]] = None, logger=None) -> PcmPlayer:
+    """Returnează ieșirea audio partajată a procesului (o deschide la primul apel)."""
+    global _player
+    with _player_lock:
+        if _player is None:
+            _player = PcmPlayer(cfg or {}, logger)
+        return _player
+
+
+def close_player() -> None:
+    global _player
+    with _player_lock:
+        if _player is not None:
+            _player.close()
+            _player = None
@@ -2,11 +2,64 @@
 from __future__ import annotations
 from typing import Optional
 import numpy as np
+from scipy.signal import lfilter, lfilter_zi
+
+_I16_SCALE = np.float32(1.0 / 32768.0)
+
+
+def int16_to_float(pcm_i16: np.ndarray) -> np.ndarray:
+    """int16 -> float32 în [-1, 1) (o singură conversie per cadru)."""
+    return pcm_i16.astype(np.float32) * _I16_SCALE
+
+
+def float_to_int16(x: np.ndarray) -> np.ndarray:
+    return np.clip(x * 32768.0, -32768, 32767).astype(np.int16)
+
+
+class IIRFilter:
+    """
+    Filtru IIR vectorizat (scipy `lfilter`) care păstrează starea `zi` între
+    cadre, deci blocurile consecutive se filtrează ca un singur semnal continuu.
+    """
+
+    def __init__(self, b, a):
+        self.b = np.asarray(b, dtype=np.float32)
+        self.a = np.asarray(a, dtype=np.float32)
+        self._zi_unit = lfilter_zi(self.b, self.a).astype(np.float32)
+        self._zi: Optional[np.ndarray] = None
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        if self._zi is None:
+            # pornim din regim staționar pe primul sample (fără „click” la start)
+            self._zi = self._zi_unit * (x[0] if x.size else 0.0)
+        y, self._zi = lfilter(self.b, self.a, x, zi=self._zi)
+        return y.astype(np.float32, copy=False)
+
+    def reset(self) -> None:
+        self._zi = None
+
+
+class DCBlocker(IIRFilter):
+    """HPF DC blocker: y[n] = x[n] - x[n-1] + r*y[n-1]."""
+
+    def __init__(self, r: float = 0.995):
+        super().__init__([1.0, -1.0], [1.0, -r])
+
+
+class HighPass(IIRFilter):
+    """High-pass RC de ordinul 1: y[n] = alpha * (y[n-1] + x[n] - x[n-1])."""
+
+    def __init__(self, cutoff_hz: float, sr: int):
+        rc = 1.0 / (2.0 * np.pi * cutoff_hz)
+        dt = 1.0 / sr
+        alpha = rc / (rc + dt)
+        super().__init__([alpha, -alpha], [1.0, -alpha])
+
 
 class AudioEffects:
     """
-    NS/AGC/HPF simple, per-frame (int16).
-    - HPF: DC blocker (y[n] = x[n] - x[n-1] + r*y[n-1], r≈0.995)
+    NS/AGC/HPF simple, per-frame, lanț float32 cap-coadă.
+    - HPF: DC blocker (y[n] = x[n] - x[n-1] + r*y[n-1], r≈0.995), vectorizat cu stare între cadre
     - NS: noise gate blând (~-50 dBFS)
     - AGC: nivelare către un RMS-țintă, cu clamp pe factor
     Nu introduce dependențe grele; latență ~0.
@@ -17,9 +70,11 @@ class AudioEffects:
         self.agc = agc
         self.hpf = hpf
         # state pentru HPF
-        self._x1 = 0.0
-        self._y1 = 0.0
-        self._r = 0.995  # coef. DC blocker
+        self._hpf = DCBlocker(0.995)
+
+        # NS
+        self._ns_thr = 0.003      # ~ -50 dBFS
+        self._ns_atten = 0.1      # -20 dB
 
         # AGC
         self._target_rms = 0.05   # ~-26 dBFS țintă „confort”
@@ -29,54 +84,40 @@ class AudioEffects:
 
         self._gain = 1.0
 
-    def _apply_hpf(self, x: np.ndarray) -> np.ndarray:
-        # int16 -> float32
-        xf = x.astype(np.float32) / 32768.0
-        y = np.empty_like(xf)
-        x1 = self._x1
-        y1 = self._y1
-        r = self._r
-        for i in range(len(xf)):
-            yn = xf[i] - x1 + r * y1
-            y[i] = yn
-            x1 = xf[i]
-            y1 = yn
-        self._x1, self._y1 = x1, y1
-        # back to int16
-        y = np.clip(y * 32768.0, -32768, 32767).astype(np.int16)
-        return y
-
-    def _apply_ns(self, x: np.ndarray) -> np.ndarray:
-        # noise gate simplu: dacă RMS < thr, atenuăm cu -20 dB
-        xf = x.astype(np.float32) / 32768.0
-        rms = float(np.sqrt(np.mean(xf * xf)) + 1e-9)
-        thr = 0.003  # ~ -50 dBFS
-        if rms < thr:
-            xf *= 0.1  # -20 dB
-        y = np.clip(xf * 32768.0, -32768, 32767).astype(np.int16)
-        return y
-
-    def _apply_agc(self, x: np.ndarray) -> np.ndarray:
-        xf = x.astype(np.float32) / 32768.0
-        rms = float(np.sqrt(np.mean(xf * xf)) + 1e-9)
-        if rms > 0:
-            desired_gain = self._target_rms / rms
-            desired_gain = float(np.clip(desired_gain, self._agc_min_gain, self._agc_max_gain))
-            # smooth
-            self._gain = (1 - self._agc_smooth) * self._gain + self._agc_smooth * desired_gain
-        y = np.clip(xf * self._gain, -1.0, 1.0)
-        return (y * 32768.0).astype(np.int16)
-
-    def process_frame(self, pcm_i16: np.ndarray) -> np.ndarray:
-        y = pcm_i16
+    def process(self, x: np.ndarray) -> np.ndarray:
+        """
+        Procesează un cadru float32 în [-1, 1] și întoarce tot float32.
+        NS și AGC împart un singur calcul de RMS (gate-ul e doar un factor).
+        """
+        y = x
         try:
             if self.hpf:
-                y = self._apply_hpf(y)
-            if self.ns:
-                y = self._apply_ns(y)
+                y = self._hpf.process(y)
+            if self.ns or self.agc:
+                rms = float(np.sqrt(np.mean(y * y)) + 1e-9)
+                gain = 1.0
+                if self.ns and rms < self._ns_thr:
+                    gain = self._ns_atten
+                    rms *= self._ns_atten
+                if self.agc:
+                    desired_gain = self._target_rms / rms
+                    desired_gain = float(np.clip(desired_gain, self._agc_min_gain, self._agc_max_gain))
+                    # smooth
+                    self._gain = (1 - self._agc_smooth) * self._gain + self._agc_smooth * desired_gain
+                    gain *= self._gain
+                if gain != 1.0:
+                    y = y * np.float32(gain)
             if self.agc:
-                y = self._apply_agc(y)
+                y = np.clip(y, -1.0, 1.0)
         except Exception:
             # fail-safe: dacă ceva nu merge, trecem frame-ul nemodificat
-            return pcm_i16
+            return x
         return y
+
+    def process_frame(self, pcm_i16: np.ndarray) -> np.ndarray:
+        """Compatibilitate int16 -> int16 (o conversie la intrare, una la ieșire)."""
+        return float_to_int16(self.process(int16_to_float(pcm_i16)))
+
+    def reset(self) -> None:
+        self._hpf.reset()
+        self._gain = 1.0
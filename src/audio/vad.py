@@ -1,120 +1,221 @@
 # src/audio/vad.py
 """
-Voice Activity Detection using Silero VAD.
-Silero VAD offers better accuracy than WebRTC VAD, especially for Romanian.
+Voice Activity Detection cu Silero VAD (ONNX, fără torch).
+
+Modelul Silero v5 exportat ONNX rulează prin onnxruntime. Sesiunea e partajată
+la nivel de proces, dar starea recurentă (`state` [2,1,128]) și contextul de
+64 sample-uri sunt per instanță, deci barge-in-ul și recorder-ul nu-și mai
+strică reciproc starea. Modelul e inclus în repo (`voices/silero_vad.onnx`,
+fără descărcare la prima pornire); dacă lipsește, constructorul aruncă eroare — WebRTC VAD se folosește doar când e cerut explicit
+(`model_path=""`), nu ca înlocuitor tăcut.
 """
 from __future__ import annotations
-import warnings
-import torch
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Union
+
 import numpy as np
-from typing import Optional
-from collections import deque
 
-warnings.filterwarnings("ignore", message=r"pkg_resources is deprecated.*")
+try:
+    import onnxruntime as ort
+except Exception as exc:  # pragma: no cover - import guard
+    ort = None  # type: ignore[assignment]
+    _onnx_error = exc  # type: ignore[var-annotated]
+else:
+    _onnx_error = None  # type: ignore[var-annotated]
+
+DEFAULT_MODEL_PATH = "voices/silero_vad.onnx"
+
+# Cache global de sesiuni ONNX (una per fișier de model)
+_silero_sessions: Dict[str, "ort.InferenceSession"] = {}
+_silero_lock = threading.Lock()
 
-# Global model cache (loaded once)
-_silero_model = None
+Frame = Union[bytes, bytearray, memoryview, np.ndarray]
 
 
-def _load_silero():
-    """Load Silero VAD model (cached globally)."""
-    global _silero_model
-    if _silero_model is None:
-        model, _ = torch.hub.load(
-            repo_or_dir='snakers4/silero-vad',
-            model='silero_vad',
-            trust_repo=True,
-            verbose=False
+def _load_silero(model_path: str | Path):
+    """Încarcă sesiunea ONNX Silero (cache global, thread-safe)."""
+    if ort is None:
+        raise RuntimeError(f"onnxruntime indisponibil: {_onnx_error}")
+    path = Path(model_path).expanduser()
+    if not path.exists():
+        raise FileNotFoundError(
+            f"Silero VAD: model absent ({path}). Refă-l din repo sau descarcă-l (INSTALL.md, pasul 6) "
+            f"sau setează vad_model_path: \"\" pentru WebRTC VAD."
         )
-        _silero_model = model
-    return _silero_model
+    key = str(path.resolve())
+    with _silero_lock:
+        sess = _silero_sessions.get(key)
+        if sess is None:
+            so = ort.SessionOptions()
+            so.intra_op_num_threads = 1
+            so.inter_op_num_threads = 1
+            sess = ort.InferenceSession(key, so, providers=["CPUExecutionProvider"])
+            _silero_sessions[key] = sess
+        return sess
+
+
+def _to_float(frame: Frame) -> np.ndarray:
+    """bytes int16 / ndarray int16 / ndarray float32 -> float32 în [-1, 1]."""
+    if isinstance(frame, np.ndarray):
+        if frame.dtype == np.float32:
+            return frame.reshape(-1)
+        if frame.dtype == np.int16:
+            return frame.reshape(-1).astype(np.float32) * (1.0 / 32768.0)
+        return np.asarray(frame, dtype=np.float32).reshape(-1)
+    return np.frombuffer(frame, dtype=np.int16).astype(np.float32) * (1.0 / 32768.0)
+
+
+def _to_pcm_bytes(frame: Frame) -> bytes:
+    if isinstance(frame, np.ndarray):
+        if frame.dtype == np.int16:
+            return frame.tobytes()
+        return (np.clip(frame, -1.0, 1.0) * 32767.0).astype(np.int16).tobytes()
+    return bytes(frame)
 
 
 class VAD:
     """
-    Voice Activity Detection using Silero VAD.
-    
-    Drop-in replacement for WebRTC VAD with same interface.
-    Silero VAD requires minimum 512 samples (32ms at 16kHz), so we buffer.
+    Voice Activity Detection cu Silero VAD (ONNX).
+
+    Aceeași interfață ca înainte (`is_speech`, `reset`). Silero cere ferestre de
+    512 sample-uri (32ms la 16kHz), așa că acumulăm cadrele într-un buffer
+    prealocat și rulăm modelul doar când fereastra e plină; între inferențe
+    întoarcem ultima decizie.
+
+    Pre-gate opțional („energy” / „webrtc”): dacă niciun cadru din fereastră nu
+    e candidat, sărim peste rețea și raportăm liniște.
     """
-    
-    def __init__(self, sample_rate: int, aggressiveness: int = 2, frame_ms: int = 30):
+
+    def __init__(
+        self,
+        sample_rate: int,
+        aggressiveness: int = 2,
+        frame_ms: int = 30,
+        model_path: Optional[str | Path] = None,
+        pre_gate: str = "off",
+        energy_gate: float = 0.004,
+        logger=None,
+    ):
         """
         Args:
-            sample_rate: Audio sample rate (must be 8000 or 16000)
-            aggressiveness: 0-3, higher = more aggressive (maps to threshold)
-            frame_ms: Frame duration (10, 20, or 30 ms) - for compatibility
+            sample_rate: Audio sample rate (8000 sau 16000 pentru Silero)
+            aggressiveness: 0-3, mai mare = mai strict (mapat pe prag)
+            frame_ms: durata cadrului (10, 20 sau 30 ms) - pentru WebRTC
+            model_path: calea modelului ONNX Silero (None = implicit; "" = WebRTC VAD)
+            pre_gate: "off" | "energy" | "webrtc"
+            energy_gate: prag RMS (float, 0..1) pentru pre-gate-ul „energy”
         """
-        if sample_rate not in (8000, 16000):
-            # Fallback to WebRTC VAD for unsupported sample rates
-            self._use_webrtc = True
-            import webrtcvad
-            self._webrtc_vad = webrtcvad.Vad(aggressiveness)
-            self.sr = sample_rate
-            return
-            
-        self._use_webrtc = False
-        self.sr = sample_rate
+        self.sr = int(sample_rate)
         self.frame_ms = frame_ms
-        
+        self.log = logger
+        self._webrtc_vad = None
+
         # Map aggressiveness to threshold (0=permissive, 3=strict)
-        # Lower threshold = more speech detected
         threshold_map = {0: 0.1, 1: 0.2, 2: 0.3, 3: 0.4}
         self.threshold = threshold_map.get(aggressiveness, 0.25)
-        
-        # Load model
-        self.model = _load_silero()
-        self.model.reset_states()
-        
-        # Silero needs minimum 512 samples (32ms at 16kHz)
-        # We'll accumulate audio in a buffer
-        self.min_samples = 512
-        self.buffer = np.array([], dtype=np.float32)
-    
-    def is_speech(self, pcm_bytes: bytes) -> bool:
+
+        self._session = None
+        if model_path is None:
+            model_path = DEFAULT_MODEL_PATH
+        if model_path != "":
+            if self.sr not in (8000, 16000):
+                raise ValueError(f"Silero VAD cere 8000/16000 Hz (ai {self.sr}); setează vad_model_path: \"\" pentru WebRTC.")
+            try:
+                self._session = _load_silero(model_path)
+            except Exception as e:
+                raise RuntimeError(f"Silero VAD nu poate porni: {e}") from e
+        elif self.log:
+            self.log.info("VAD: WebRTC (vad_model_path gol).")
+
+        self._use_webrtc = self._session is None
+        if self._use_webrtc or pre_gate == "webrtc":
+            import webrtcvad
+            # ca pre-gate vrem un WebRTC permisiv (0); ca VAD principal păstrăm agresivitatea
+            self._webrtc_vad = webrtcvad.Vad(int(aggressiveness) if self._use_webrtc else 0)
+        if self._use_webrtc:
+            return
+
+        self.pre_gate = (pre_gate or "off").lower()
+        self.energy_gate = float(energy_gate)
+
+        # Fereastră Silero v5: context (64 @16k / 32 @8k) + 512 sample-uri noi
+        self.min_samples = 512 if self.sr == 16000 else 256
+        self._ctx = 64 if self.sr == 16000 else 32
+        self._window = np.zeros((1, self._ctx + self.min_samples), dtype=np.float32)
+        self._fill = 0
+        self._state = np.zeros((2, 1, 128), dtype=np.float32)
+        self._sr_arr = np.array(self.sr, dtype=np.int64)
+        self._candidate = False
+        self._last = False
+        self.last_prob = 0.0
+
+    def _gate(self, frame: Frame, audio_float: np.ndarray) -> bool:
+        if self.pre_gate == "energy":
+            return float(np.sqrt(np.mean(audio_float * audio_float) + 1e-12)) >= self.energy_gate
+        if self.pre_gate == "webrtc" and self._webrtc_vad is not None:
+            try:
+                return self._webrtc_vad.is_speech(_to_pcm_bytes(frame), self.sr)
+            except Exception:
+                return True
+        return True
+
+    def _infer(self) -> None:
+        if not self._candidate:
+            # nimic candidat în fereastră — economisim inferența
+            self._last = False
+            self.last_prob = 0.0
+        else:
+            out, self._state = self._session.run(
+                None, {"input": self._window, "state": self._state, "sr": self._sr_arr}
+            )
+            self.last_prob = float(out.reshape(-1)[0])
+            self._last = self.last_prob >= self.threshold
+        # ultimele sample-uri devin contextul ferestrei următoare
+        self._window[0, :self._ctx] = self._window[0, -self._ctx:]
+        self._fill = 0
+        self._candidate = False
+
+    def is_speech(self, frame: Frame) -> bool:
         """
-        Check if audio frame contains speech.
-        
+        Verifică dacă un cadru conține voce.
+
         Args:
-            pcm_bytes: Raw PCM audio bytes (int16 little-endian)
-            
+            frame: PCM int16 (bytes sau ndarray) ori float32 în [-1, 1]
+
         Returns:
-            True if speech detected, False otherwise
+            Ultima decizie Silero (True = voce)
         """
         if self._use_webrtc:
-            return self._webrtc_vad.is_speech(pcm_bytes, self.sr)
-            
+            return self._webrtc_vad.is_speech(_to_pcm_bytes(frame), self.sr)
+
         try:
-            # Convert bytes to numpy array (int16 -> float32 normalized)
-            audio_int16 = np.frombuffer(pcm_bytes, dtype=np.int16)
-            audio_float = audio_int16.astype(np.float32) / 32768.0
-            
-            # Add to buffer
-            self.buffer = np.concatenate([self.buffer, audio_float])
-            
-            # Only run inference when we have enough samples
-            if len(self.buffer) < self.min_samples:
-                return False  # Not enough data yet
-            
-            # Take exactly min_samples from buffer
-            chunk = self.buffer[:self.min_samples]
-            self.buffer = self.buffer[self.min_samples:]  # Remove processed samples
-            
-            # Convert to tensor
-            audio_tensor = torch.from_numpy(chunk)
-            
-            # Get speech probability
-            with torch.no_grad():
-                speech_prob = self.model(audio_tensor, self.sr).item()
-            
-            return speech_prob >= self.threshold
-            
-        except Exception as e:
+            audio_float = _to_float(frame)
+            cand = self.pre_gate == "off" or self._gate(frame, audio_float)
+
+            pos = 0
+            n = audio_float.shape[0]
+            while pos < n:
+                take = min(self.min_samples - self._fill, n - pos)
+                start = self._ctx + self._fill
+                self._window[0, start:start + take] = audio_float[pos:pos + take]
+                self._fill += take
+                pos += take
+                self._candidate = self._candidate or cand
+                if self._fill == self.min_samples:
+                    self._infer()
+            return self._last
+
+        except Exception:
             # Fallback: assume no speech on error
             return False
-    
+
     def reset(self):
-        """Reset model states and buffer (call between utterances)."""
+        """Resetează starea recurentă și bufferul (între utterance-uri)."""
         if not self._use_webrtc:
-            self.model.reset_states()
-            self.buffer = np.array([], dtype=np.float32)
+            self._state.fill(0.0)
+            self._window.fill(0.0)
+            self._fill = 0
+            self._candidate = False
+            self._last = False
+            self.last_prob = 0.0
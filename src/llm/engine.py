@@ -110,15 +110,21 @@ class LLMLocal:
 
             return "No LLM provider configured."
 
-    def generate_stream(self, user_text: str, lang_hint: str = "en", mode: Optional[str] = None, history: Optional[List[Dict]] = None):
-        """Generează răspuns cu streaming. history = [{"role": "user"/"assistant", "content": ...}, ...]"""
+    def generate_stream(
+        self, user_text: str, lang_hint: str = "en", mode: Optional[str] = None,
+        history: Optional[List[Dict]] = None, time_first_token: bool = True,
+    ):
+        """
+        Generează răspuns cu streaming. history = [{"role": "user"/"assistant", "content": ...}, ...]
+        `time_first_token=False`: fără `llm_first_token_latency` (ex: speculație, cronometrată la hit).
+        """
         mode = (mode or self.default_mode).lower()
         if self.provider == "groq":
             gen = self._groq_stream(user_text, lang_hint, mode, history)
-            return wrap_stream_for_first_token(gen, llm_first_token_latency)
+            return wrap_stream_for_first_token(gen, llm_first_token_latency) if time_first_token else gen
         if self.provider == "ollama":
             gen = self._ollama_stream(user_text, lang_hint, mode, history)
-            return wrap_stream_for_first_token(gen, llm_first_token_latency)
+            return wrap_stream_for_first_token(gen, llm_first_token_latency) if time_first_token else gen
         def _one():
             yield self.generate(user_text, lang_hint, mode)
         return _one()
@@ -32,7 +32,8 @@ class LLMInterface(ABC):
         user_text: str, 
         lang_hint: str = "en", 
         mode: Optional[str] = None,
-        history: Optional[List[Dict]] = None
+        history: Optional[List[Dict]] = None,
+        time_first_token: bool = True,
     ) -> Iterator[str]:
         """
         Generează un răspuns cu streaming (token cu token).
@@ -42,6 +43,7 @@ class LLMInterface(ABC):
             lang_hint: Limba preferată
             mode: Mod de generare
             history: Istoricul conversației
+            time_first_token: False = nu observă `llm_first_token_latency` (streamuri speculative)
             
         Returns:
             Generator de tokens (string-uri)
@@ -70,9 +72,10 @@ class LocalLLM(LLMInterface):
         user_text: str, 
         lang_hint: str = "en", 
         mode: Optional[str] = None,
-        history: Optional[List[Dict]] = None
+        history: Optional[List[Dict]] = None,
+        time_first_token: bool = True,
     ) -> Iterator[str]:
-        return self._engine.generate_stream(user_text, lang_hint, mode, history)
+        return self._engine.generate_stream(user_text, lang_hint, mode, history, time_first_token)
 
 
 class RemoteLLM(LLMInterface):
@@ -121,7 +124,8 @@ class RemoteLLM(LLMInterface):
         user_text: str, 
         lang_hint: str = "en", 
         mode: Optional[str] = None,
-        history: Optional[List[Dict]] = None
+        history: Optional[List[Dict]] = None,
+        time_first_token: bool = True,
     ) -> Iterator[str]:
         import requests
         
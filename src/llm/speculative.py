@@ -0,0 +1,162 @@
+# src/llm/speculative.py
+"""
+Pornire speculativă a LLM-ului pe transcriptul parțial.
+
+Când parțialul ASR streaming stă neschimbat `stable_ms` în timp ce recorder-ul
+e deja în liniște (aproape de endpoint), pornim `generate_stream` cu textul
+ăsta și bufferăm tokenii. La transcriptul final: dacă textul normalizat (și
+limba) coincid, streamul speculativ devine răspunsul turei; altfel îl anulăm și
+pornim normal cu textul final.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from src.telemetry.metrics import (
+    llm_first_token_latency,
+    llm_spec_started,
+    llm_spec_hits,
+    llm_spec_misses,
+    wrap_stream_for_first_token,
+)
+from src.utils.textnorm import normalize_text
+
+
+class Speculation:
+    """Un `generate_stream` pornit devreme, consumat într-un thread propriu în buffer."""
+
+    def __init__(self, llm, text: str, lang: str, history: Optional[List[Dict]], mode: str = "precise", logger=None):
+        self.text = text
+        self.key = normalize_text(text)
+        self.lang = lang
+        self.log = logger
+        self._buf: List[str] = []
+        self._done = False
+        self._cancel = threading.Event()
+        self._cond = threading.Condition()
+        # fără cronometrul de primul token: speculațiile respinse n-ajung la utilizator,
+        # iar la hit TTFT-ul se măsoară de la transcriptul final (vezi `take`)
+        self._gen = llm.generate_stream(text, lang_hint=lang, mode=mode, history=history, time_first_token=False)
+        self._thread = threading.Thread(target=self._pump, name="LLMSpeculation", daemon=True)
+        self._thread.start()
+
+    def _pump(self) -> None:
+        try:
+            for tok in self._gen:
+                if self._cancel.is_set():
+                    break
+                with self._cond:
+                    self._buf.append(tok)
+                    self._cond.notify_all()
+        except Exception as exc:
+            if self.log:
+                self.log.debug(f"LLM speculativ: stream eșuat ({exc})")
+        finally:
+            try:
+                self._gen.close()
+            except Exception:
+                pass
+            with self._cond:
+                self._done = True
+                self._cond.notify_all()
+
+    def matches(self, text: str, lang: str) -> bool:
+        return bool(self.key) and self.lang == lang and normalize_text(text) == self.key
+
+    def stream(self) -> Iterator[str]:
+        """Tokenii deja bufferați, apoi cei care încă sosesc."""
+        i = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: i < len(self._buf) or self._done)
+                if i >= len(self._buf):
+                    return
+                tok = self._buf[i]
+            i += 1
+            yield tok
+
+    def cancel(self) -> None:
+        # generatorul nu poate fi închis din alt thread cât rulează; pump-ul se oprește la următorul token
+        self._cancel.set()
+
+
+class SpeculativeStarter:
+    """
+    Se pune pe `on_frame` în recorder, lângă `StreamingTranscriber.feed`:
+    urmărește liniștea de la coada utterance-ului și stabilitatea parțialului.
+    La final, `take(text, lang)` întoarce streamul speculativ (hit) sau None (miss).
+    """
+
+    def __init__(
+        self,
+        llm,
+        stream,
+        cfg: Optional[Dict[str, Any]],
+        history: Optional[List[Dict]],
+        lang_fallback: str = "en",
+        sample_rate: int = 16000,
+        logger=None,
+    ):
+        cfg = cfg or {}
+        self.llm = llm
+        self.stream = stream
+        self.history = list(history or [])
+        self.lang_fallback = lang_fallback
+        self.sr = int(sample_rate)
+        self.log = logger
+        self.stable_ms = int(cfg.get("stable_ms", 250))
+        self.min_silence_ms = int(cfg.get("min_silence_ms", 100))
+        self.min_chars = int(cfg.get("min_chars", 6))
+
+        self._silence_ms = 0.0
+        self._last_text = ""
+        self._last_change = time.monotonic()
+        self.spec: Optional[Speculation] = None
+
+    def feed(self, frame: np.ndarray, is_speech: bool) -> None:
+        self._silence_ms = 0.0 if is_speech else self._silence_ms + frame.shape[0] * 1000.0 / self.sr
+        text = self.stream.text
+        now = time.monotonic()
+        if text != self._last_text:
+            self._last_text = text
+            self._last_change = now
+            if self.spec is not None and normalize_text(text) != self.spec.key:
+                # parțialul s-a schimbat: speculația nu mai corespunde, nu mai plătim tokeni pe ea
+                self.spec.cancel()
+                self.spec = None
+        if (
+            self.spec is None
+            and self._silence_ms >= self.min_silence_ms
+            and (now - self._last_change) * 1000.0 >= self.stable_ms
+            and len(normalize_text(text)) >= self.min_chars
+        ):
+            lang = self.stream.language or self.lang_fallback
+            self.spec = Speculation(self.llm, text, lang, self.history, logger=self.log)
+            llm_spec_started.inc()
+            if self.log:
+                self.log.debug(f"🔮 LLM speculativ pornit pe parțial: [{lang}] {text}")
+
+    def take(self, final_text: str, lang: str) -> Optional[Iterator[str]]:
+        spec, self.spec = self.spec, None
+        if spec is None:
+            return None
+        if spec.matches(final_text, lang):
+            llm_spec_hits.inc()
+            if self.log:
+                self.log.info("🔮 Speculație LLM confirmată — răspunsul era deja pornit.")
+            return wrap_stream_for_first_token(spec.stream(), llm_first_token_latency)
+        spec.cancel()
+        llm_spec_misses.inc()
+        if self.log:
+            self.log.info(f"🔮 Speculație LLM respinsă (parțial: '{spec.text}') — repornesc pe transcriptul final.")
+        return None
+
+    def cancel(self) -> None:
+        """Tura a fost abandonată (prea scurtă, eco, FastExit) — fără hit/miss."""
+        if self.spec is not None:
+            self.spec.cancel()
+            self.spec = None
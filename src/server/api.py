@@ -12,6 +12,7 @@ Sau pentru test local:
     python -m src.server.api --host 127.0.0.1 --port 8001
 """
 from __future__ import annotations
+import io
 import os
 import sys
 import tempfile
@@ -32,11 +33,13 @@ sys.path.insert(0, str(ROOT))
 
 from src.core.config import load_all
 from src.core.logger import setup_logger
+from src.server.scheduler import ASRScheduler, SchedulerBusy
 
 app = Flask(__name__)
 
 # Global instances - inițializate la startup
 _asr = None
+_asr_sched = None
 _llm = None
 _tts_cfg = None
 _logger = None
@@ -44,7 +47,7 @@ _logger = None
 
 def _init_engines():
     """Inițializează engine-urile la pornirea serverului."""
-    global _asr, _llm, _tts_cfg, _logger
+    global _asr, _asr_sched, _llm, _tts_cfg, _logger
     
     _logger = setup_logger("server")
     _logger.info("🚀 Inițializez engine-urile pentru server...")
@@ -52,17 +55,32 @@ def _init_engines():
     cfg = load_all()
     
     # ASR - folosim direct engine-ul, nu factory-ul (care ar putea returna Remote)
-    from src.asr.engine_faster import ASREngine
-    _asr = ASREngine(
-        model_size=cfg["asr"].get("model_size", "small"),
-        compute_type=cfg["asr"].get("compute_type", "int8"),
-        device=cfg["asr"].get("device", "cpu"),
-        force_language=cfg["asr"].get("force_language"),
-        beam_size=int(cfg["asr"].get("beam_size", 1)),
-        vad_min_silence_ms=int(cfg["asr"].get("vad_min_silence_ms", 300)),
-        warmup_enabled=bool(cfg["asr"].get("warmup_enabled", True)),
-        logger=_logger,
-    )
+    workers = cfg["asr"].get("server_workers") or {}
+    batching = cfg["asr"].get("server_batching") or {}
+    if workers.get("enabled", False):
+        # N procese, fiecare cu modelul lui; audio-ul trece prin memorie partajată
+        from src.server.workers import ASRWorkerPool
+        _asr = ASRWorkerPool(
+            cfg["asr"],
+            processes=int(workers.get("processes", 2)),
+            threads_per_worker=int(workers.get("threads_per_worker", 0) or 0),
+            affinity=workers.get("affinity", "auto"),
+            max_batch=int(batching.get("max_batch", 8)),
+            logger=_logger,
+        )
+    else:
+        from src.asr import build_asr_engine
+        _asr = build_asr_engine(cfg["asr"], _logger)
+    if batching.get("enabled", False):
+        _asr_sched = ASRScheduler(
+            _asr,
+            window_ms=int(batching.get("window_ms", 20)),
+            max_batch=int(batching.get("max_batch", 8)),
+            max_queue=int(batching.get("max_queue", 32)),
+            timeout_s=float(batching.get("timeout_s", 30.0)),
+            max_inflight=getattr(_asr, "processes", 1),
+            logger=_logger,
+        )
     
     # LLM - folosim direct engine-ul
     from src.llm.engine import LLMLocal
@@ -78,6 +96,18 @@ def _init_engines():
 # ASR Endpoints
 # ─────────────────────────────────────────────────────────────
 
+def _run_asr(item: dict) -> dict:
+    """Prin scheduler (loturi) dacă e activ, altfel direct pe engine."""
+    # WAV-ul se decodează în thread-ul cererii, în paralel cu lotul curent
+    from src.asr.engine_faster import _as_array
+    item["audio"] = _as_array(io.BytesIO(item["audio"]))
+    if _asr_sched is not None:
+        return _asr_sched.submit(item)
+    if item.get("ro_en"):
+        return _asr.transcribe_ro_en(item["audio"], lang_prior=item.get("lang_prior"), voice_sec=item.get("voice_sec"))
+    return _asr.transcribe(item["audio"], language_override=item.get("language"))
+
+
 @app.route('/transcribe', methods=['POST'])
 def transcribe():
     """
@@ -97,25 +127,15 @@ def transcribe():
         
         language = request.args.get('language')
         
-        # Salvează audio în fișier temporar
-        fd, temp_path = tempfile.mkstemp(suffix=".wav", prefix="server_asr_")
-        os.close(fd)
+        # Decodăm direct din memorie, fără fișier temporar
+        result = _run_asr({"audio": audio_data, "language": language})
+        _logger.info(f"🧏 ASR: [{result.get('lang')}] {result.get('text', '')}")
         
-        try:
-            with open(temp_path, 'wb') as f:
-                f.write(audio_data)
-            
-            result = _asr.transcribe(temp_path, language_override=language)
-            _logger.info(f"🧏 ASR: [{result.get('lang')}] {result.get('text', '')}")
-            
-            return jsonify(result)
-            
-        finally:
-            try:
-                os.remove(temp_path)
-            except Exception:
-                pass
-                
+        return jsonify(result)
+        
+    except SchedulerBusy as e:
+        _logger.warning(f"ASR ocupat: {e}")
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         _logger.error(f"ASR error: {e}")
         return jsonify({"error": str(e)}), 500
@@ -125,10 +145,12 @@ def transcribe():
 def transcribe_ro_en():
     """
     Transcrie audio cu detecție automată RO/EN.
-    Rulează transcriere în ambele limbi și alege cea mai bună.
+    O singură decodare în limba detectată (+ prior); a doua doar la incertitudine.
     
     Request:
         Body: raw audio WAV bytes
+        Query params: prior (optional) - limba probabilă din context (ro/en)
+                      voice_sec (optional) - durata vocii, pentru alegerea nivelului de model
         
     Response:
         JSON: {"text": "...", "lang": "en/ro", "language_probability": 1.0}
@@ -138,25 +160,17 @@ def transcribe_ro_en():
         if not audio_data:
             return jsonify({"error": "No audio data received"}), 400
         
-        # Salvează audio în fișier temporar
-        fd, temp_path = tempfile.mkstemp(suffix=".wav", prefix="server_asr_")
-        os.close(fd)
+        # Decodăm direct din memorie, fără fișier temporar
+        prior = request.args.get('prior')
+        voice_sec = request.args.get('voice_sec', type=float)
+        result = _run_asr({"audio": audio_data, "ro_en": True, "lang_prior": prior, "voice_sec": voice_sec})
+        _logger.info(f"🧏 ASR (ro_en): [{result.get('lang')}] {result.get('text', '')}")
         
-        try:
-            with open(temp_path, 'wb') as f:
-                f.write(audio_data)
-            
-            result = _asr.transcribe_ro_en(temp_path)
-            _logger.info(f"🧏 ASR (ro_en): [{result.get('lang')}] {result.get('text', '')}")
-            
-            return jsonify(result)
-            
-        finally:
-            try:
-                os.remove(temp_path)
-            except Exception:
-                pass
-                
+        return jsonify(result)
+        
+    except SchedulerBusy as e:
+        _logger.warning(f"ASR ocupat: {e}")
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         _logger.error(f"ASR error: {e}")
         return jsonify({"error": str(e)}), 500
@@ -306,6 +320,7 @@ def health():
     return jsonify({
         "status": "ok",
         "asr": _asr is not None,
+        "asr_batching": _asr_sched is not None,
         "llm": _llm is not None,
     })
 
@@ -0,0 +1,124 @@
+# src/server/scheduler.py
+"""
+Scheduler ASR pentru server (mai mulți roboți pe un singur model).
+
+Handler-ele Flask nu mai apelează direct engine-ul: pun cererea într-o coadă
+mărginită și așteaptă rezultatul. Un singur thread dispecer strânge cererile
+sosite într-o fereastră scurtă (`window_ms`) și le trimite împreună prin
+`transcribe_batch` — un encoder + un `generate` pe lot, în loc de N decodări
+care se bat pe același model CTranslate2. Cu un pool de procese dedesubt,
+`max_inflight` loturi rulează în paralel (câte unul per proces).
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from src.telemetry.metrics import asr_queue_depth, asr_batch_size, asr_batch_wait
+
+
+class SchedulerBusy(RuntimeError):
+    """Coada e plină: serverul răspunde 503 și clientul poate reîncerca."""
+
+
+class ASRScheduler:
+    def __init__(
+        self,
+        engine,
+        window_ms: int = 20,
+        max_batch: int = 8,
+        max_queue: int = 32,
+        timeout_s: float = 30.0,
+        max_inflight: int = 1,
+        logger=None,
+    ):
+        self.engine = engine
+        self.window_s = max(0.0, int(window_ms) / 1000.0)
+        self.max_batch = max(1, int(max_batch))
+        self.timeout_s = float(timeout_s)
+        self.log = logger
+        self._slots = threading.Semaphore(max(1, int(max_inflight)))
+        self._runner = ThreadPoolExecutor(max_workers=max(1, int(max_inflight)), thread_name_prefix="asr-batch")
+        self._q: "queue.Queue[Tuple[Dict[str, Any], Future, float]]" = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._thread = threading.Thread(target=self._loop, name="asr-scheduler", daemon=True)
+        self._thread.start()
+        if self.log:
+            self.log.info(
+                f"📦 ASR scheduler: fereastră {int(window_ms)} ms, lot ≤{self.max_batch}, coadă ≤{self._q.maxsize}"
+            )
+
+    def submit(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Item ca la `ASREngine.transcribe_batch`: {"audio", "language", "ro_en",
+        "lang_prior", "voice_sec"}. Blochează până vine rezultatul.
+        """
+        fut: Future = Future()
+        try:
+            self._q.put_nowait((item, fut, time.perf_counter()))
+        except queue.Full:
+            raise SchedulerBusy("ASR queue full")
+        asr_queue_depth.observe(self._q.qsize())
+        return fut.result(timeout=self.timeout_s)
+
+    def _collect(self) -> List[Tuple[Dict[str, Any], Future, float]]:
+        batch = [self._q.get()]
+        deadline = time.perf_counter() + self.window_s
+        while len(batch) < self.max_batch:
+            left = deadline - time.perf_counter()
+            try:
+                batch.append(self._q.get(timeout=left) if left > 0 else self._q.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self) -> None:
+        while True:
+            # cât timp toate loturile sunt ocupate, cererile noi se strâng în coadă
+            self._slots.acquire()
+            batch = self._collect()
+            self._runner.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch: List[Tuple[Dict[str, Any], Future, float]]) -> None:
+        try:
+            self._process(batch)
+        finally:
+            self._slots.release()
+
+    def _process(self, batch: List[Tuple[Dict[str, Any], Future, float]]) -> None:
+        start = time.perf_counter()
+        for _, _, t0 in batch:
+            asr_batch_wait.observe(start - t0)
+        asr_batch_size.observe(len(batch))
+        items = [b[0] for b in batch]
+        try:
+            if hasattr(self.engine, "transcribe_batch"):
+                results = self.engine.transcribe_batch(items)
+            else:
+                results = [self._one(item) for item in items]
+        except Exception as exc:
+            # un lot eșuat: reîncercăm individual, ca o cerere stricată să nu le strice pe celelalte
+            if self.log:
+                self.log.warning(f"ASR scheduler: lot de {len(items)} eșuat ({exc}), reîncerc individual")
+            results = []
+            for item in items:
+                try:
+                    results.append(self._one(item))
+                except Exception as one_exc:
+                    results.append(one_exc)
+        for (_, fut, _), res in zip(batch, results):
+            if isinstance(res, Exception):
+                fut.set_exception(res)
+            else:
+                fut.set_result(res)
+        if self.log and len(batch) > 1:
+            self.log.debug(f"ASR scheduler: lot de {len(batch)} în {time.perf_counter() - start:.2f}s")
+
+    def _one(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        if item.get("ro_en"):
+            return self.engine.transcribe_ro_en(
+                item["audio"], lang_prior=item.get("lang_prior"), voice_sec=item.get("voice_sec")
+            )
+        return self.engine.transcribe(item["audio"], item.get("language"))
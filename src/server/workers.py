@@ -0,0 +1,190 @@
+# src/server/workers.py
+"""
+Pool de procese ASR pentru server.
+
+Un singur proces Python își împarte GIL-ul între handler-ele Flask, edge-tts și
+pre/post-procesarea ASR. Pool-ul pornește N procese worker (fork pe Linux, după
+ce faster-whisper e deja importat în părinte), fiecare cu engine-ul lui,
+`threads_per_worker` thread-uri CTranslate2 și, opțional, fixat pe un set de
+nuclee. Audio-ul ajunge la worker printr-un buffer de memorie partajată (câte
+unul per worker), iar pe pipe trec doar offset-urile și parametrii cererii.
+
+Pool-ul are aceeași interfață ca engine-ul (`transcribe`, `transcribe_ro_en`,
+`transcribe_batch`), deci se pune direct sub `ASRScheduler`.
+"""
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import queue
+import threading
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# ~30 s de audio float32 per cerere din lot (o fereastră Whisper)
+_SECONDS_PER_ITEM = 30
+_SR = 16000
+
+
+def _cpu_sets(affinity, processes: int) -> List[Optional[List[int]]]:
+    """`auto` = nucleele disponibile împărțite egal; listă de liste = explicit; altfel fără afinitate."""
+    if isinstance(affinity, list) and affinity:
+        return [list(affinity[i % len(affinity)]) for i in range(processes)]
+    if affinity == "auto" and hasattr(os, "sched_getaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+        per = max(1, len(cpus) // processes)
+        return [cpus[i * per:(i + 1) * per] or cpus for i in range(processes)]
+    return [None] * processes
+
+
+def _worker_main(idx: int, cfg_asr: Dict[str, Any], shm_name: str, conn, cpus: Optional[List[int]]) -> None:
+    """Bucla unui worker: încarcă engine-ul, apoi răspunde la cereri până la None."""
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    from src.asr import build_asr_engine
+    from src.core.logger import setup_logger
+
+    logger = setup_logger(f"asr-worker-{idx}")
+    engine = build_asr_engine(cfg_asr, logger)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    buf = np.ndarray((shm.size // 4,), dtype=np.float32, buffer=shm.buf)
+    conn.send("ready")
+    try:
+        while True:
+            msg = conn.recv()
+            if msg is None:
+                break
+            items = []
+            for item in msg:
+                item = dict(item)
+                if "audio" not in item:
+                    off, n = item.pop("span")
+                    item["audio"] = buf[off:off + n].copy()
+                items.append(item)
+            try:
+                conn.send(engine.transcribe_batch(items))
+            except Exception as exc:
+                conn.send(exc)
+    finally:
+        del buf
+        shm.close()
+
+
+class _Worker:
+    def __init__(self, idx: int, ctx, cfg_asr: Dict[str, Any], slot_items: int, cpus: Optional[List[int]]):
+        self.idx = idx
+        self.ctx = ctx
+        self.cfg_asr = cfg_asr
+        self.cpus = cpus
+        self.shm = shared_memory.SharedMemory(create=True, size=slot_items * _SECONDS_PER_ITEM * _SR * 4)
+        self.buf = np.ndarray((self.shm.size // 4,), dtype=np.float32, buffer=self.shm.buf)
+        self.start()
+
+    def start(self) -> None:
+        self.conn, child = self.ctx.Pipe()
+        self.proc = self.ctx.Process(
+            target=_worker_main,
+            args=(self.idx, self.cfg_asr, self.shm.name, child, self.cpus),
+            name=f"asr-worker-{self.idx}",
+            daemon=True,
+        )
+        self.proc.start()
+        child.close()
+
+    def wait_ready(self) -> None:
+        if self.conn.recv() != "ready":
+            raise RuntimeError(f"ASR worker {self.idx} n-a pornit")
+
+    def run(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        msg, off = [], 0
+        for item in items:
+            item = dict(item)
+            audio = np.ascontiguousarray(item.pop("audio"), dtype=np.float32)
+            n = audio.shape[0]
+            if off + n <= self.buf.shape[0]:
+                self.buf[off:off + n] = audio
+                item["span"] = (off, n)
+                off += n
+            else:
+                # nu mai încape în slot: pleacă pe pipe (rar — clipuri foarte lungi)
+                item["audio"] = audio
+            msg.append(item)
+        self.conn.send(msg)
+        res = self.conn.recv()
+        if isinstance(res, Exception):
+            raise res
+        return res
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.proc.join(timeout=5.0)
+        if self.proc.is_alive():
+            self.proc.kill()
+        del self.buf
+        self.shm.close()
+        self.shm.unlink()
+
+
+class ASRWorkerPool:
+    def __init__(
+        self,
+        cfg_asr: Dict[str, Any],
+        processes: int = 2,
+        threads_per_worker: int = 0,
+        affinity="auto",
+        max_batch: int = 8,
+        logger=None,
+    ):
+        self.log = logger
+        self.processes = max(1, int(processes))
+        threads = int(threads_per_worker or 0) or max(1, (os.cpu_count() or 4) // self.processes)
+        # fiecare proces e deja un „worker”: un singur worker CTranslate2 înăuntru, cu thread-urile lui
+        cfg = dict(cfg_asr, cpu_threads=threads, num_workers=1)
+
+        # faster-whisper/CTranslate2 se importă în părinte, ca fork-ul să pornească cu modulele deja încărcate
+        import faster_whisper  # noqa: F401
+        ctx = mp.get_context("fork" if "fork" in mp.get_all_start_methods() else "spawn")
+        cpus = _cpu_sets(affinity, self.processes)
+        self._workers = [_Worker(i, ctx, cfg, max(1, int(max_batch)), cpus[i]) for i in range(self.processes)]
+        for w in self._workers:
+            w.wait_ready()
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        for w in self._workers:
+            self._idle.put(w)
+        self._restart_lock = threading.Lock()
+        if self.log:
+            self.log.info(
+                f"🧵 ASR worker pool: {self.processes} procese × {threads} thread-uri ({ctx.get_start_method()}), "
+                f"afinitate: {[c if c else '-' for c in cpus]}"
+            )
+
+    def transcribe_batch(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        w = self._idle.get()
+        try:
+            return w.run(items)
+        except (EOFError, BrokenPipeError, ConnectionResetError) as exc:
+            # worker-ul a murit (ex: OOM): îl repornim, cererea curentă eșuează
+            if self.log:
+                self.log.error(f"ASR worker {w.idx} căzut ({exc!r}) — repornesc")
+            with self._restart_lock:
+                w.proc.join(timeout=1.0)
+                w.start()
+                w.wait_ready()
+            raise RuntimeError(f"ASR worker {w.idx} restarted") from exc
+        finally:
+            self._idle.put(w)
+
+    def transcribe(self, audio, language_override: Optional[str] = None, voice_sec: Optional[float] = None) -> Dict[str, Any]:
+        return self.transcribe_batch([{"audio": audio, "language": language_override, "voice_sec": voice_sec}])[0]
+
+    def transcribe_ro_en(self, audio, lang_prior: Optional[str] = None, voice_sec: Optional[float] = None) -> Dict[str, Any]:
+        return self.transcribe_batch([{"audio": audio, "ro_en": True, "lang_prior": lang_prior, "voice_sec": voice_sec}])[0]
+
+    def close(self) -> None:
+        for w in self._workers:
+            w.stop()
@@ -1,4 +1,4 @@
-from prometheus_client import Counter, Histogram, make_wsgi_app
+from prometheus_client import Counter, Gauge, Histogram, make_wsgi_app
 from wsgiref.simple_server import make_server, WSGIServer
 from socketserver import ThreadingMixIn
 from contextlib import contextmanager
@@ -10,6 +10,15 @@ llm_latency = Histogram("llm_latency_seconds", "LLM request latency until comple
 llm_first_token_latency = Histogram("llm_first_token_latency_seconds", "Latency from LLM request to first token (seconds)")
 tts_latency = Histogram("tts_latency_seconds", "TTS blocking speak latency (seconds)")
 round_trip = Histogram("round_trip_seconds", "Latency from end of user recording to issuing TTS (seconds)")
+asr_tier_short_latency = Histogram("asr_tier_short_latency_seconds", "ASR latency on the short-utterance (small model) tier (seconds)")
+asr_tier_main_latency = Histogram("asr_tier_main_latency_seconds", "ASR latency on the main model tier (seconds)")
+asr_batch_wait = Histogram("asr_batch_wait_seconds", "Time an ASR request waited in the server queue before its batch started (seconds)")
+asr_batch_size = Histogram("asr_batch_size", "Requests per ASR server batch", buckets=(1, 2, 3, 4, 6, 8, 12, 16))
+asr_queue_depth = Histogram("asr_queue_depth", "ASR server queue depth seen by each new request", buckets=(0, 1, 2, 4, 8, 16, 32, 64))
+asr_greedy_decode = Histogram("asr_greedy_decode_seconds", "Greedy (beam 1) first-pass decode time with adaptive beam (seconds)")
+asr_beam_redecode = Histogram("asr_beam_redecode_seconds", "Beam re-decode time after an unsure greedy pass (seconds)")
+tts_sentence_gap = Histogram("tts_sentence_gap_seconds", "Silence at a TTS sentence boundary while the next sentence was still synthesizing (underrun, seconds)", buckets=(0, 0.01, 0.025, 0.05, 0.1, 0.2, 0.4, 0.8, 1.6, 3.2))
+endpoint_delay = Histogram("endpoint_delay_seconds", "Silence waited before ending a user turn (adaptive endpoint, seconds)")
 
 wake_triggers = Counter("wake_triggers_total", "Wake phrases successfully detected")
 sessions_started = Counter("sessions_started_total", "Conversation sessions started")
@@ -18,6 +27,19 @@ interactions = Counter("interactions_total", "Turns inside active sessions")
 unknown_answer = Counter("unknown_answer_total", "LLM replied unknown/uncertain")
 errors_total = Counter("errors_total", "Unhandled errors")
 tts_speak_calls = Counter("tts_speak_calls_total", "Number of TTS speak calls")
+asr_lang_routed = Counter("asr_lang_routed_total", "RO/EN utterances routed by encoder language detection")
+asr_lang_fallbacks = Counter("asr_lang_fallback_total", "RO/EN routings below the confidence margin (second-language decode)")
+asr_tier_short_total = Counter("asr_tier_short_total", "Utterances sent to the short-utterance ASR tier")
+asr_tier_escalations = Counter("asr_tier_escalations_total", "Short-tier ASR results escalated to the main model (low avg_logprob)")
+asr_greedy_accepted = Counter("asr_greedy_accepted_total", "Greedy ASR results kept without a beam re-decode")
+asr_beam_redecodes = Counter("asr_beam_redecodes_total", "ASR re-decodes with the configured beam (greedy was unsure)")
+tts_cache_hits = Counter("tts_cache_hits_total", "Sentence audio cache hits (PCM played from cache)")
+tts_cache_misses = Counter("tts_cache_misses_total", "Sentence audio cache misses (synthesized)")
+tts_cache_bytes = Gauge("tts_cache_bytes", "Decoded PCM bytes held in the sentence audio cache (RAM tier)")
+llm_spec_started = Counter("llm_spec_started_total", "Speculative LLM streams started on a stable partial transcript")
+llm_spec_hits = Counter("llm_spec_hits_total", "Speculative LLM streams committed (final transcript matched)")
+llm_spec_misses = Counter("llm_spec_misses_total", "Speculative LLM streams cancelled (final transcript differed)")
+endpoint_truncations = Counter("endpoint_truncations_total", "Adaptive endpoints where speech resumed within the silence the fixed endpoint would still have waited")
 
 # ---- HELPERS ----
 def _hist_sum_count(hist: Histogram):
@@ -40,7 +62,7 @@ def _counter_val(cnt: Counter):
         for sample in metric.samples:
             if sample.labels:
                 continue
-            if sample.name.endswith("_total"):
+            if sample.name.endswith("_total") or metric.type == "gauge":
                 val = float(sample.value)
     return val
 
@@ -53,10 +75,17 @@ def _fmt_ms(avg_s, count):
 def gather_metrics_snapshot():
     histograms = [
         ("Round-trip", round_trip),
+        ("Endpoint delay", endpoint_delay),
         ("ASR latency", asr_latency),
+        ("ASR short tier", asr_tier_short_latency),
+        ("ASR main tier", asr_tier_main_latency),
+        ("ASR queue wait", asr_batch_wait),
+        ("ASR greedy pass", asr_greedy_decode),
+        ("ASR beam re-decode", asr_beam_redecode),
         ("LLM first token", llm_first_token_latency),
         ("LLM total", llm_latency),
         ("TTS latency", tts_latency),
+        ("TTS sentence gap", tts_sentence_gap),
     ]
     counters = [
         ("Wake triggers", wake_triggers),
@@ -64,6 +93,18 @@ def gather_metrics_snapshot():
         ("Sessions ended", sessions_ended),
         ("Turns", interactions),
         ("TTS speak calls", tts_speak_calls),
+        ("TTS cache hits", tts_cache_hits),
+        ("TTS cache misses", tts_cache_misses),
+        ("TTS cache bytes", tts_cache_bytes),
+        ("ASR RO/EN routed", asr_lang_routed),
+        ("ASR RO/EN fallback decodes", asr_lang_fallbacks),
+        ("ASR short-tier utterances", asr_tier_short_total),
+        ("ASR tier escalations", asr_tier_escalations),
+        ("ASR greedy kept", asr_greedy_accepted),
+        ("ASR beam re-decodes", asr_beam_redecodes),
+        ("Endpoint truncations", endpoint_truncations),
+        ("LLM speculation hits", llm_spec_hits),
+        ("LLM speculation misses", llm_spec_misses),
         ("\"Unknown\" replies", unknown_answer),
         ("Errors", errors_total),
     ]
@@ -90,10 +131,17 @@ def log_metrics_snapshot(logger):
 def _render_vitals_html():
     hs = [
         ("Round-trip", round_trip),
+        ("Endpoint delay", endpoint_delay),
         ("ASR latency", asr_latency),
+        ("ASR short tier", asr_tier_short_latency),
+        ("ASR main tier", asr_tier_main_latency),
+        ("ASR queue wait", asr_batch_wait),
+        ("ASR greedy pass", asr_greedy_decode),
+        ("ASR beam re-decode", asr_beam_redecode),
         ("LLM first token", llm_first_token_latency),
         ("LLM total", llm_latency),
         ("TTS latency", tts_latency),
+        ("TTS sentence gap", tts_sentence_gap),
     ]
     cs = [
         ("Wake triggers", wake_triggers),
@@ -101,6 +149,18 @@ def _render_vitals_html():
         ("Sessions ended", sessions_ended),
         ("Turns (interactions)", interactions),
         ("TTS speak calls", tts_speak_calls),
+        ("TTS cache hits", tts_cache_hits),
+        ("TTS cache misses", tts_cache_misses),
+        ("TTS cache bytes", tts_cache_bytes),
+        ("ASR RO/EN routed", asr_lang_routed),
+        ("ASR RO/EN fallback decodes", asr_lang_fallbacks),
+        ("ASR short-tier utterances", asr_tier_short_total),
+        ("ASR tier escalations", asr_tier_escalations),
+        ("ASR greedy kept", asr_greedy_accepted),
+        ("ASR beam re-decodes", asr_beam_redecodes),
+        ("Endpoint truncations", endpoint_truncations),
+        ("LLM speculation hits", llm_spec_hits),
+        ("LLM speculation misses", llm_spec_misses),
         ("\"Unknown\" replies", unknown_answer),
         ("Errors", errors_total),
     ]
@@ -32,7 +32,7 @@ def make_tts(cfg_tts: dict, logger=None) -> TTSInterface:
         timeout = float(cfg_tts.get("remote_timeout", 30.0))
         logger.info(f"🌐 TTS mode=remote, server={host}:{port}")
         
-        tts_client = RemoteTTS(host=host, port=port, timeout=timeout, logger=logger)
+        tts_client = RemoteTTS(host=host, port=port, timeout=timeout, logger=logger, cfg=cfg_tts)
         
         # Health check la startup
         try:
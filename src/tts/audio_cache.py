@@ -0,0 +1,229 @@
+# src/tts/audio_cache.py
+"""
+Cache LRU de audio sintetizat, la nivel de propoziție, în fața tuturor backend-urilor.
+
+Robotul repetă des aceleași propoziții (confirmări, fallback-uri din llm.yaml,
+FastExit). Cheia e textul normalizat + vocea + parametrii ei; valoarea e PCM-ul
+deja decodat (float32 mono), deci un hit pornește redarea direct din RAM, fără
+rețea, subproces sau decodare MP3. Memoria e mărginită în bytes; intrările
+scoase din RAM coboară într-un nivel pe disc (`.npy`), la rândul lui mărginit.
+Scrierile pe disc se fac pe un thread separat, nu pe cel care sintetizează/redă.
+"""
+from __future__ import annotations
+
+import glob
+import hashlib
+import os
+import queue
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from src.telemetry.metrics import tts_cache_hits, tts_cache_misses, tts_cache_bytes
+
+Pcm = Tuple[np.ndarray, int]
+
+
+def _norm(text: str) -> str:
+    # punctuația rămâne (schimbă intonația), doar spațiile și formele Unicode se unifică
+    return " ".join(unicodedata.normalize("NFKC", text or "").split())
+
+
+def read_pcm(path: str) -> Pcm:
+    """WAV/MP3 -> (float32 mono, sample rate)."""
+    data, sr = sf.read(path, dtype="float32", always_2d=False)
+    if data.ndim > 1:
+        data = data.mean(axis=1)
+    return np.ascontiguousarray(data, dtype=np.float32), int(sr)
+
+
+def play_pcm(pcm: np.ndarray, sr: int, stop: threading.Event) -> None:
+    """Redă PCM din memorie; se oprește la `stop`."""
+    import sounddevice as sd
+    sd.play(pcm, sr)
+    stream = sd.get_stream()
+    while stream.active:
+        if stop.is_set():
+            sd.stop()
+            return
+        time.sleep(0.01)
+
+
+class SentenceAudioCache:
+    def __init__(
+        self,
+        max_bytes: int = 64 << 20,
+        spill_dir: Optional[str] = None,
+        spill_max_bytes: int = 512 << 20,
+        logger=None,
+    ):
+        self.max_bytes = int(max_bytes)
+        self.spill_dir = os.path.abspath(spill_dir) if spill_dir else None
+        self.spill_max_bytes = int(spill_max_bytes)
+        self.log = logger
+        self._lru: "OrderedDict[str, Pcm]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # nivelul pe disc: cheie -> (cale, bytes), de la cel mai vechi folosit; totalul e ținut la zi
+        self._disk: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        self._disk_bytes = 0
+        self._disk_lock = threading.Lock()
+        self._spill_q: "queue.Queue[Tuple[str, np.ndarray, int]]" = queue.Queue()
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            self._scan_disk()
+            threading.Thread(target=self._spill_loop, name="tts-cache-spill", daemon=True).start()
+
+    @staticmethod
+    def key(text: str, voice: str, params: str) -> str:
+        raw = "\0".join((_norm(text), voice or "", params or ""))
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:24]
+
+    # ——— RAM ———
+    def get(self, key: str) -> Optional[Pcm]:
+        with self._lock:
+            hit = self._lru.get(key)
+            if hit is not None:
+                self._lru.move_to_end(key)
+        if hit is None:
+            hit = self._from_disk(key)
+            if hit is not None:
+                self.put(key, *hit)
+        if hit is None:
+            tts_cache_misses.inc()
+        else:
+            tts_cache_hits.inc()
+        return hit
+
+    def put(self, key: str, pcm: np.ndarray, sr: int) -> None:
+        if pcm.nbytes > self.max_bytes:
+            return
+        evicted = []
+        with self._lock:
+            old = self._lru.pop(key, None)
+            if old is not None:
+                self._bytes -= old[0].nbytes
+            self._lru[key] = (pcm, int(sr))
+            self._bytes += pcm.nbytes
+            while self._bytes > self.max_bytes and len(self._lru) > 1:
+                k, (p, s) = self._lru.popitem(last=False)
+                self._bytes -= p.nbytes
+                evicted.append((k, p, s))
+            tts_cache_bytes.set(self._bytes)
+        if self.spill_dir:
+            # doar ce iese din RAM coboară pe disc (scrierea nu blochează apelantul)
+            for item in evicted:
+                self._spill_q.put(item)
+
+    def put_file(self, key: str, path: str) -> Optional[Pcm]:
+        """Decodează un fișier sintetizat și îl pune în cache (erorile nu opresc redarea)."""
+        try:
+            pcm, sr = read_pcm(path)
+        except Exception as e:
+            if self.log:
+                self.log.debug(f"TTS audio cache: nu pot decoda {path} ({e})")
+            return None
+        self.put(key, pcm, sr)
+        return pcm, sr
+
+    # ——— nivelul pe disc ———
+    def _spill_path(self, key: str, sr: int) -> str:
+        return os.path.join(self.spill_dir, f"{key}_{sr}.npy")
+
+    def _scan_disk(self) -> None:
+        """Indexul nivelului pe disc, o singură dată la pornire (fișierele `.part` rămase sunt șterse)."""
+        for p in glob.glob(os.path.join(self.spill_dir, "*.part")):
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+        files = []
+        for p in glob.glob(os.path.join(self.spill_dir, "*_*.npy")):
+            try:
+                files.append((os.path.getmtime(p), os.path.getsize(p), p))
+            except OSError:
+                pass
+        for _, size, p in sorted(files):
+            key = os.path.basename(p).rsplit("_", 1)[0]
+            self._disk[key] = (p, size)
+            self._disk_bytes += size
+        self._trim_disk()
+
+    def _from_disk(self, key: str) -> Optional[Pcm]:
+        if not self.spill_dir:
+            return None
+        with self._disk_lock:
+            entry = self._disk.get(key)
+            if entry is None:
+                return None
+            self._disk.move_to_end(key)
+        path = entry[0]
+        try:
+            sr = int(os.path.splitext(path)[0].rsplit("_", 1)[1])
+            os.utime(path)
+            return np.load(path), sr
+        except Exception:
+            return None
+
+    def _spill_loop(self) -> None:
+        while True:
+            self._to_disk(*self._spill_q.get())
+
+    def _to_disk(self, key: str, pcm: np.ndarray, sr: int) -> None:
+        with self._disk_lock:
+            if key in self._disk:
+                self._disk.move_to_end(key)
+                return
+        path = self._spill_path(key, sr)
+        tmp = path + ".part"          # nu se potrivește cu `*_*.npy` cât timp e incomplet
+        try:
+            with open(tmp, "wb") as f:
+                np.save(f, pcm)
+            os.replace(tmp, path)
+            size = os.path.getsize(path)
+        except Exception as e:
+            if self.log:
+                self.log.debug(f"TTS audio cache: spill eșuat ({e})")
+            return
+        with self._disk_lock:
+            self._disk[key] = (path, size)
+            self._disk_bytes += size
+        self._trim_disk()
+
+    def _trim_disk(self) -> None:
+        """Șterge cele mai vechi fișiere până sub `spill_max_bytes` (fără listarea directorului)."""
+        with self._disk_lock:
+            drop = []
+            while self._disk_bytes > self.spill_max_bytes and self._disk:
+                _, (p, size) = self._disk.popitem(last=False)
+                self._disk_bytes -= size
+                drop.append(p)
+        for p in drop:
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+
+
+_cache: Optional[SentenceAudioCache] = None
+
+
+def get_sentence_cache(cfg: Optional[Dict] = None, logger=None) -> Optional[SentenceAudioCache]:
+    """Singleton pe proces (EdgeTTS și Piper îl împart); None dacă e dezactivat."""
+    global _cache
+    if _cache is None:
+        sc = (cfg or {}).get("sentence_cache") or {}
+        if not sc.get("enabled", True):
+            return None
+        _cache = SentenceAudioCache(
+            max_bytes=int(float(sc.get("max_mb", 64)) * (1 << 20)),
+            spill_dir=sc.get("spill_dir") or None,
+            spill_max_bytes=int(float(sc.get("spill_max_mb", 512)) * (1 << 20)),
+            logger=logger,
+        )
+    return _cache
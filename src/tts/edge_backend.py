@@ -2,6 +2,11 @@
 """
 Edge TTS backend - Microsoft Neural Voices gratuit.
 Latență mai mică decât Piper, voci foarte naturale.
+
+Modul streaming (implicit): un singur event loop asyncio pe un thread de fundal
+pentru tot procesul, iar bucățile MP3 din `Communicate.stream()` sunt decodate
+incremental (PyAV) și scrise direct în ieșirea audio persistentă — primul sunet
+al unei propoziții vine după primul chunk, nu după tot MP3-ul + pornirea ffplay.
 """
 from __future__ import annotations
 from typing import Dict, Optional, Iterable, Callable
@@ -14,11 +19,77 @@ import time
 import queue
 
 import edge_tts
+import numpy as np
 import soundfile as sf
 import sounddevice as sd
 
+from src.audio.playback import get_player
+from src.telemetry.metrics import tts_sentence_gap
+from .audio_cache import get_sentence_cache, play_pcm, read_pcm
+from .phrase_cache import PhraseCache
+from .pipeline import SynthPipeline
+
 _SENT_SPLIT = re.compile(r'([.!?…:;]+)\s+')
 
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _edge_loop() -> asyncio.AbstractEventLoop:
+    """Event loop-ul partajat (pornit o singură dată, pe un thread daemon)."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="edge-tts-loop", daemon=True).start()
+        return _loop
+
+
+def _run(coro):
+    """Rulează o corutină pe loop-ul partajat și așteaptă rezultatul."""
+    return asyncio.run_coroutine_threadsafe(coro, _edge_loop()).result()
+
+
+class _Mp3Decoder:
+    """Decodare MP3 incrementală: bytes în, float32 mono afară."""
+
+    def __init__(self):
+        import av  # vine cu faster-whisper
+        self._av = av
+        self._ctx = av.CodecContext.create("mp3", "r")
+        self.sample_rate: Optional[int] = None
+
+    def _frames(self, packets) -> list:
+        out = []
+        for pk in packets:
+            try:
+                frames = self._ctx.decode(pk)
+            except self._av.error.InvalidDataError:
+                continue  # antetul ID3/Xing de la începutul stream-ului
+            for fr in frames:
+                self.sample_rate = fr.sample_rate
+                x = fr.to_ndarray()
+                if x.dtype == np.int16:
+                    x = x.astype(np.float32) / 32768.0
+                if fr.format.is_planar:
+                    x = x.mean(axis=0)
+                else:
+                    x = x.reshape(-1, len(fr.layout.channels)).mean(axis=1)
+                out.append(x.astype(np.float32, copy=False))
+        return out
+
+    def feed(self, data: bytes) -> Optional[np.ndarray]:
+        parts = self._frames(self._ctx.parse(data))
+        return np.concatenate(parts) if parts else None
+
+    def flush(self) -> Optional[np.ndarray]:
+        parts = self._frames(self._ctx.parse(None))
+        try:
+            parts += self._frames([None])
+        except Exception:
+            pass
+        return np.concatenate(parts) if parts else None
+
 
 class EdgeTTS:
     """
@@ -38,20 +109,42 @@ class EdgeTTS:
         self.rate = cfg.get("edge_rate", "+0%")
         self.pitch = cfg.get("edge_pitch", "+0Hz")
         
+        # Câte propoziții se sintetizează simultan în say_async_stream
+        self.synth_window = int(cfg.get("synth_window", 2))
+        
         # Control
         self._speaking = False
         self._stop_flag = threading.Event()
         self._playback_stream: Optional[sd.OutputStream] = None
         self._coord_thread: Optional[threading.Thread] = None
         
-        # Cache pentru fraze comune
-        self._cache_dir = tempfile.mkdtemp(prefix="edge_cache_")
-        self._cache: Dict[str, str] = {}
+        # Cache persistent pentru frazele comune (încălzit în fundal)
+        self._phrase_cache = PhraseCache(cfg, "edge", logger)
+        self._phrase_cache.warm(self._voice_params, self._synth_blocking)
+        # Cache LRU de PCM pe propoziții (comun tuturor backend-urilor)
+        self._audio_cache = get_sentence_cache(cfg, logger)
+        
+        # Ieșirea audio persistentă (comună backend-urilor); ffplay rămâne doar fallback
+        self._player = None
+        try:
+            self._player = get_player(cfg.get("playback"), logger)
+        except Exception as e:
+            self.log.warning(f"Edge TTS: ieșire audio persistentă indisponibilă ({e}) — fallback la ffplay")
+        self.sentence_silence_ms = float((cfg.get("playback") or {}).get("sentence_silence_ms", 0))
         
-        # Pre-cache frazele comune
-        self._precache()
+        # Streaming: chunk-uri MP3 decodate în proces, scrise direct în ieșirea persistentă
+        self._streaming = False
+        if self._player is not None and (cfg.get("edge_streaming") or {}).get("enabled", True):
+            try:
+                _Mp3Decoder()
+                self._streaming = True
+            except Exception as e:
+                self.log.warning(f"Edge TTS streaming indisponibil ({e}) — sinteză pe fișier")
         
-        self.log.info(f"Edge TTS: EN={self.voice_en}, RO={self.voice_ro}")
+        self.log.info(
+            f"Edge TTS: EN={self.voice_en}, RO={self.voice_ro}"
+            f"{' (streaming)' if self._streaming else ''}"
+        )
     
     def _pick_voice(self, lang: str) -> str:
         """Alege vocea în funcție de limbă."""
@@ -59,53 +152,36 @@ class EdgeTTS:
             return self.voice_ro
         return self.voice_en
     
-    def _precache(self):
-        """Pre-generează WAV-uri pentru frazele comune."""
-        phrases = self.cfg.get("cache_phrases", {})
-        if not phrases:
-            return
-        
-        async def gen_all():
-            for key, data in phrases.items():
-                text = data.get("text", "")
-                lang = data.get("lang", "en")
-                if not text:
-                    continue
-                try:
-                    voice = self._pick_voice(lang)
-                    out_path = os.path.join(self._cache_dir, f"{key}.mp3")
-                    communicate = edge_tts.Communicate(text, voice, rate=self.rate, pitch=self.pitch)
-                    await communicate.save(out_path)
-                    self._cache[key] = out_path
-                except Exception as e:
-                    if self.log:
-                        self.log.warning(f"Edge TTS cache '{key}' failed: {e}")
-        
-        try:
-            asyncio.run(gen_all())
-            self.log.info(f"📦 Edge TTS cache: {len(self._cache)} fraze")
-        except Exception as e:
-            self.log.warning(f"Edge TTS precache error: {e}")
+    def _voice_params(self, lang: str):
+        """(voce, parametri) care identifică audio-ul sintetizat, pentru cache."""
+        return self._pick_voice(lang), f"{self.rate}|{self.pitch}"
     
     def is_speaking(self) -> bool:
         return self._speaking
     
     def say_cached(self, key: str, lang: str = "en") -> bool:
-        """Redă din cache dacă există."""
-        path = self._cache.get(key)
-        if path and os.path.exists(path):
-            self.log.info(f"🔊 Edge TTS cache play: {key}")
-            self._play_audio_file(path)
-            return True
-        return False
+        """Redă o frază comună (earcon) din RAM, dacă există."""
+        pcm = self._phrase_cache.pcm(key)
+        if pcm is None:
+            return False
+        self.log.info(f"🔊 Edge TTS cache play: {key}")
+        self._play_item(pcm)
+        return True
     
     def _play_audio_file(self, path: str):
-        """Redă un fișier audio (MP3/WAV) folosind ffplay pentru a evita conflicte cu Vosk."""
+        """Redă un fișier audio (MP3/WAV): prin ieșirea persistentă, altfel cu ffplay."""
         import subprocess
         
         if self._stop_flag.is_set():
             return
         
+        if self._player is not None:
+            try:
+                self._play_item(read_pcm(path))
+                return
+            except Exception as e:
+                self.log.error(f"Edge TTS decode error: {e}")
+        
         try:
             # Folosim ffplay care e independent de sounddevice
             # -nodisp = fără fereastră video
@@ -148,11 +224,109 @@ class EdgeTTS:
         await communicate.save(out_path)
         return out_path
     
+    def _synth_item(self, text: str, lang: str):
+        """PCM din cache-ul de propoziții (hit) sau calea MP3-ului sintetizat acum (miss)."""
+        key = None
+        if self._audio_cache is not None:
+            key = self._audio_cache.key(text, *self._voice_params(lang))
+            hit = self._audio_cache.get(key)
+            if hit is not None:
+                return hit
+        path = _run(self._synth_async(text, self._pick_voice(lang)))
+        if key is not None:
+            self._audio_cache.put_file(key, path)
+        return path
+    
+    async def _stream_async(self, text: str, voice: str, on_pcm: Callable[[np.ndarray, int], None]):
+        """
+        Consumă `Communicate.stream()` și dă mai departe PCM-ul pe măsură ce vin
+        chunk-urile. Întoarce (bucăți, sr) pentru cache, sau None dacă s-a oprit.
+        """
+        dec = _Mp3Decoder()
+        parts = []
+        stream = edge_tts.Communicate(text, voice, rate=self.rate, pitch=self.pitch).stream()
+        try:
+            async for chunk in stream:
+                if self._stop_flag.is_set():
+                    return None
+                if chunk.get("type") != "audio" or not chunk.get("data"):
+                    continue
+                pcm = dec.feed(chunk["data"])
+                if pcm is not None and pcm.shape[0]:
+                    parts.append(pcm)
+                    on_pcm(pcm, dec.sample_rate)
+        finally:
+            await stream.aclose()
+        tail = dec.flush()
+        if tail is not None and tail.shape[0] and not self._stop_flag.is_set():
+            parts.append(tail)
+            on_pcm(tail, dec.sample_rate)
+        return (parts, dec.sample_rate) if dec.sample_rate else None
+    
+    def _stream_sentence(self, text: str, lang: str, sink: Callable[[np.ndarray, int], None]) -> None:
+        """O propoziție ca PCM trimis în `sink` pe măsură ce vine: din cache, altfel în streaming."""
+        key = None
+        if self._audio_cache is not None:
+            key = self._audio_cache.key(text, *self._voice_params(lang))
+            hit = self._audio_cache.get(key)
+            if hit is not None:
+                sink(*hit)
+                return
+        
+        def on_pcm(pcm: np.ndarray, sr: int) -> None:
+            if not self._stop_flag.is_set():
+                sink(pcm, sr)
+        
+        res = _run(self._stream_async(text, self._pick_voice(lang), on_pcm))
+        if res is None or self._stop_flag.is_set():
+            return
+        parts, sr = res
+        if key is not None and parts:
+            self._audio_cache.put(key, np.concatenate(parts), sr)
+    
+    def _stream_into(self, text: str, lang: str, chunks: queue.Queue) -> None:
+        """Job din fereastra de sinteză: PCM-ul propoziției în coada ei, apoi None."""
+        try:
+            self._stream_sentence(text, lang, lambda pcm, sr: chunks.put((pcm, sr)))
+        finally:
+            chunks.put(None)
+    
+    def _as_pcm(self, item):
+        """Rezultatul lui `_synth_item` ca PCM (fișierul temporar se decodează și se șterge)."""
+        if isinstance(item, tuple):
+            return item
+        try:
+            return read_pcm(item)
+        finally:
+            try:
+                os.remove(item)
+            except Exception:
+                pass
+    
+    def _play_item(self, item, on_start: Optional[Callable[[], None]] = None):
+        """Redă blocking un element (PCM sau fișier); `on_start` când începe efectiv sunetul."""
+        if self._player is not None:
+            if self._stop_flag.is_set():
+                return
+            self._player.write(*self._as_pcm(item), on_start=on_start)
+            self._player.drain(self._stop_flag)
+            return
+        if on_start:
+            on_start()
+        if isinstance(item, tuple):
+            play_pcm(*item, self._stop_flag)
+            return
+        self._play_audio_file(item)
+        try:
+            os.remove(item)
+        except Exception:
+            pass
+    
     def _synth_blocking(self, text: str, lang: str) -> Optional[str]:
         """Sinteză blocking."""
         voice = self._pick_voice(lang)
         try:
-            return asyncio.run(self._synth_async(text, voice))
+            return _run(self._synth_async(text, voice))
         except Exception as e:
             self.log.error(f"Edge TTS synth error: {e}")
             return None
@@ -164,13 +338,19 @@ class EdgeTTS:
         
         self._speaking = True
         try:
-            path = self._synth_blocking(text, lang)
-            if path:
-                self._play_audio_file(path)
+            if self._streaming:
                 try:
-                    os.remove(path)
-                except Exception:
-                    pass
+                    self._stream_sentence(text.strip(), lang, self._player.write)
+                except Exception as e:
+                    self.log.error(f"Edge TTS stream error: {e}")
+                self._player.drain(self._stop_flag)
+                return
+            try:
+                item = self._synth_item(text, lang)
+            except Exception as e:
+                self.log.error(f"Edge TTS synth error: {e}")
+                return
+            self._play_item(item)
         finally:
             self._speaking = False
     
@@ -189,81 +369,123 @@ class EdgeTTS:
         self._stop_flag.clear()
         self._speaking = True
         
-        synth_queue: queue.Queue = queue.Queue(maxsize=3)
-        voice = self._pick_voice(lang)
+        # până la `synth_window` propoziții se sintetizează simultan, redate în ordine
+        pipe = SynthPipeline(self.synth_window, self._stop_flag, name="edge-synth")
+        
+        def submit(sentence: str):
+            if self._streaming:
+                chunks: queue.Queue = queue.Queue()
+                pipe.submit(self._stream_into, sentence, lang, chunks, tag=chunks)
+            else:
+                pipe.submit(self._synth_item, sentence, lang)
         
         def producer():
-            """Acumulează tokens în propoziții și le sintetizează."""
+            """Acumulează tokens în propoziții și le trimite la sinteză."""
             buffer = ""
-            for tok in token_iter:
-                if self._stop_flag.is_set():
-                    break
-                buffer += tok
-                
-                # Verifică dacă avem propoziții complete
-                parts = _SENT_SPLIT.split(buffer)
-                while len(parts) >= 3:
-                    sentence = parts[0] + parts[1]
-                    parts = parts[2:]
+            try:
+                for tok in token_iter:
+                    if self._stop_flag.is_set():
+                        break
+                    buffer += tok
                     
-                    if len(sentence.strip()) >= min_chunk_chars:
-                        if self.log:
-                            self.log.info(f"🧠 LLM→TTS chunk [{len(sentence)}c]: {sentence[:60]}...")
-                        try:
-                            path = asyncio.run(self._synth_async(sentence.strip(), voice))
-                            synth_queue.put(path)
-                        except Exception as e:
-                            self.log.error(f"Edge synth error: {e}")
+                    # Verifică dacă avem propoziții complete
+                    parts = _SENT_SPLIT.split(buffer)
+                    while len(parts) >= 3:
+                        sentence = parts[0] + parts[1]
+                        parts = parts[2:]
+                        
+                        if len(sentence.strip()) >= min_chunk_chars:
+                            if self.log:
+                                self.log.info(f"🧠 LLM→TTS chunk [{len(sentence)}c]: {sentence[:60]}...")
+                            submit(sentence.strip())
+                    
+                    buffer = "".join(parts)
                 
-                buffer = "".join(parts)
-            
-            # Ultimul chunk
-            if buffer.strip() and not self._stop_flag.is_set():
-                if self.log:
-                    self.log.info(f"🧠 LLM→TTS chunk [{len(buffer)}c]: {buffer.strip()}")
-                try:
-                    path = asyncio.run(self._synth_async(buffer.strip(), voice))
-                    synth_queue.put(path)
-                except Exception as e:
-                    self.log.error(f"Edge synth error: {e}")
-            
-            synth_queue.put(None)  # Sentinel
+                # Ultimul chunk
+                if buffer.strip() and not self._stop_flag.is_set():
+                    if self.log:
+                        self.log.info(f"🧠 LLM→TTS chunk [{len(buffer)}c]: {buffer.strip()}")
+                    submit(buffer.strip())
+            except Exception as e:
+                self.log.error(f"Edge synth error: {e}")
+            finally:
+                pipe.close()  # Sentinel
         
         def consumer():
-            """Redă audio-urile generate."""
+            """Redă audio-urile generate, în ordinea propozițiilor."""
             first_played = False
+            started = 0
+            last_end: Optional[float] = None
             
-            while True:
-                if self._stop_flag.is_set():
-                    break
+            def first_audio():
+                nonlocal first_played
+                if first_played:
+                    return
+                first_played = True
+                self.log.info("🔊 TTS play start (chunk 1)")
+                if on_first_speak:
+                    try:
+                        on_first_speak()
+                    except Exception:
+                        pass
+            
+            def begin_sentence():
+                # pauza la granița de propoziție = cât a stat ieșirea fără audio
+                nonlocal started
+                if started:
+                    tts_sentence_gap.observe(self._player.underrun_s())
+                started += 1
+            
+            for chunks, fut in pipe:
+                if chunks is not None:
+                    # PCM-ul intră în ieșirea persistentă pe măsură ce sosește; nu așteptăm
+                    # redarea propoziției, următoarele se sintetizează deja în fereastră
+                    wrote = False
+                    while not self._stop_flag.is_set():
+                        try:
+                            c = chunks.get(timeout=0.1)
+                        except queue.Empty:
+                            if fut.done() and chunks.empty():
+                                break
+                            continue
+                        if c is None:
+                            break
+                        if not wrote:
+                            wrote = True
+                            begin_sentence()
+                        # on_first_speak pleacă abia când primul sample ajunge efectiv la device
+                        self._player.write(*c, on_start=first_audio if started == 1 else None)
+                    if wrote and not self._stop_flag.is_set():
+                        self._player.silence(self.sentence_silence_ms)
+                    if fut.done() and not fut.cancelled() and fut.exception() is not None:
+                        self.log.error(f"Edge TTS stream error: {fut.exception()}")
+                    continue
                 
                 try:
-                    path = synth_queue.get(timeout=0.5)
-                except queue.Empty:
+                    item = fut.result()
+                except Exception as e:
+                    self.log.error(f"Edge synth error: {e}")
                     continue
-                
-                if path is None:
-                    break
-                
                 if self._stop_flag.is_set():
                     break
-                
-                if not first_played:
-                    first_played = True
-                    self.log.info("🔊 TTS play start (chunk 1)")
-                    if on_first_speak:
-                        try:
-                            on_first_speak()
-                        except Exception:
-                            pass
-                
-                self._play_audio_file(path)
-                
-                try:
-                    os.remove(path)
-                except Exception:
-                    pass
+                if self._player is not None:
+                    # fără streaming: propoziții întregi, lipite în ieșirea persistentă
+                    try:
+                        pcm = self._as_pcm(item)
+                    except Exception as e:
+                        self.log.error(f"Edge TTS decode error: {e}")
+                        continue
+                    begin_sentence()
+                    self._player.write(*pcm, on_start=first_audio if started == 1 else None)
+                    self._player.silence(self.sentence_silence_ms)
+                    continue
+                if last_end is not None:
+                    tts_sentence_gap.observe(time.perf_counter() - last_end)
+                self._play_item(item, on_start=first_audio)
+                last_end = time.perf_counter()
             
+            if self._player is not None:
+                self._player.drain(self._stop_flag)
             self._speaking = False
             if on_done:
                 try:
@@ -280,6 +502,7 @@ class EdgeTTS:
             
             prod_thread.join()
             cons_thread.join()
+            pipe.shutdown()
         
         self._coord_thread = threading.Thread(target=coordinator, daemon=True)
         self._coord_thread.start()
@@ -290,6 +513,8 @@ class EdgeTTS:
         self._speaking = False
         
         # Oprește playback-ul imediat
+        if self._player is not None:
+            self._player.flush()
         try:
             sd.stop()
         except Exception:
@@ -1,11 +1,15 @@
 # src/tts/engine.py
 from __future__ import annotations
 from typing import Dict, Optional, Iterable, Callable
-import threading, re, os, shutil, subprocess, tempfile, time, queue
+import threading, re, os, shutil, subprocess, tempfile, time
 import soundfile as sf
 import sounddevice as sd
 
-from src.telemetry.metrics import tts_speak_calls
+from src.audio.playback import get_player
+from src.telemetry.metrics import tts_speak_calls, tts_sentence_gap
+from .audio_cache import get_sentence_cache, play_pcm, read_pcm
+from .phrase_cache import PhraseCache
+from .pipeline import SynthPipeline
 
 _SENT_SPLIT = re.compile(r'([.!?…:;]+)\s+')
 
@@ -130,9 +134,9 @@ class _Pyttsx3TTS:
 class _PiperCmdTTS:
     """
     Piper backend cu dublu-buffer:
-      - Producer-ul segmentează stream-ul LLM în propoziții/bucăți, sintetizează WAV-urile următoare
-        și le pune într-o coadă cu max 2 elemente (A/B).
-      - Consumer-ul redă în timp real fișierul curent, în timp ce următorul e deja prefăcut.
+      - Producer-ul segmentează stream-ul LLM în propoziții/bucăți și le trimite în fereastra de
+        sinteză (`synth_window` procese Piper simultan, rezultate livrate în ordine).
+      - Consumer-ul redă în timp real fișierul curent, în timp ce următoarele sunt deja în lucru.
       - Loguri:
           🧠  LLM→TTS chunk: <text>   (înainte de sinteză)
           🔊  TTS play start: <N>     (când începe redarea)
@@ -151,16 +155,23 @@ class _PiperCmdTTS:
         self.noise_scale = float(self.p.get("noise_scale", 0.667))
         self.noise_w = float(self.p.get("noise_w", 0.8))
         self.sentence_silence_ms = int(self.p.get("sentence_silence_ms", 80))
+        # câte propoziții sintetizează Piper simultan în stream (procese paralele)
+        self.synth_window = int(self.cfg.get("synth_window", 2))
         self.warmup_enabled = bool(self.p.get("warmup_enabled", True))
         self.warmup_text = (self.p.get("warmup_text") or "").strip()
         self.warmup_lang = (self.p.get("warmup_lang") or "en").lower()
 
-        # Cache config
-        cache_cfg = self.cfg.get("cache") or {}
-        self.cache_enabled = bool(cache_cfg.get("enabled", False))
-        self.cache_dir = cache_cfg.get("dir") or "voices/cache"
-        self.cache_phrases = cache_cfg.get("phrases") or {}
-        self._cache: Dict[str, str] = {}  # key -> wav_path
+        # Cache persistent pentru frazele comune
+        self._phrase_cache = PhraseCache(self.cfg, "piper", logger)
+        # Cache LRU de PCM pe propoziții (comun tuturor backend-urilor)
+        self._audio_cache = get_sentence_cache(self.cfg, logger)
+
+        # Ieșirea audio persistentă; paplay/aplay rămân doar fallback
+        self._player = None
+        try:
+            self._player = get_player(self.cfg.get("playback"), logger)
+        except Exception as e:
+            self.log.warning(f"Piper: ieșire audio persistentă indisponibilă ({e}) — fallback la paplay/aplay")
 
         # Control
         self._lock = threading.Lock()
@@ -169,8 +180,8 @@ class _PiperCmdTTS:
         self._warmup_lock = threading.Lock()
         self._warmed_up = False
 
-        # Double buffer queue (A/B)
-        self._q: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=2)
+        # Fereastra de sinteză: până la `synth_window` propoziții în lucru, redate în ordine
+        self._pipe = SynthPipeline(self.synth_window, self._stop, name="piper-synth")
         self._producer_th: Optional[threading.Thread] = None
         self._consumer_th: Optional[threading.Thread] = None
         self._coord_th: Optional[threading.Thread] = None
@@ -180,7 +191,7 @@ class _PiperCmdTTS:
         if not self.exe or not os.path.exists(self.exe):
             raise RuntimeError("Piper executable not found. Set tts.piper.exe or install piper-tts.")
         self._ensure_warm()
-        self._precache()
+        self._phrase_cache.warm(self._voice_params, self._synth_to_wav)
 
     def is_speaking(self) -> bool:
         return self._speaking.is_set()
@@ -221,53 +232,24 @@ class _PiperCmdTTS:
             except Exception as e:
                 self.log.warning(f"Piper warm-up eșuat: {e}")
 
-    def _precache(self):
-        """Pre-generează WAV-uri pentru frazele comune."""
-        if not self.cache_enabled or not self.cache_phrases:
-            return
-        
-        # Creează directorul cache
-        cache_path = os.path.join(os.getcwd(), self.cache_dir)
-        os.makedirs(cache_path, exist_ok=True)
-        
-        generated = []
-        for key, text in self.cache_phrases.items():
-            if not text:
-                continue
-            # Extrage limba din cheie (ex: ack_en -> en, filler_ro -> ro)
-            lang = "ro" if key.endswith("_ro") else "en"
-            wav_path = os.path.join(cache_path, f"{key}.wav")
-            
-            # Generează doar dacă nu există deja
-            if not os.path.exists(wav_path):
-                try:
-                    temp_wav = self._synth_to_wav(text, lang)
-                    shutil.move(temp_wav, wav_path)
-                    generated.append(key)
-                except Exception as e:
-                    self.log.warning(f"Cache {key} eșuat: {e}")
-                    continue
-            
-            self._cache[key] = wav_path
-        
-        if generated:
-            self.log.info(f"📦 TTS cache: generat {', '.join(generated)}")
-        if self._cache:
-            self.log.info(f"📦 TTS cache: {len(self._cache)} fraze disponibile")
+    def _voice_params(self, lang: str):
+        """(model, parametri) care identifică audio-ul sintetizat, pentru cache."""
+        model, _ = self._pick_model(lang)
+        return model or "", f"{self.speaker_id}|{self.length_scale}|{self.noise_scale}|{self.noise_w}"
 
     def say_cached(self, key: str, lang: str = "en") -> bool:
-        """Redă un WAV din cache. Returnează True dacă a găsit, False altfel."""
-        wav_path = self._cache.get(key)
-        if wav_path and os.path.exists(wav_path):
-            tts_speak_calls.inc()
-            self._speaking.set()
-            try:
-                self.log.info(f"🔊 TTS cache play: {key}")
-                self._play_wav(wav_path)
-            finally:
-                self._speaking.clear()
-            return True
-        return False
+        """Redă o frază comună (earcon) din RAM. Returnează True dacă a găsit, False altfel."""
+        pcm = self._phrase_cache.pcm(key)
+        if pcm is None:
+            return False
+        tts_speak_calls.inc()
+        self._speaking.set()
+        try:
+            self.log.info(f"🔊 TTS cache play: {key}")
+            self._play_item(pcm)
+        finally:
+            self._speaking.clear()
+        return True
 
     def _synth_to_wav(self, text: str, lang: str) -> str:
         model, cfg = self._pick_model(lang)
@@ -290,6 +272,68 @@ class _PiperCmdTTS:
             self.log.error(f"Piper synth failed: {e}")
             raise
 
+    def _synth_item(self, text: str, lang: str):
+        """PCM din cache-ul de propoziții (hit) sau calea WAV-ului sintetizat acum (miss)."""
+        key = None
+        if self._audio_cache is not None:
+            key = self._audio_cache.key(text, *self._voice_params(lang))
+            hit = self._audio_cache.get(key)
+            if hit is not None:
+                return hit
+        wav = self._synth_to_wav(text, lang)
+        if key is not None:
+            self._audio_cache.put_file(key, wav)
+        return wav
+
+    def _as_pcm(self, item):
+        """Rezultatul lui `_synth_item` ca PCM (WAV-ul temporar se citește și se șterge)."""
+        if isinstance(item, tuple):
+            return item
+        try:
+            return read_pcm(item)
+        finally:
+            try:
+                os.remove(item)
+            except Exception:
+                pass
+            self._staged_paths.discard(item)
+
+    def _play_item(self, item):
+        if self._player is not None:
+            if not self._stop.is_set():
+                self._player.write(*self._as_pcm(item))
+                self._player.drain(self._stop)
+            return
+        if isinstance(item, tuple):
+            play_pcm(*item, self._stop)
+        else:
+            self._play_wav(item)
+
+    def _pause(self):
+        """Pauza `sentence_silence_ms` dintre propoziții: liniște exactă în ieșire, altfel așteptare."""
+        if self.sentence_silence_ms <= 0 or self._stop.is_set():
+            return
+        if self._player is not None:
+            self._player.silence(self.sentence_silence_ms)
+            return
+        t0 = time.time()
+        while (time.time() - t0) * 1000 < self.sentence_silence_ms and not self._stop.is_set():
+            time.sleep(0.003)
+
+    def _synth_staged(self, text: str, lang: str):
+        """Job din fereastra de sinteză; WAV-urile rămân în evidență până sunt redate."""
+        item = self._synth_item(text, lang)
+        if isinstance(item, str):
+            if self._stop.is_set():
+                # oprit între timp: stop() a curățat deja, nu mai lăsăm fișiere în urmă
+                try:
+                    os.remove(item)
+                except Exception:
+                    pass
+                return None
+            self._staged_paths.add(item)
+        return item
+
     def _play_wav(self, wav_path: str):
         # 1) paplay (PulseAudio/PipeWire)
         player = shutil.which("paplay")
@@ -355,50 +399,49 @@ class _PiperCmdTTS:
                     if self._stop.is_set():
                         break
                     self.log.info(f"🧠 LLM→TTS chunk [{len(s)}c]: {s}")
-                    wav = self._synth_to_wav(s, lang)
-                    self._staged_paths.add(wav)
-                    while not self._stop.is_set():
-                        try:
-                            self._q.put(wav, timeout=0.1)
-                            break
-                        except queue.Full:
-                            continue
+                    self._pipe.submit(self._synth_staged, s, lang)
 
             tail = buf.strip()
             if (not self._stop.is_set()) and tail:
                 self.log.info(f"🧠 LLM→TTS chunk [{len(tail)}c]: {tail}")
-                wav = self._synth_to_wav(tail, lang)
-                self._staged_paths.add(wav)
-                while not self._stop.is_set():
-                    try:
-                        self._q.put(wav, timeout=0.1)
-                        break
-                    except queue.Full:
-                        continue
+                self._pipe.submit(self._synth_staged, tail, lang)
         except Exception as e:
             self.log.error(f"Piper producer error: {e}")
         finally:
-            # Sentinel garantat: livrează None chiar dacă coada e plină
-            while not self._stop.is_set():
-                try:
-                    self._q.put(None, timeout=0.1)
-                    break
-                except queue.Full:
-                    continue
+            # Sentinel garantat (așteaptă loc în fereastră, renunță doar la stop)
+            self._pipe.close()
 
     def _consumer(self, on_first_speak: Optional[Callable[[], None]]):
         first = True
         n = 0
+        last_end: Optional[float] = None
         try:
-            while not self._stop.is_set():
+            for _, fut in self._pipe:
                 try:
-                    item = self._q.get(timeout=0.1)
-                except queue.Empty:
+                    wav = fut.result()
+                except Exception as e:
+                    self.log.error(f"Piper synth error: {e}")
                     continue
-                if item is None:
+                if self._stop.is_set():
                     break
-                wav = item
                 n += 1
+                if self._player is not None:
+                    # propozițiile se lipesc în ieșirea persistentă; nu așteptăm redarea fiecăreia
+                    try:
+                        pcm = self._as_pcm(wav)
+                    except Exception as e:
+                        self.log.error(f"Piper decode error: {e}")
+                        continue
+                    if n > 1:
+                        tts_sentence_gap.observe(self._player.underrun_s())
+                    self.log.info(f"🔊 TTS play start (chunk {n})")
+                    # on_first_speak pleacă abia când primul sample ajunge efectiv la device
+                    self._player.write(*pcm, on_start=on_first_speak if n == 1 else None)
+                    self._pause()
+                    continue
+                if last_end is not None:
+                    # cât a așteptat difuzorul după propoziția anterioară (peste pauza configurată)
+                    tts_sentence_gap.observe(time.perf_counter() - last_end)
                 if on_first_speak and first:
                     first = False
                     try:
@@ -407,20 +450,20 @@ class _PiperCmdTTS:
                         pass
                 self.log.info(f"🔊 TTS play start (chunk {n})")
                 try:
-                    self._play_wav(wav)
+                    self._play_item(wav)
                 finally:
                     try:
-                        if wav in self._staged_paths:
+                        if isinstance(wav, str) and wav in self._staged_paths:
                             os.remove(wav)
                             self._staged_paths.discard(wav)
                     except Exception:
                         pass
 
                 # mic gap între bucăți, dacă e configurat
-                if self.sentence_silence_ms > 0 and not self._stop.is_set():
-                    t0 = time.time()
-                    while (time.time() - t0) * 1000 < self.sentence_silence_ms and not self._stop.is_set():
-                        time.sleep(0.003)
+                self._pause()
+                last_end = time.perf_counter()
+            if self._player is not None:
+                self._player.drain(self._stop)
         except Exception as e:
             self.log.error(f"Piper consumer error: {e}")
 
@@ -446,17 +489,23 @@ class _PiperCmdTTS:
             for s in sentences:
                 if self._stop.is_set(): break
                 self.log.info(f"🧠 LLM→TTS chunk [{len(s)}c]: {s}")
-                wav = self._synth_to_wav(s, lang)
+                wav = self._synth_item(s, lang)
+                if self._player is not None:
+                    # propoziția următoare se sintetizează cât timp asta sună
+                    self.log.info("🔊 TTS play start (blocking)")
+                    self._player.write(*self._as_pcm(wav))
+                    self._pause()
+                    continue
                 try:
                     self.log.info("🔊 TTS play start (blocking)")
-                    self._play_wav(wav)
+                    self._play_item(wav)
                 finally:
-                    try: os.remove(wav)
-                    except Exception: pass
-                if self.sentence_silence_ms > 0:
-                    t0 = time.time()
-                    while (time.time() - t0) * 1000 < self.sentence_silence_ms and not self._stop.is_set():
-                        time.sleep(0.003)
+                    if isinstance(wav, str):
+                        try: os.remove(wav)
+                        except Exception: pass
+                self._pause()
+            if self._player is not None:
+                self._player.drain(self._stop)
         finally:
             self._speaking.clear()
 
@@ -489,16 +538,8 @@ class _PiperCmdTTS:
                 self._producer_th.start()
                 self._consumer_th.start()
 
-                # Așteaptă producer-ul, apoi injectează sentinel dacă mai e nevoie
+                # Producer-ul închide fereastra (sentinel) la final, inclusiv la eroare
                 self._producer_th.join()
-                while self._consumer_th.is_alive() and not self._stop.is_set():
-                    try:
-                        self._q.put(None, timeout=0.1)
-                        break
-                    except queue.Full:
-                        time.sleep(0.05)
-                        continue
-
                 self._consumer_th.join()
             finally:
                 self._speaking.clear()
@@ -509,7 +550,7 @@ class _PiperCmdTTS:
         # reset pipeline
         self.stop()
         self._stop.clear()
-        self._q = queue.Queue(maxsize=2)
+        self._pipe = SynthPipeline(self.synth_window, self._stop, name="piper-synth")
 
         self._coord_th = threading.Thread(target=coordinator, daemon=True)
         self._coord_th.start()
@@ -518,6 +559,9 @@ class _PiperCmdTTS:
     def stop(self):
         with self._lock:
             self._stop.set()
+            self._pipe.shutdown()
+            if self._player is not None:
+                self._player.flush()
             try:
                 if self._play_proc and self._play_proc.poll() is None:
                     self._play_proc.terminate()
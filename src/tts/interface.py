@@ -112,13 +112,14 @@ class RemoteTTS(TTSInterface):
     Serverul face sinteza, clientul face doar playback.
     """
     
-    def __init__(self, host: str, port: int, timeout: float = 30.0, logger=None):
+    def __init__(self, host: str, port: int, timeout: float = 30.0, logger=None, cfg: Optional[dict] = None):
         """
         Args:
             host: Adresa IP sau hostname a serverului
             port: Portul serverului
             timeout: Timeout pentru request
             logger: Logger opțional
+            cfg: tts.yaml (ieșirea audio persistentă + frazele comune din RAM)
         """
         import threading
         import tempfile
@@ -129,18 +130,51 @@ class RemoteTTS(TTSInterface):
         self._speaking = False
         self._stop_flag = threading.Event()
         self._temp_dir = tempfile.mkdtemp(prefix="remote_tts_")
+        
+        # Ieșirea audio persistentă (ffplay rămâne doar fallback) și earcon-urile livrate în repo
+        self._player = None
+        self._phrase_cache = None
+        if cfg is not None:
+            from src.audio.playback import get_player
+            from .phrase_cache import PhraseCache
+            try:
+                self._player = get_player(cfg.get("playback"), logger)
+            except Exception as e:
+                if self.log:
+                    self.log.warning(f"RemoteTTS: ieșire audio persistentă indisponibilă ({e}) — fallback la ffplay")
+            self._phrase_cache = PhraseCache(cfg, "remote", logger)
+            self._phrase_cache.preload()
     
     def is_speaking(self) -> bool:
         return self._speaking
     
-    def _play_audio_file(self, path: str):
-        """Redă un fișier audio folosind ffplay."""
+    def _play_pcm(self, pcm, on_start: Optional[Callable[[], None]] = None) -> None:
+        """Redă PCM (float32, sr) prin ieșirea persistentă, blocking până termină sau stop."""
+        if self._stop_flag.is_set():
+            return
+        self._player.write(*pcm, on_start=on_start)
+        self._player.drain(self._stop_flag)
+    
+    def _play_audio_file(self, path: str, on_start: Optional[Callable[[], None]] = None):
+        """Redă un fișier audio: prin ieșirea persistentă, altfel cu ffplay."""
         import subprocess
         import time
         
         if self._stop_flag.is_set():
             return
         
+        if self._player is not None:
+            from .audio_cache import read_pcm
+            try:
+                self._play_pcm(read_pcm(path), on_start)
+                return
+            except Exception as e:
+                if self.log:
+                    self.log.error(f"RemoteTTS decode error: {e}")
+        
+        if on_start:
+            on_start()
+        
         try:
             proc = subprocess.Popen(
                 ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet", path],
@@ -159,7 +193,7 @@ class RemoteTTS(TTSInterface):
             if self.log:
                 self.log.error(f"RemoteTTS playback error: {e}")
     
-    def say(self, text: str, lang: str = "en"):
+    def say(self, text: str, lang: str = "en", on_start: Optional[Callable[[], None]] = None):
         import requests
         import os
         
@@ -182,7 +216,7 @@ class RemoteTTS(TTSInterface):
             with open(audio_path, 'wb') as f:
                 f.write(response.content)
             
-            self._play_audio_file(audio_path)
+            self._play_audio_file(audio_path, on_start)
             
         except requests.exceptions.RequestException as e:
             if self.log:
@@ -215,11 +249,8 @@ class RemoteTTS(TTSInterface):
                 if not full_text.strip():
                     return
                 
-                if on_first_speak:
-                    on_first_speak()
-                
-                # Trimite la server
-                self.say(full_text, lang)
+                # Trimite la server; on_first_speak pleacă când începe efectiv redarea
+                self.say(full_text, lang, on_start=on_first_speak)
                 
             finally:
                 self._speaking = False
@@ -233,9 +264,22 @@ class RemoteTTS(TTSInterface):
         thread.start()
     
     def say_cached(self, key: str, lang: str = "en") -> bool:
-        # Remote TTS nu suportă cache local - serverul ar trebui să-l gestioneze
-        return False
+        # Doar frazele deja pe disc (seed-urile din voices/cache), ținute în RAM; sinteza rămâne pe server
+        pcm = self._phrase_cache.pcm(key) if self._phrase_cache is not None else None
+        if pcm is None or self._player is None:
+            return False
+        self._speaking = True
+        self._stop_flag.clear()
+        try:
+            if self.log:
+                self.log.info(f"🔊 RemoteTTS cache play: {key}")
+            self._play_pcm(pcm)
+        finally:
+            self._speaking = False
+        return True
     
     def stop(self):
         self._stop_flag.set()
         self._speaking = False
+        if self._player is not None:
+            self._player.flush()
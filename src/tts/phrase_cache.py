@@ -0,0 +1,164 @@
+# src/tts/phrase_cache.py
+"""
+Cache persistent pe disc pentru frazele fixe (ack, filler, goodbye...).
+
+Fișierele sunt adresate după conținut: sha1(backend, voce, parametri, text),
+deci o schimbare de voce/rate/pitch sau de text produce automat o intrare nouă,
+iar cele vechi nu mai sunt folosite. Încălzirea (sinteza frazelor lipsă) rulează
+în fundal, nu în constructor; până termină, `seed_dir/<cheie>.wav` (WAV-urile
+livrate în repo) ține locul frazei, ca primul ack după boot să nu aștepte rețeaua.
+
+Frazele sunt ținute și ca PCM în RAM (`pcm(key)`), gata de scris direct în
+ieșirea audio persistentă — ack/filler/goodbye nu mai trec prin disc sau decodare.
+"""
+from __future__ import annotations
+
+import glob
+import hashlib
+import os
+import shutil
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from .audio_cache import Pcm, read_pcm
+
+# cheie -> (text, lang)
+Phrases = Dict[str, Tuple[str, str]]
+
+
+def phrases_from_cfg(cfg: Dict) -> Phrases:
+    """`cache_phrases` (cheie: {text, lang}); acceptă și vechiul `cache.phrases` (cheie: text)."""
+    out: Phrases = {}
+    legacy = (cfg.get("cache") or {}).get("phrases") or {}
+    for key, text in legacy.items():
+        if text:
+            out[key] = (str(text), "ro" if key.endswith("_ro") else "en")
+    for key, data in (cfg.get("cache_phrases") or {}).items():
+        data = data or {}
+        if data.get("text"):
+            out[key] = (str(data["text"]), str(data.get("lang", "en")))
+    return out
+
+
+class PhraseCache:
+    def __init__(self, cfg: Dict, backend: str, logger=None):
+        pc = cfg.get("phrase_cache") or {}
+        self.enabled = bool(pc.get("enabled", True))
+        self.dir = os.path.abspath(pc.get("dir") or "voices/cache/phrases")
+        seed = pc.get("seed_dir", "voices/cache")
+        self.seed_dir = os.path.abspath(seed) if seed else None
+        self.backend = backend
+        self.phrases = phrases_from_cfg(cfg)
+        self.log = logger
+        self._params: Dict[str, Tuple[str, str]] = {}   # lang -> (voice, params) al backend-ului
+        self._pcm: Dict[str, Tuple[str, Pcm]] = {}       # cheie -> (fișier, PCM) încărcat în RAM
+        self._thread: Optional[threading.Thread] = None
+        if self.enabled:
+            os.makedirs(self.dir, exist_ok=True)
+
+    def _digest(self, text: str, voice: str, params: str) -> str:
+        raw = "\0".join((self.backend, voice or "", params or "", text.strip()))
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:24]
+
+    def lookup(self, text: str, voice: str, params: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        hits = glob.glob(os.path.join(self.dir, self._digest(text, voice, params) + ".*"))
+        return hits[0] if hits else None
+
+    def store(self, src: str, text: str, voice: str, params: str) -> str:
+        """Mută fișierul sintetizat în cache (rename atomic în același director)."""
+        ext = os.path.splitext(src)[1] or ".wav"
+        dst = os.path.join(self.dir, self._digest(text, voice, params) + ext)
+        tmp = dst + ".part"
+        shutil.move(src, tmp)
+        os.replace(tmp, dst)
+        return dst
+
+    def is_entry(self, path: str) -> bool:
+        """True pentru fișierele din cache (nu seed-urile, care pot avea altă voce)."""
+        return os.path.dirname(os.path.abspath(path)) == self.dir
+
+    def named(self, key: str) -> Optional[str]:
+        """Calea pentru o frază din config: intrarea din cache, altfel seed-ul livrat."""
+        phrase = self.phrases.get(key)
+        if phrase and phrase[1] in self._params:
+            voice, params = self._params[phrase[1]]
+            path = self.lookup(phrase[0], voice, params)
+            if path:
+                return path
+        if self.seed_dir:
+            seed = os.path.join(self.seed_dir, f"{key}.wav")
+            if os.path.exists(seed):
+                return seed
+        return None
+
+    def _load(self, key: str, path: str) -> Optional[Pcm]:
+        try:
+            pcm = read_pcm(path)
+        except Exception as e:
+            if self.log:
+                self.log.warning(f"TTS phrase cache: nu pot decoda '{key}' ({e})")
+            return None
+        self._pcm[key] = (path, pcm)
+        return pcm
+
+    def pcm(self, key: str) -> Optional[Pcm]:
+        """PCM-ul frazei din RAM (încărcat la primul acces sau la preload)."""
+        hit = self._pcm.get(key)
+        if hit is not None:
+            return hit[1]
+        path = self.named(key)
+        return self._load(key, path) if path else None
+
+    def preload(self) -> None:
+        """Încarcă în RAM toate frazele disponibile acum (cache sau seed)."""
+        for key in set(self.phrases) | set(self._pcm):
+            path = self.named(key)
+            if path and self._pcm.get(key, (None,))[0] != path:
+                self._load(key, path)
+
+    def warm(
+        self,
+        voice_for: Callable[[str], Tuple[str, str]],
+        synth: Callable[[str, str], Optional[str]],
+    ) -> None:
+        """
+        Sintetizează în fundal frazele care lipsesc de pe disc.
+        `voice_for(lang)` -> (voce, parametri); `synth(text, lang)` -> fișier temporar.
+        """
+        if not self.enabled or not self.phrases:
+            self.preload()
+            return
+        for lang in {lang for _, lang in self.phrases.values()}:
+            self._params[lang] = voice_for(lang)
+        missing = [
+            (key, text, lang) for key, (text, lang) in self.phrases.items()
+            if not self.lookup(text, *self._params[lang])
+        ]
+        self.preload()
+        if self.log:
+            self.log.info(
+                f"📦 TTS phrase cache ({self.backend}): {len(self.phrases) - len(missing)}/{len(self.phrases)} "
+                f"fraze pe disc{', restul se generează în fundal' if missing else ''}"
+            )
+        if not missing:
+            return
+
+        def run():
+            done = 0
+            for key, text, lang in missing:
+                try:
+                    tmp = synth(text, lang)
+                    if tmp:
+                        # intrarea nouă (vocea curentă) ia locul seed-ului și în RAM
+                        self._load(key, self.store(tmp, text, *self._params[lang]))
+                        done += 1
+                except Exception as e:
+                    if self.log:
+                        self.log.warning(f"TTS phrase cache '{key}' eșuat: {e}")
+            if self.log:
+                self.log.info(f"📦 TTS phrase cache: {done} fraze noi salvate în {self.dir}")
+
+        self._thread = threading.Thread(target=run, name="tts-phrase-cache", daemon=True)
+        self._thread.start()
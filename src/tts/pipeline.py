@@ -0,0 +1,57 @@
+# src/tts/pipeline.py
+"""
+Sinteză de propoziții în paralel, cu fereastră mărginită și ordine păstrată.
+
+Producătorul (bucla pe token-urile LLM) trimite propozițiile pe rând; până la
+`window` sinteze rulează simultan, iar consumatorul le primește exact în ordinea
+în care au fost trimise. Cu TTS prin rețea, propoziția N+1 e deja (aproape) gata
+când N termină de sunat, deci nu mai apar pauze între propoziții scurte.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterator, Optional, Tuple
+
+
+class SynthPipeline:
+    def __init__(self, window: int = 2, stop: Optional[threading.Event] = None, name: str = "tts-synth"):
+        self.window = max(1, int(window))
+        self._stop = stop or threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=self.window, thread_name_prefix=name)
+        # ordinea de redare; mărginită ca producătorul să nu o ia prea mult înainte
+        self._order: "queue.Queue[Optional[Tuple[Any, Future]]]" = queue.Queue(maxsize=self.window)
+
+    def _put(self, entry) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._order.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def submit(self, fn: Callable[..., Any], *args, tag: Any = None) -> bool:
+        """Pornește `fn(*args)`; blochează cât timp fereastra e plină. False dacă s-a oprit."""
+        if self._stop.is_set():
+            return False
+        return self._put((tag, self._pool.submit(fn, *args)))
+
+    def close(self) -> None:
+        """Marchează sfârșitul (după ultima propoziție trimisă)."""
+        self._put(None)
+
+    def __iter__(self) -> Iterator[Tuple[Any, Future]]:
+        """(tag, future) în ordinea trimiterii, până la `close()` sau stop."""
+        while not self._stop.is_set():
+            try:
+                entry = self._order.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if entry is None:
+                return
+            yield entry
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,122 @@
+# src/wake/coordinator.py
+"""
+Coordonator de wake: rulează simultan toate engine-urile configurate
+(OpenWakeWord, Porcupine) pe aceeași captură și întoarce prima detecție.
+
+Fiecare engine are un thread propriu care stă blocat în `wait_for_any` doar
+cât timp cineva așteaptă în `wait()`; nu mai alternăm engine-urile cu felii
+de timeout + sleep, deci niciunul nu pierde cadre cât e „verificat” celălalt.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class WakeEvent:
+    engine: str
+    keyword: str
+    score: Optional[float] = None
+    end_pos: Optional[int] = None  # poziția în captura partajată unde s-a terminat wake phrase-ul
+
+
+class WakeCoordinator:
+    """
+    `wait()` blochează până la prima detecție a oricărui engine (sau timeout).
+    Engine-urile trebuie să expună `wait_for_any(timeout_seconds)`; opțional
+    `pause()` (apelat când nimeni nu mai ascultă), `last_score` și
+    `last_trigger_pos` (pentru handoff-ul audio după wake).
+    """
+
+    def __init__(self, engines: Dict[str, Any], logger=None, slice_seconds: float = 0.25):
+        self.log = logger
+        self.engines = {name: eng for name, eng in engines.items() if eng is not None}
+        if not self.engines:
+            raise ValueError("WakeCoordinator: niciun engine de wake disponibil.")
+        # doar cât de repede observă worker-ul că s-a oprit ascultarea; detecția e imediată
+        self.slice_seconds = float(slice_seconds)
+
+        self._cond = threading.Condition()
+        self._result: Optional[WakeEvent] = None
+        self._listening = threading.Event()
+        self._closed = threading.Event()
+        self._last_error_ts: Dict[str, float] = {}
+
+        self._threads: List[threading.Thread] = []
+        for name, eng in self.engines.items():
+            t = threading.Thread(target=self._worker, args=(name, eng), name=f"wake-{name}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[WakeEvent]:
+        """Așteaptă prima detecție; întoarce `WakeEvent` sau None la timeout/închidere."""
+        if self._closed.is_set():
+            return None
+        if not self._listening.is_set():
+            # ascultare nouă: aruncăm orice rezultat rămas de dinainte
+            with self._cond:
+                self._result = None
+            self._listening.set()
+        event: Optional[WakeEvent] = None
+        try:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._result is not None or self._closed.is_set(),
+                    timeout=timeout,
+                )
+                event, self._result = self._result, None
+        finally:
+            if event is not None or self._closed.is_set():
+                self._listening.clear()
+        return event
+
+    def stop_listening(self) -> None:
+        """Oprește engine-urile până la următorul `wait()` (ex: la intrarea în sesiune)."""
+        self._listening.clear()
+
+    def _worker(self, name: str, engine: Any) -> None:
+        active = False
+        while not self._closed.is_set():
+            if not self._listening.wait(timeout=0.25):
+                if active and hasattr(engine, "pause"):
+                    try:
+                        engine.pause()
+                    except Exception:
+                        pass
+                active = False
+                continue
+            active = True
+            try:
+                keyword = engine.wait_for_any(timeout_seconds=self.slice_seconds)
+            except Exception as exc:
+                now = time.monotonic()
+                if (now - self._last_error_ts.get(name, 0.0)) > 5.0:
+                    if self.log:
+                        self.log.error(f"Wake coordinator: eroare în engine-ul {name} ({exc})")
+                    self._last_error_ts[name] = now
+                self._closed.wait(timeout=0.25)
+                continue
+            if not keyword or not self._listening.is_set():
+                continue
+            with self._cond:
+                if self._result is None:
+                    self._result = WakeEvent(
+                        name,
+                        keyword,
+                        getattr(engine, "last_score", None),
+                        getattr(engine, "last_trigger_pos", None),
+                    )
+                    self._listening.clear()
+                    self._cond.notify_all()
+
+    def close(self) -> None:
+        self._closed.set()
+        self._listening.clear()
+        with self._cond:
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join(timeout=1.0)
+        self._threads = []
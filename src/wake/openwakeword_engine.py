@@ -1,45 +1,45 @@
 from __future__ import annotations
 
-import queue
 import time
 from pathlib import Path
 from typing import Dict, Any, Optional
 
-import numpy as np
-import sounddevice as sd
-
-from src.audio.devices import choose_input_device
+from src.audio.oww_frontend import OWWFrontend, OWWSubscription, get_oww_frontend
 
 
 class OpenWakeWordEngine:
     """
     Minimal wrapper peste biblioteca `openwakeword` care ascultă continuu
     microfonul și expune o metodă `wait_for(keyword)` pentru standby.
+    Feature-urile (mel + embedding) vin din frontend-ul OWW comun.
     """
 
-    def __init__(self, cfg_audio: Dict[str, Any], cfg_openwake: Dict[str, Any], logger=None):
+    def __init__(
+        self,
+        cfg_audio: Dict[str, Any],
+        cfg_openwake: Dict[str, Any],
+        logger=None,
+        frontend: Optional[OWWFrontend] = None,
+    ):
         self.log = logger
         self.cfg_audio = cfg_audio or {}
         self.cfg_openwake = cfg_openwake or {}
+        self._frontend = frontend
 
         self.sample_rate = int(self.cfg_openwake.get("sample_rate") or self.cfg_audio.get("sample_rate", 16000))
         block_ms = int(self.cfg_openwake.get("block_ms") or self.cfg_audio.get("block_ms", 20))
         self.block = max(160, int(self.sample_rate * (block_ms / 1000.0)))
-        self.inference_framework = (self.cfg_openwake.get("inference_framework") or "onnx").lower()
-        self.enable_speex = bool(self.cfg_openwake.get("speex_noise_suppression", False))
-        self.vad_threshold = float(self.cfg_openwake.get("vad_threshold", 0.0))
 
-        self._queue: "queue.Queue[np.ndarray]" = queue.Queue(maxsize=int(self.cfg_openwake.get("queue_max", 8)))
-        self._stream: Optional[sd.InputStream] = None
-        self._device_index = None
-        self._last_error_ts: Optional[float] = None
+        self.queue_max = int(self.cfg_openwake.get("queue_max", 8))
+        self.last_score: Optional[float] = None
+        self.last_trigger_pos: Optional[int] = None  # poziția în captură la detecție (pre-roll)
 
         self._keywords = self._parse_keywords()
         if not self._keywords:
             raise ValueError("openwakeword: definește cel puțin un model în wake.openwakeword.keywords.")
         self._label_to_keyword = {cfg["label"]: name for name, cfg in self._keywords.items()}
 
-        self._model = self._init_model()
+        self._sub = self._init_model()
         self._open_stream()
 
     def _parse_keywords(self) -> Dict[str, Dict[str, Any]]:
@@ -75,74 +75,18 @@ class OpenWakeWordEngine:
 
         return parsed
 
-    def _init_model(self):
+    def _init_model(self) -> OWWSubscription:
+        # Mel/embedding vin din frontend-ul comun; aici înregistrăm doar capetele.
+        if self._frontend is None:
+            self._frontend = get_oww_frontend()
+        self._frontend.check_options(self.cfg_openwake, "openwakeword")
+        models = {kw["label"]: kw["model_path"] for kw in self._keywords.values()}
         try:
-            from openwakeword import Model
-        except Exception as exc:  # pragma: no cover - import error path
-            raise RuntimeError("Biblioteca `openwakeword` lipsește. Rulează `pip install openwakeword`.") from exc
-
-        model_paths = [kw["model_path"] for kw in self._keywords.values()]
-
-        preproc_kwargs: Dict[str, Any] = {}
-        for key in ("melspec_model_path", "embedding_model_path", "device", "ncpu"):
-            val = self.cfg_openwake.get(key)
-            if val:
-                preproc_kwargs[key] = val
-        preproc_kwargs["sr"] = self.sample_rate
-
-        try:
-            return Model(
-                wakeword_models=model_paths,
-                inference_framework=self.inference_framework,
-                enable_speex_noise_suppression=self.enable_speex,
-                vad_threshold=self.vad_threshold,
-                **preproc_kwargs,
-            )
-        except FileNotFoundError as exc:
-            hint = "Ai rulat `python -m openwakeword.utils.download_models`?"
-            raise RuntimeError(f"openwakeword: resurse lipsă ({exc}). {hint}") from exc
+            return self._frontend.register("openwakeword", models, maxlen=self.queue_max)
         except Exception as exc:
             raise RuntimeError(f"openwakeword: nu pot inițializa modelul ({exc}).") from exc
 
     def _open_stream(self):
-        if self._stream:
-            return
-
-        self._device_index = choose_input_device(
-            prefer_echo_cancel=bool(self.cfg_audio.get("prefer_echo_cancel", True)),
-            hint=str(self.cfg_audio.get("input_device_hint", "") or ""),
-            logger=self.log,
-        )
-
-        def _callback(indata, frames, time_info, status):
-            if status and self.log:
-                self.log.debug(f"openwakeword input status: {status}")
-            block = indata.copy()
-            try:
-                self._queue.put_nowait(block)
-            except queue.Full:
-                try:
-                    self._queue.get_nowait()
-                except queue.Empty:
-                    pass
-                try:
-                    self._queue.put_nowait(block)
-                except queue.Full:
-                    pass
-
-        try:
-            self._stream = sd.InputStream(
-                channels=1,
-                samplerate=self.sample_rate,
-                blocksize=self.block,
-                dtype="int16",
-                callback=_callback,
-                device=self._device_index,
-            )
-            self._stream.start()
-        except Exception as exc:
-            raise RuntimeError(f"openwakeword: nu pot deschide microfonul ({exc}).") from exc
-
         if self.log:
             self.log.info(
                 f"🎧 Standby (OpenWakeWord) — sr={self.sample_rate}, block={self.block}, "
@@ -161,18 +105,13 @@ class OpenWakeWordEngine:
 
         keyword_cfg = self._keywords[keyword_id]
         deadline = None if timeout_seconds is None else (time.monotonic() + timeout_seconds)
+        self._sub.activate()
 
         try:
             while True:
                 if deadline and time.monotonic() > deadline:
                     return False
-                try:
-                    block = self._queue.get(timeout=0.25)
-                except queue.Empty:
-                    continue
-
-                samples = self._to_mono(block)
-                predictions = self._predict(samples)
+                predictions = self._sub.get(timeout=0.25)
                 if not predictions:
                     continue
 
@@ -182,12 +121,11 @@ class OpenWakeWordEngine:
 
                 if score >= keyword_cfg["threshold"] and self._cooldown_passed(keyword_cfg):
                     keyword_cfg["last_hit"] = time.monotonic()
+                    self.last_score = float(score)
+                    self.last_trigger_pos = self._sub.last_pos
                     if self.log:
                         self.log.info(f"🔔 Wake (openwakeword:{keyword_id}) score={score:.2f}")
-                    try:
-                        self._model.reset()
-                    except Exception:
-                        pass
+                    self._sub.reset()
                     return True
         except KeyboardInterrupt:
             return False
@@ -198,18 +136,13 @@ class OpenWakeWordEngine:
         Returnează numele keyword-ului detectat sau None la timeout.
         """
         deadline = None if timeout_seconds is None else (time.monotonic() + timeout_seconds)
+        self._sub.activate()
 
         try:
             while True:
                 if deadline and time.monotonic() > deadline:
                     return None
-                try:
-                    block = self._queue.get(timeout=0.25)
-                except queue.Empty:
-                    continue
-
-                samples = self._to_mono(block)
-                predictions = self._predict(samples)
+                predictions = self._sub.get(timeout=0.25)
                 if not predictions:
                     continue
 
@@ -221,35 +154,15 @@ class OpenWakeWordEngine:
 
                     if score >= keyword_cfg["threshold"] and self._cooldown_passed(keyword_cfg):
                         keyword_cfg["last_hit"] = time.monotonic()
+                        self.last_score = float(score)
+                        self.last_trigger_pos = self._sub.last_pos
                         if self.log:
                             self.log.info(f"🔔 Wake (openwakeword:{name}) score={score:.2f}")
-                        try:
-                            self._model.reset()
-                        except Exception:
-                            pass
+                        self._sub.reset()
                         return name
         except KeyboardInterrupt:
             return None
 
-    def _predict(self, samples: np.ndarray) -> Dict[str, float]:
-        try:
-            return self._model.predict(samples)
-        except Exception as exc:
-            now = time.monotonic()
-            if not self._last_error_ts or (now - self._last_error_ts) > 5.0:
-                if self.log:
-                    self.log.error(f"openwakeword: eroare la rulare ({exc})")
-                self._last_error_ts = now
-            return {}
-
-    @staticmethod
-    def _to_mono(block: np.ndarray) -> np.ndarray:
-        if block.ndim == 2:
-            pcm = block[:, 0]
-        else:
-            pcm = block
-        return np.asarray(pcm, dtype=np.int16).flatten()
-
     @staticmethod
     def _cooldown_passed(keyword_cfg: Dict[str, Any]) -> bool:
         cooldown = max(0, int(keyword_cfg.get("cooldown_ms", 0))) / 1000.0
@@ -257,18 +170,13 @@ class OpenWakeWordEngine:
             return True
         return (time.monotonic() - float(keyword_cfg.get("last_hit", 0.0))) >= cooldown
 
-    def close(self):
-        try:
-            if self._stream:
-                self._stream.stop()
-                self._stream.close()
-        except Exception:
-            pass
-        finally:
-            self._stream = None
+    def pause(self):
+        """Oprește capetele de wake în frontend cât timp nimeni nu ascultă."""
+        self._sub.deactivate()
 
+    def close(self):
         try:
-            if self._model:
-                self._model.reset()
+            self._sub.deactivate()
+            self._sub.reset()
         except Exception:
             pass
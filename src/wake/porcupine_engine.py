@@ -6,15 +6,13 @@ Permite detectarea wake words din fișiere .ppn antrenate cu Picovoice.
 from __future__ import annotations
 
 import os
-import queue
 import time
 from pathlib import Path
 from typing import Dict, Any, Optional
 
 import numpy as np
-import sounddevice as sd
 
-from src.audio.devices import choose_input_device
+from src.audio.capture import CaptureReader, get_capture
 
 
 class PorcupineEngine:
@@ -51,9 +49,10 @@ class PorcupineEngine:
         self._keyword_names = []
         self._init_porcupine()
         
-        # Audio queue and stream
-        self._audio_queue: queue.Queue = queue.Queue()
-        self._stream: Optional[sd.InputStream] = None
+        # Cursor pe captura partajată (max `queue_max` frame-uri restante)
+        self._queue_max = int(self.cfg.get("queue_max", 8))
+        self._reader: Optional[CaptureReader] = None
+        self.last_score: Optional[float] = None  # Porcupine nu expune scoruri
         self._open_stream()
     
     def _parse_keywords(self):
@@ -114,31 +113,16 @@ class PorcupineEngine:
             raise RuntimeError(f"Porcupine: eroare la inițializare ({exc})") from exc
     
     def _open_stream(self):
-        """Deschide stream-ul audio."""
-        device = choose_input_device(
-            hint=self.cfg_audio.get("input_device_hint", ""),
-            logger=self.log
-        )
-        
-        def _callback(indata, frames, time_info, status):
-            if status and self.log:
-                self.log.debug(f"Porcupine audio status: {status}")
-            # Convert to int16
-            audio_int16 = (indata[:, 0] * 32768).astype(np.int16)
-            self._audio_queue.put(audio_int16)
-        
+        """Atașează un cursor la captura partajată."""
         try:
-            self._stream = sd.InputStream(
-                device=device,
-                samplerate=self._sample_rate,
-                channels=1,
-                dtype="float32",
-                blocksize=self._frame_length,
-                callback=_callback,
-            )
-            self._stream.start()
+            capture = get_capture(self.cfg_audio, self.log)
         except Exception as exc:
             raise RuntimeError(f"Porcupine: nu pot deschide microfonul ({exc})") from exc
+        if capture.sample_rate != self._sample_rate:
+            raise RuntimeError(
+                f"Porcupine: necesită {self._sample_rate} Hz, captura partajată rulează la {capture.sample_rate} Hz."
+            )
+        self._reader = capture.reader("porcupine", max_lag_samples=self._queue_max * self._frame_length)
     
     def available_keywords(self):
         """Returnează lista de keywords disponibile."""
@@ -160,39 +144,34 @@ class PorcupineEngine:
         kw_index = self._keyword_names.index(keyword_id)
         
         start = time.time()
-        audio_buffer = np.array([], dtype=np.int16)
+        frame = np.empty(self._frame_length, dtype=np.int16)
         
         while True:
             if timeout_seconds is not None and (time.time() - start) >= timeout_seconds:
                 return False
             
             try:
-                chunk = self._audio_queue.get(timeout=0.1)
-                audio_buffer = np.concatenate([audio_buffer, chunk])
+                # Citim direct câte un frame Porcupine din captura partajată
+                if not self._reader.read_into(frame, timeout=0.1):
+                    continue
                 
-                # Process when we have enough samples
-                while len(audio_buffer) >= self._frame_length:
-                    frame = audio_buffer[:self._frame_length]
-                    audio_buffer = audio_buffer[self._frame_length:]
-                    
-                    result = self._porcupine.process(frame)
-                    
-                    if result >= 0:
-                        detected_name = self._keyword_names[result]
-                        if detected_name == keyword_id:
-                            # Check cooldown
-                            now = time.time()
-                            last = kw_cfg.get("last_trigger", 0.0)
-                            cooldown_s = kw_cfg.get("cooldown_ms", 2000) / 1000.0
-                            
-                            if (now - last) >= cooldown_s:
-                                kw_cfg["last_trigger"] = now
-                                if self.log:
-                                    self.log.info(f"🐍 Wake (porcupine:{keyword_id})")
-                                return True
+                result = self._porcupine.process(frame)
+                
+                if result >= 0:
+                    detected_name = self._keyword_names[result]
+                    if detected_name == keyword_id:
+                        # Check cooldown
+                        now = time.time()
+                        last = kw_cfg.get("last_trigger", 0.0)
+                        cooldown_s = kw_cfg.get("cooldown_ms", 2000) / 1000.0
+                        
+                        if (now - last) >= cooldown_s:
+                            kw_cfg["last_trigger"] = now
+                            self.last_trigger_pos = self._reader.position
+                            if self.log:
+                                self.log.info(f"🐍 Wake (porcupine:{keyword_id})")
+                            return True
                             
-            except queue.Empty:
-                continue
             except Exception as exc:
                 if self.log:
                     self.log.error(f"Porcupine: eroare la procesare ({exc})")
@@ -204,39 +183,34 @@ class PorcupineEngine:
         Returnează numele keyword-ului detectat sau None la timeout.
         """
         start = time.time()
-        audio_buffer = np.array([], dtype=np.int16)
+        frame = np.empty(self._frame_length, dtype=np.int16)
         
         while True:
             if timeout_seconds is not None and (time.time() - start) >= timeout_seconds:
                 return None
             
             try:
-                chunk = self._audio_queue.get(timeout=0.1)
-                audio_buffer = np.concatenate([audio_buffer, chunk])
+                if not self._reader.read_into(frame, timeout=0.1):
+                    continue
+                
+                result = self._porcupine.process(frame)
                 
-                while len(audio_buffer) >= self._frame_length:
-                    frame = audio_buffer[:self._frame_length]
-                    audio_buffer = audio_buffer[self._frame_length:]
+                if result >= 0:
+                    detected_name = self._keyword_names[result]
+                    kw_cfg = self._keywords[detected_name]
                     
-                    result = self._porcupine.process(frame)
+                    # Check cooldown
+                    now = time.time()
+                    last = kw_cfg.get("last_trigger", 0.0)
+                    cooldown_s = kw_cfg.get("cooldown_ms", 2000) / 1000.0
                     
-                    if result >= 0:
-                        detected_name = self._keyword_names[result]
-                        kw_cfg = self._keywords[detected_name]
-                        
-                        # Check cooldown
-                        now = time.time()
-                        last = kw_cfg.get("last_trigger", 0.0)
-                        cooldown_s = kw_cfg.get("cooldown_ms", 2000) / 1000.0
-                        
-                        if (now - last) >= cooldown_s:
-                            kw_cfg["last_trigger"] = now
-                            if self.log:
-                                self.log.info(f"🐍 Wake (porcupine:{detected_name})")
-                            return detected_name
+                    if (now - last) >= cooldown_s:
+                        kw_cfg["last_trigger"] = now
+                        self.last_trigger_pos = self._reader.position
+                        if self.log:
+                            self.log.info(f"🐍 Wake (porcupine:{detected_name})")
+                        return detected_name
                             
-            except queue.Empty:
-                continue
             except Exception as exc:
                 if self.log:
                     self.log.error(f"Porcupine: eroare la procesare ({exc})")
@@ -244,13 +218,9 @@ class PorcupineEngine:
     
     def close(self):
         """Eliberează resursele."""
-        if self._stream:
-            try:
-                self._stream.stop()
-                self._stream.close()
-            except Exception:
-                pass
-            self._stream = None
+        if self._reader:
+            self._reader.close()
+            self._reader = None
         
         if self._porcupine:
             try: